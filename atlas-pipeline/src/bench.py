@@ -0,0 +1,303 @@
+from __future__ import annotations
+
+import argparse
+import gc
+import io
+import json
+import platform
+import re
+import statistics
+import sys
+import time
+import tracemalloc
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable
+from urllib.parse import urlparse
+
+from config import BENCH_BASELINE_PATH, BENCH_DIR, BENCH_TOLERANCE, LOG_DIR
+from evidence import build_evidence_pack
+from extractor import extract_content
+from ingest import _extract_html_candidates, _parse_feed
+from judge import cluster_events
+from pipeline import to_normalized
+from rank import rank_events
+from sitemap import iter_sitemap
+from sources import SourceConfig, load_sources
+from theme_filter import evaluate_theme
+
+FIXTURES_DIR = BENCH_DIR / "fixtures"
+STAGES = ("ingest_rss", "ingest_sitemap", "ingest_html", "extract", "theme", "cluster", "evidence", "rank")
+CLUSTER_SCALE = 60
+MIN_STAGE_SECONDS = 1.0
+_WORD_RE = re.compile(r"[A-Za-z]+")
+
+
+@dataclass(frozen=True)
+class StageResult:
+    stage: str
+    items: int
+    calls: int
+    seconds: float
+    items_per_sec: float
+    p50_ms: float
+    p95_ms: float
+    peak_kb: float
+
+
+@dataclass(frozen=True)
+class Corpus:
+    rss: list[str]
+    sitemaps: list[bytes]
+    newsrooms: list[tuple[SourceConfig, str]]
+    articles: list[tuple[str, str]]
+    sources: dict[str, SourceConfig]
+
+
+def _domain(url: str) -> str:
+    hostname = urlparse(url).hostname or ""
+    return hostname[4:] if hostname.startswith("www.") else hostname
+
+
+def load_corpus(directory: Path = FIXTURES_DIR) -> Corpus:
+    manifest = json.loads((directory / "manifest.json").read_text(encoding="utf8"))
+    sources = {source.id: source for source in load_sources()}
+    return Corpus(
+        rss=[(directory / entry["file"]).read_text(encoding="utf8") for entry in manifest["rss"]],
+        sitemaps=[(directory / entry["file"]).read_bytes() for entry in manifest["sitemap"]],
+        newsrooms=[
+            (sources[entry["source_id"]], (directory / entry["file"]).read_text(encoding="utf8"))
+            for entry in manifest["newsroom"]
+        ],
+        articles=[(entry["url"], (directory / entry["file"]).read_text(encoding="utf8")) for entry in manifest["articles"]],
+        sources=sources,
+    )
+
+
+def _one(_: Any) -> int:
+    return 1
+
+
+def _percentile(values: list[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(fraction * (len(ordered) - 1))))]
+
+
+def measure(
+    stage: str,
+    inputs: list[Any],
+    run: Callable[[Any], Any],
+    *,
+    repeat: int,
+    min_seconds: float = MIN_STAGE_SECONDS,
+    size: Callable[[Any], int] = _one,
+) -> StageResult:
+    """Times ``run`` over ``inputs`` for at least ``repeat`` rounds and ``min_seconds``,
+    then makes one extra pass under tracemalloc for peak memory so allocation tracing
+    does not skew the timings."""
+    run(inputs[0])
+    latencies: list[float] = []
+    items = 0
+    rounds = 0
+    start = time.perf_counter()
+    while rounds < repeat or time.perf_counter() - start < min_seconds:
+        for value in inputs:
+            began = time.perf_counter()
+            run(value)
+            latencies.append((time.perf_counter() - began) * 1000)
+            items += size(value)
+        rounds += 1
+    seconds = time.perf_counter() - start
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        for value in inputs:
+            run(value)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return StageResult(
+        stage=stage,
+        items=items,
+        calls=len(latencies),
+        seconds=round(seconds, 4),
+        items_per_sec=round(items / seconds, 2) if seconds else 0.0,
+        p50_ms=round(statistics.median(latencies), 3),
+        p95_ms=round(_percentile(latencies, 0.95), 3),
+        peak_kb=round(peak / 1024, 1),
+    )
+
+
+def _themed_items(corpus: Corpus) -> list[dict[str, Any]]:
+    by_domain: dict[str, SourceConfig] = {}
+    for source in corpus.sources.values():
+        by_domain.setdefault(source.domain, source)
+    items = []
+    for url, html in corpus.articles:
+        source = by_domain.get(_domain(url))
+        if source is None:
+            continue
+        candidate = {"source": source, "url": url, "title": "", "summary": "", "published_at": None}
+        items.append(to_normalized(candidate, extract_content(url, html)))
+    return items
+
+
+def _scaled(items: list[dict[str, Any]], copies: int) -> list[dict[str, Any]]:
+    # Each copy gets its own vocabulary (every word suffixed with the copy number), so the
+    # copies form distinct stories that cluster like the original corpus does.
+    scaled = []
+    for copy in range(copies):
+        suffix = f"x{copy}"
+
+        def rename(text: str | None) -> str:
+            return _WORD_RE.sub(lambda match: match.group(0) + suffix, text or "")
+
+        for item in items:
+            scaled.append(
+                {
+                    **item,
+                    "event_id": f"{item['event_id']}-{copy}",
+                    "entity": rename(item["entity"]),
+                    "title": rename(item["title"]),
+                    "summary": rename(item["summary"]),
+                    "content": rename(item["content"]),
+                    "ticker": f"{item['ticker']}{suffix}" if item.get("ticker") else None,
+                }
+            )
+    return scaled
+
+
+def _clusters(items: list[dict[str, Any]]) -> list[list[dict[str, Any]]]:
+    return list(cluster_events(items).values())
+
+
+def _decision(cluster: list[dict[str, Any]]) -> dict[str, Any]:
+    first = cluster[0]
+    return {
+        "event_id": first["event_id"],
+        "event_type": first["event_type"],
+        "entity": first["entity"],
+        "items": cluster,
+        "evidence": build_evidence_pack(
+            cluster,
+            event_type=first["event_type"],
+            key_value_usd=first.get("key_value_usd"),
+            period=first.get("period"),
+            ticker=first.get("ticker"),
+        ),
+    }
+
+
+def run_benchmarks(
+    stages: list[str] | None = None,
+    *,
+    repeat: int = 5,
+    min_seconds: float = MIN_STAGE_SECONDS,
+    corpus: Corpus | None = None,
+) -> dict[str, Any]:
+    corpus = corpus or load_corpus()
+    wanted = list(stages or STAGES)
+    items = _themed_items(corpus)
+    scaled = _scaled(items, CLUSTER_SCALE)
+    clusters = _clusters(scaled)
+    decisions = [_decision(cluster) for cluster in clusters]
+
+    plans: dict[str, tuple[list[Any], Callable[[Any], Any], Callable[[Any], int]]] = {
+        "ingest_rss": (corpus.rss, _parse_feed, _one),
+        "ingest_sitemap": (corpus.sitemaps, lambda data: list(iter_sitemap(io.BytesIO(data))), _one),
+        "ingest_html": (corpus.newsrooms, lambda pair: _extract_html_candidates(*pair), _one),
+        "extract": (corpus.articles, lambda pair: extract_content(*pair), _one),
+        "theme": (items, lambda item: evaluate_theme(item["title"], item["summary"], item["content"]), _one),
+        "cluster": ([scaled], cluster_events, len),
+        "evidence": (clusters, _decision, len),
+        "rank": ([decisions], rank_events, len),
+    }
+    results = {}
+    for stage in wanted:
+        if stage not in plans:
+            raise ValueError(f"unknown stage: {stage}")
+        inputs, run, size = plans[stage]
+        results[stage] = asdict(measure(stage, inputs, run, repeat=repeat, min_seconds=min_seconds, size=size))
+    return {
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": repeat,
+        "min_seconds": min_seconds,
+        "corpus": {
+            "rss": len(corpus.rss),
+            "sitemaps": len(corpus.sitemaps),
+            "newsrooms": len(corpus.newsrooms),
+            "articles": len(corpus.articles),
+            "cluster_items": len(scaled),
+        },
+        "stages": results,
+    }
+
+
+def compare(current: dict[str, Any], baseline: dict[str, Any], *, tolerance: float = BENCH_TOLERANCE) -> list[str]:
+    regressions: list[str] = []
+    for stage, result in current.get("stages", {}).items():
+        reference = baseline.get("stages", {}).get(stage)
+        if not reference:
+            continue
+        if reference["items_per_sec"] and result["items_per_sec"] < reference["items_per_sec"] * (1 - tolerance):
+            regressions.append(f"{stage}: items/sec {result['items_per_sec']} < baseline {reference['items_per_sec']}")
+        # p95 is reported but not gated: on shared runners it is dominated by scheduler noise.
+        if reference["p50_ms"] and result["p50_ms"] > reference["p50_ms"] * (1 + tolerance):
+            regressions.append(f"{stage}: p50 {result['p50_ms']}ms > baseline {reference['p50_ms']}ms")
+        if reference["peak_kb"] and result["peak_kb"] > reference["peak_kb"] * (1 + tolerance):
+            regressions.append(f"{stage}: peak {result['peak_kb']}KB > baseline {reference['peak_kb']}KB")
+    return regressions
+
+
+def _print_table(report: dict[str, Any]) -> None:
+    print(f"{'stage':<16}{'items/s':>12}{'p50 ms':>10}{'p95 ms':>10}{'peak KB':>10}")
+    for stage, result in report["stages"].items():
+        print(
+            f"{stage:<16}{result['items_per_sec']:>12.1f}{result['p50_ms']:>10.2f}"
+            f"{result['p95_ms']:>10.2f}{result['peak_kb']:>10.1f}"
+        )
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark pipeline stages against the recorded fixture corpus")
+    parser.add_argument("--stage", action="append", choices=STAGES, help="stage to run (repeatable; default all)")
+    parser.add_argument("--repeat", type=int, default=5, help="minimum rounds per stage")
+    parser.add_argument("--min-seconds", type=float, default=MIN_STAGE_SECONDS, help="minimum timed seconds per stage")
+    parser.add_argument("--output", type=Path, help="results path (default logs/bench-<stamp>.json)")
+    parser.add_argument("--baseline", type=Path, default=BENCH_BASELINE_PATH)
+    parser.add_argument("--tolerance", type=float, default=BENCH_TOLERANCE)
+    parser.add_argument("--update-baseline", action="store_true", help="store these results as the new baseline")
+    args = parser.parse_args(argv)
+
+    report = run_benchmarks(args.stage, repeat=args.repeat, min_seconds=args.min_seconds)
+    _print_table(report)
+
+    output = args.output
+    if output is None:
+        LOG_DIR.mkdir(parents=True, exist_ok=True)
+        output = LOG_DIR / f"bench-{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')}.json"
+    output.write_text(json.dumps(report, indent=2), encoding="utf8")
+    print(f"[bench] wrote {output}")
+
+    if args.update_baseline:
+        args.baseline.write_text(json.dumps(report, indent=2) + "\n", encoding="utf8")
+        print(f"[bench] baseline updated: {args.baseline}")
+        return 0
+    if not args.baseline.exists():
+        print("[bench] no baseline to compare against")
+        return 0
+    regressions = compare(report, json.loads(args.baseline.read_text(encoding="utf8")), tolerance=args.tolerance)
+    for line in regressions:
+        print(f"[bench] regression {line}")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,212 @@
+from __future__ import annotations
+
+import hashlib
+import io
+import json
+import os
+import threading
+import time
+import zipfile
+from pathlib import Path
+from typing import Any, Callable
+from urllib.parse import urlparse
+
+import requests
+from requests.structures import CaseInsensitiveDict
+from requests.utils import get_encoding_from_headers
+
+from config import CASSETTE_LATENCY, CASSETTE_LATENCY_BY_DOMAIN, CASSETTE_MODE, CASSETTE_PATH
+
+_INDEX = "index.json"
+_DROPPED_HEADERS = {"content-encoding", "content-length", "transfer-encoding", "set-cookie", "connection"}
+
+
+class CassetteMiss(RuntimeError):
+    pass
+
+
+class _ReplayStream(io.BytesIO):
+    """BytesIO standing in for ``response.raw``; accepts the urllib3 attributes callers set."""
+
+    decode_content = True
+    auto_close = False
+
+
+def request_key(method: str, url: str, body: Any = None) -> str:
+    raw = f"{method.upper()} {url}"
+    if body is not None:
+        raw += " " + json.dumps(body, sort_keys=True, ensure_ascii=True)
+    return hashlib.sha256(raw.encode("utf8")).hexdigest()
+
+
+def _domain(url: str) -> str:
+    hostname = urlparse(url).hostname or ""
+    return hostname[4:] if hostname.startswith("www.") else hostname
+
+
+class Cassette:
+    """Zip archive of HTTP exchanges: ``index.json`` plus one deflated member per body.
+
+    In ``record`` mode requests go to the network and every response (status, headers,
+    final URL, body, elapsed time) is kept; ``flush`` merges them into the archive.
+    In ``replay`` mode responses come only from the archive, optionally delayed by
+    the recorded time, a fixed number of seconds, or a per-domain override.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        *,
+        mode: str,
+        latency: str = "0",
+        latency_by_domain: dict[str, float] | None = None,
+    ):
+        self.path = Path(path)
+        self.mode = mode
+        self.latency = latency
+        self.latency_by_domain = dict(latency_by_domain or {})
+        self._entries: dict[str, dict[str, Any]] = {}
+        self._bodies: dict[str, bytes] = {}
+        self._loaded = False
+        self._dirty = False
+        self._lock = threading.Lock()
+        self.recorded = 0
+        self.replayed = 0
+        self.misses = 0
+
+    def _load(self) -> None:
+        if self._loaded:
+            return
+        self._loaded = True
+        if not self.path.exists():
+            return
+        with zipfile.ZipFile(self.path) as archive:
+            for entry in json.loads(archive.read(_INDEX)):
+                self._entries[entry["key"]] = entry
+                self._bodies[entry["key"]] = archive.read(entry["key"])
+
+    def request(self, method: str, url: str, send: Callable[..., Any], *, body: Any = None, **kwargs: Any) -> Any:
+        key = request_key(method, url, body)
+        if self.mode == "replay":
+            with self._lock:
+                self._load()
+                entry = self._entries.get(key)
+                payload = self._bodies.get(key, b"")
+                if entry is None:
+                    self.misses += 1
+                else:
+                    self.replayed += 1
+            if entry is None:
+                raise CassetteMiss(f"no recorded response for {method.upper()} {url}")
+            self._delay(url, float(entry.get("elapsed") or 0.0))
+            return _response(entry, payload)
+
+        started = time.monotonic()
+        response = send(url, **kwargs)
+        payload = response.content or b""
+        entry = {
+            "key": key,
+            "method": method.upper(),
+            "url": url,
+            "final_url": str(response.url),
+            "status": response.status_code,
+            "headers": {
+                name.lower(): value
+                for name, value in response.headers.items()
+                if name.lower() not in _DROPPED_HEADERS
+            },
+            "elapsed": round(time.monotonic() - started, 4),
+            "recorded_at": time.time(),
+        }
+        with self._lock:
+            self._load()
+            self._entries[key] = entry
+            self._bodies[key] = payload
+            self._dirty = True
+            self.recorded += 1
+        return _response(entry, payload)
+
+    def _delay(self, url: str, recorded: float) -> None:
+        seconds = self.latency_by_domain.get(_domain(url))
+        if seconds is None:
+            if self.latency == "recorded":
+                seconds = recorded
+            else:
+                try:
+                    seconds = float(self.latency)
+                except ValueError:
+                    seconds = 0.0
+        if seconds > 0:
+            time.sleep(seconds)
+
+    def flush(self) -> None:
+        with self._lock:
+            if not self._dirty:
+                return
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(".tmp")
+            with zipfile.ZipFile(tmp_path, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+                archive.writestr(_INDEX, json.dumps(list(self._entries.values())))
+                for key, payload in self._bodies.items():
+                    archive.writestr(key, payload)
+            os.replace(tmp_path, self.path)
+            self._dirty = False
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "mode": self.mode,
+                "path": str(self.path),
+                "entries": len(self._entries),
+                "recorded": self.recorded,
+                "replayed": self.replayed,
+                "misses": self.misses,
+            }
+
+
+def _response(entry: dict[str, Any], payload: bytes) -> requests.Response:
+    response = requests.Response()
+    response.status_code = int(entry["status"])
+    response.headers = CaseInsensitiveDict(entry.get("headers") or {})
+    response.url = entry.get("final_url") or entry["url"]
+    response.encoding = get_encoding_from_headers(response.headers)
+    response.reason = ""
+    response.raw = _ReplayStream(payload)
+    response._content = payload
+    response._content_consumed = True
+    return response
+
+
+_CASSETTE: Cassette | None = (
+    Cassette(
+        CASSETTE_PATH,
+        mode=CASSETTE_MODE,
+        latency=CASSETTE_LATENCY,
+        latency_by_domain=CASSETTE_LATENCY_BY_DOMAIN,
+    )
+    if CASSETTE_MODE in ("record", "replay")
+    else None
+)
+
+
+def through_cassette(method: str, url: str, send: Callable[..., Any], *, body: Any = None, **kwargs: Any) -> Any:
+    """Sends via ``send(url, **kwargs)`` or, when a cassette is active, records or replays it.
+    ``body`` (a JSON payload) is part of the request key and forwarded as ``json=``."""
+    if body is not None:
+        kwargs["json"] = body
+    if _CASSETTE is None:
+        return send(url, **kwargs)
+    return _CASSETTE.request(method, url, send, body=body, **kwargs)
+
+
+def replaying() -> bool:
+    return _CASSETTE is not None and _CASSETTE.mode == "replay"
+
+
+def cassette_stats() -> dict[str, Any] | None:
+    return _CASSETTE.stats() if _CASSETTE is not None else None
+
+
+def flush_cassette() -> None:
+    if _CASSETTE is not None:
+        _CASSETTE.flush()
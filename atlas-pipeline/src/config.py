@@ -60,18 +60,96 @@ MAX_ITEMS = int(os.getenv("ATLAS_MAX_ITEMS", "3"))
 MAX_PER_SOURCE = int(os.getenv("ATLAS_MAX_PER_SOURCE", "12"))
 HTML_MAX_LINKS = int(os.getenv("ATLAS_HTML_MAX_LINKS", "50"))
 SITEMAP_MAX_LINKS = int(os.getenv("ATLAS_SITEMAP_MAX_LINKS", "100"))
+SITEMAP_MAX_AGE_HOURS = float(os.getenv("ATLAS_SITEMAP_MAX_AGE_HOURS", str(24 * 30)))
+SITEMAP_MAX_DEPTH = int(os.getenv("ATLAS_SITEMAP_MAX_DEPTH", "2"))
+SITEMAP_MAX_FILES = int(os.getenv("ATLAS_SITEMAP_MAX_FILES", "10"))
+INGEST_WORKERS = int(os.getenv("ATLAS_INGEST_WORKERS", "8"))
+EXTRACT_WORKERS = int(os.getenv("ATLAS_EXTRACT_WORKERS", str(min(4, os.cpu_count() or 1))))
+EXTRACT_TIMEOUT = float(os.getenv("ATLAS_EXTRACT_TIMEOUT", "30"))
+PIPELINE_MODE = (os.getenv("ATLAS_PIPELINE_MODE") or "batch").lower()
+PRESCREEN_MODE = (os.getenv("ATLAS_PRESCREEN_MODE") or "conservative").lower()
+STREAM_QUEUE_SIZE = int(os.getenv("ATLAS_STREAM_QUEUE_SIZE", "32"))
+
+FETCH_MIN_INTERVAL = float(os.getenv("ATLAS_FETCH_MIN_INTERVAL", "1.0"))
+FETCH_BURST = float(os.getenv("ATLAS_FETCH_BURST", "1"))
+FETCH_BACKOFF_BASE = float(os.getenv("ATLAS_FETCH_BACKOFF_BASE", "0.8"))
+FETCH_BACKOFF_MAX = float(os.getenv("ATLAS_FETCH_BACKOFF_MAX", "30"))
+FETCH_MAX_RETRY_AFTER = float(os.getenv("ATLAS_FETCH_MAX_RETRY_AFTER", "60"))
+FETCH_BREAKER_THRESHOLD = int(os.getenv("ATLAS_FETCH_BREAKER_THRESHOLD", "5"))
+FETCH_MAX_BYTES_ARTICLE = int(os.getenv("ATLAS_FETCH_MAX_BYTES_ARTICLE", str(4 * 1024 * 1024)))
+FETCH_MAX_BYTES_FEED = int(os.getenv("ATLAS_FETCH_MAX_BYTES_FEED", str(16 * 1024 * 1024)))
 
 SYNC_CONTENT_ATLAS = os.getenv("ATLAS_SYNC_CONTENT_ATLAS", "false").lower() == "true"
 
 WINDOW_HOURS = [48, 24 * 7, 24 * 30]
 LONG_WINDOW_MIN_SCORE = float(os.getenv("ATLAS_LONG_WINDOW_MIN_SCORE", "2.5"))
 MIN_BODY_LENGTH = int(os.getenv("ATLAS_MIN_BODY_LENGTH", "500"))
+CLUSTER_SIMILARITY = float(os.getenv("ATLAS_CLUSTER_SIMILARITY", "0.12"))
+CLUSTER_PERMUTATIONS = int(os.getenv("ATLAS_CLUSTER_PERMUTATIONS", "64"))
+CLUSTER_BANDS = int(os.getenv("ATLAS_CLUSTER_BANDS", "21"))
+CLUSTER_WINDOW_DAYS = int(os.getenv("ATLAS_CLUSTER_WINDOW_DAYS", "3"))
+CLUSTER_TEXT_CHARS = int(os.getenv("ATLAS_CLUSTER_TEXT_CHARS", "600"))
 
 LOG_DIR = REPO_ROOT / "atlas-pipeline" / "logs"
+PROFILE_ENABLED = os.getenv("ATLAS_PROFILE", "false").lower() == "true"
+PROFILE_TOP_N = int(os.getenv("ATLAS_PROFILE_TOP_N", "25"))
+PROFILE_SAMPLE_RATE = float(os.getenv("ATLAS_PROFILE_SAMPLE_RATE", "0.1"))
+METRICS_TEXTFILE = Path(os.environ["ATLAS_METRICS_TEXTFILE"]) if os.getenv("ATLAS_METRICS_TEXTFILE") else None
+BENCH_DIR = REPO_ROOT / "atlas-pipeline" / "bench"
+BENCH_BASELINE_PATH = BENCH_DIR / "baseline.json"
+BENCH_TOLERANCE = float(os.getenv("ATLAS_BENCH_TOLERANCE", "0.4"))
+CACHE_DIR = Path(os.getenv("ATLAS_CACHE_DIR") or REPO_ROOT / "atlas-pipeline" / ".cache")
+
+REDIRECTS_PATH = CACHE_DIR / "redirects.json"
+STATE_DB_PATH = CACHE_DIR / "state.sqlite3"
+STATE_RETENTION_DAYS = int(os.getenv("ATLAS_STATE_RETENTION_DAYS", "0"))
+WATERMARKS_ENABLED = os.getenv("ATLAS_WATERMARKS_ENABLED", "true").lower() == "true"
+SCHEDULER_ENABLED = os.getenv("ATLAS_SCHEDULER_ENABLED", "true").lower() == "true"
+SCHEDULE_PERIOD_HOURS = float(os.getenv("ATLAS_SCHEDULE_PERIOD_HOURS", "24"))
+SCHEDULE_PRIORITY_WEIGHT = float(os.getenv("ATLAS_SCHEDULE_PRIORITY_WEIGHT", "0.3"))
+SCHEDULE_MIN_LINK_SHARE = float(os.getenv("ATLAS_SCHEDULE_MIN_LINK_SHARE", "0.25"))
+SCHEDULE_DECAY = float(os.getenv("ATLAS_SCHEDULE_DECAY", "0.8"))
+
+CASSETTE_MODE = (os.getenv("ATLAS_CASSETTE_MODE") or "off").lower()
+CASSETTE_PATH = Path(os.getenv("ATLAS_CASSETTE") or CACHE_DIR / "cassette.zip")
+CASSETTE_LATENCY = os.getenv("ATLAS_CASSETTE_LATENCY", "0").lower()
+CASSETTE_LATENCY_BY_DOMAIN = {
+    domain.strip(): float(seconds)
+    for domain, _, seconds in (
+        pair.partition("=") for pair in (os.getenv("ATLAS_CASSETTE_LATENCY_BY_DOMAIN") or "").split(",") if "=" in pair
+    )
+}
+
+HTTP_CACHE_ENABLED = os.getenv("ATLAS_HTTP_CACHE_ENABLED", "true").lower() == "true"
+HTTP_CACHE_DIR = CACHE_DIR / "http"
+HTTP_CACHE_MAX_BYTES = int(os.getenv("ATLAS_HTTP_CACHE_MAX_MB", "200")) * 1024 * 1024
+HTTP_CACHE_TTL_FEED = float(os.getenv("ATLAS_HTTP_CACHE_TTL_FEED", "900"))
+HTTP_CACHE_TTL_ARTICLE = float(os.getenv("ATLAS_HTTP_CACHE_TTL_ARTICLE", str(7 * 24 * 3600)))
+EXTRACT_CACHE_ENABLED = os.getenv("ATLAS_EXTRACT_CACHE_ENABLED", "true").lower() == "true"
+EXTRACT_CACHE_PATH = CACHE_DIR / "extractions.json.z"
+EXTRACT_CACHE_MAX_BYTES = int(os.getenv("ATLAS_EXTRACT_CACHE_MAX_MB", "64")) * 1024 * 1024
+EXTRACT_STRATEGY_ENABLED = os.getenv("ATLAS_EXTRACT_STRATEGY_ENABLED", "true").lower() == "true"
+EXTRACT_STRATEGY_PATH = CACHE_DIR / "extractor_strategy.json"
+EXTRACT_STRATEGY_MIN_PAGES = int(os.getenv("ATLAS_EXTRACT_STRATEGY_MIN_PAGES", "3"))
+EXTRACT_STRATEGY_PROBE_EVERY = int(os.getenv("ATLAS_EXTRACT_STRATEGY_PROBE_EVERY", "10"))
+EXTRACT_STRATEGY_DECAY = float(os.getenv("ATLAS_EXTRACT_STRATEGY_DECAY", "0.9"))
 
 LLM_ENABLED = os.getenv("ATLAS_LLM_ENABLED", "false").lower() == "true"
 LLM_PROVIDER = (os.getenv("ATLAS_LLM_PROVIDER") or "openrouter").lower()
 OPENROUTER_MODEL = os.getenv("ATLAS_LLM_MODEL") or "meta-llama/llama-3.2-3b-instruct:free"
 OPENROUTER_API_KEY = os.getenv("OPENROUTER_API_KEY")
+LLM_BASE_URL = (os.getenv("ATLAS_LLM_BASE_URL") or "https://openrouter.ai/api/v1").rstrip("/")
+LLM_TIMEOUT = float(os.getenv("ATLAS_LLM_TIMEOUT", "35"))
+LLM_CONCURRENCY = int(os.getenv("ATLAS_LLM_CONCURRENCY", "4"))
+LLM_BATCH_SIZE = int(os.getenv("ATLAS_LLM_BATCH_SIZE", "1"))
+LLM_RATE_PER_SEC = float(os.getenv("ATLAS_LLM_RATE", "1.0"))
+LLM_RATE_BURST = float(os.getenv("ATLAS_LLM_BURST", "4"))
+LLM_MAX_RETRIES = int(os.getenv("ATLAS_LLM_MAX_RETRIES", "3"))
+LLM_RUN_DEADLINE = float(os.getenv("ATLAS_LLM_DEADLINE", "300"))
+
+LLM_CACHE_ENABLED = os.getenv("ATLAS_LLM_CACHE_ENABLED", "true").lower() == "true"
+LLM_CACHE_PATH = CACHE_DIR / "llm_verdicts.json"
+LLM_CACHE_TTL = float(os.getenv("ATLAS_LLM_CACHE_TTL", str(30 * 24 * 3600)))
+LLM_CACHE_MAX_ENTRIES = int(os.getenv("ATLAS_LLM_CACHE_MAX_ENTRIES", "5000"))
 
 USER_AGENT = os.getenv("ATLAS_USER_AGENT", "Atlas/1.0")
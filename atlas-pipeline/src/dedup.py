@@ -1,17 +1,59 @@
 from __future__ import annotations
 
-from typing import Any
+from typing import Any, Container
 
+from state import StateStore, event_aliases
+from urls import canonicalize_url, url_aliases
 
-def filter_new_entries(items: list[dict[str, Any]], state: dict[str, Any]) -> list[dict[str, Any]]:
-    known_events = state.get("events", state.get("entries", []))
-    known_urls = {entry.get("url") for entry in known_events if entry.get("url")}
-    known_ids = {entry.get("event_id") or entry.get("id") for entry in known_events if entry.get("event_id") or entry.get("id")}
+
+def _known_events(state: dict[str, Any]) -> list[dict[str, Any]]:
+    return state.get("events", state.get("entries", []))
+
+
+def build_known_url_index(state: dict[str, Any] | StateStore) -> Container[str]:
+    if isinstance(state, StateStore):
+        return state.urls
+    known: set[str] = set()
+    for entry in _known_events(state):
+        if entry.get("url"):
+            known.add(canonicalize_url(entry["url"]))
+        known.update(canonicalize_url(url) for url in event_aliases(entry)[1])
+    return known
+
+
+def _build_known_id_index(state: dict[str, Any] | StateStore) -> Container[str]:
+    if isinstance(state, StateStore):
+        return state.ids
+    known: set[str] = set()
+    for entry in _known_events(state):
+        event_id = entry.get("event_id") or entry.get("id")
+        if event_id:
+            known.add(event_id)
+        known.update(event_aliases(entry)[0])
+    return known
+
+
+def _is_known_url(url: str, known_urls: Container[str]) -> bool:
+    return any(alias in known_urls for alias in url_aliases(url))
+
+
+def filter_known_entries(entries: list[dict[str, Any]], known_urls: Container[str]) -> list[dict[str, Any]]:
+    unknown: list[dict[str, Any]] = []
+    for entry in entries:
+        if _is_known_url(entry.get("url") or "", known_urls):
+            continue
+        unknown.append(entry)
+    return unknown
+
+
+def filter_new_entries(items: list[dict[str, Any]], state: dict[str, Any] | StateStore) -> list[dict[str, Any]]:
+    known_urls = build_known_url_index(state)
+    known_ids = _build_known_id_index(state)
     fresh: list[dict[str, Any]] = []
     for item in items:
         link = item.get("link")
         event_id = item.get("event_id")
-        if link in known_urls or event_id in known_ids:
+        if (link and _is_known_url(link, known_urls)) or event_id in known_ids:
             continue
         fresh.append(item)
     return fresh
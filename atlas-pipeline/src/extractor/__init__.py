@@ -1,6 +1,20 @@
 from __future__ import annotations
 
 from .content import ExtractedContent, extract_content
-from .fetch import FetchResult, fetch_url
+from .extraction_cache import extraction_cache_stats, flush_extraction_cache
+from .fetch import FetchResult, cache_stats, fetch_url, flush_http_cache, rate_limit_stats
+from .strategy import extractor_strategy_stats, flush_extractor_strategy
 
-__all__ = ["ExtractedContent", "FetchResult", "extract_content", "fetch_url"]
+__all__ = [
+    "ExtractedContent",
+    "FetchResult",
+    "cache_stats",
+    "extract_content",
+    "extraction_cache_stats",
+    "extractor_strategy_stats",
+    "fetch_url",
+    "flush_extraction_cache",
+    "flush_extractor_strategy",
+    "flush_http_cache",
+    "rate_limit_stats",
+]
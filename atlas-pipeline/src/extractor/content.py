@@ -1,9 +1,12 @@
 from __future__ import annotations
 
+import time
 from dataclasses import dataclass
 
+from .document import ParsedDocument, parse_document
 from .metadata import Metadata, extract_metadata
-from .parse_html import ParsedBody, parse_html
+from .parse_html import ExtractorAttempt, ParsedBody, _is_paywalled, parse_html
+from .structured import StructuredArticle, extract_structured
 
 
 @dataclass(frozen=True)
@@ -18,22 +21,45 @@ class ExtractedContent:
     text: str
     extraction_method: str
     paywalled: bool
+    parse_ms: float = 0.0
+    # Extractors tried for the body, in order; empty when the result came from the cache.
+    attempts: tuple[ExtractorAttempt, ...] = ()
 
 
-def extract_content(url: str, html: str) -> ExtractedContent:
-    metadata: Metadata = extract_metadata(html, base_url=url)
-    parsed: ParsedBody = parse_html(html, url=url)
+def extract_content(url: str, html: str, *, prefer: str | None = None) -> ExtractedContent:
+    document: ParsedDocument = parse_document(html)
+    metadata: Metadata = extract_metadata(document, base_url=url)
+    started = time.perf_counter()
+    structured: StructuredArticle | None = extract_structured(document)
+    if structured is not None and structured.complete:
+        # The page states its own article: no need to strip boilerplate from the DOM.
+        attempt = ExtractorAttempt(
+            method=structured.method, chars=len(structured.body), ms=(time.perf_counter() - started) * 1000
+        )
+        parsed: ParsedBody = ParsedBody(
+            text=structured.body,
+            method=structured.method,
+            paywalled=_is_paywalled(structured.body),
+            attempts=(attempt,),
+        )
+    else:
+        parsed = parse_html(document, url=url, prefer=prefer)
     canonical = metadata.canonical_url or url
-    title = metadata.title or metadata.og_title or canonical
+    title = metadata.title or metadata.og_title or (structured.headline if structured else None) or canonical
+    # datePublished names the publication itself; the meta tags also carry modified times.
+    published_at = (structured.published_at if structured else None) or metadata.published_at
+    author = metadata.author or (structured.author if structured else None)
     return ExtractedContent(
         url=url,
         canonical_url=canonical,
         title=title,
-        published_at=metadata.published_at,
-        author=metadata.author,
+        published_at=published_at,
+        author=author,
         og_title=metadata.og_title,
         og_description=metadata.og_description,
         text=parsed.text,
         extraction_method=parsed.method,
         paywalled=parsed.paywalled,
+        parse_ms=document.parse_ms,
+        attempts=parsed.attempts,
     )
@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import time
+from copy import deepcopy
+from dataclasses import dataclass
+
+from lxml import etree
+from lxml.html import HtmlElement, HTMLParser, document_fromstring
+
+_PARSER = HTMLParser(collect_ids=False, default_doctype=False, remove_comments=True, remove_pis=True)
+_INVISIBLE_TAGS = ("script", "style", "noscript", "svg")
+
+
+@dataclass(frozen=True)
+class ParsedDocument:
+    html: str
+    tree: HtmlElement | None
+    parse_ms: float
+
+    def copy_tree(self) -> HtmlElement | None:
+        return deepcopy(self.tree) if self.tree is not None else None
+
+
+def _build_tree(html: str) -> HtmlElement | None:
+    if not html.strip():
+        return None
+    try:
+        return document_fromstring(html, parser=_PARSER)
+    except ValueError:
+        return document_fromstring(html.encode("utf8"), parser=_PARSER)
+    except etree.ParserError:
+        return None
+
+
+def parse_document(html: str) -> ParsedDocument:
+    if not isinstance(html, str):
+        raise TypeError(f"expected HTML text, got {type(html).__name__}")
+    start = time.perf_counter()
+    tree = _build_tree(html)
+    return ParsedDocument(html=html, tree=tree, parse_ms=(time.perf_counter() - start) * 1000)
+
+
+def element_text(element: HtmlElement | None) -> str:
+    if element is None:
+        return ""
+    return " ".join(chunk.strip() for chunk in element.itertext() if chunk and chunk.strip())
+
+
+def visible_text(document: ParsedDocument) -> str:
+    tree = document.copy_tree()
+    if tree is None:
+        return ""
+    etree.strip_elements(tree, *_INVISIBLE_TAGS, with_tail=False)
+    return element_text(tree)
@@ -0,0 +1,171 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import zlib
+from collections import OrderedDict
+from dataclasses import asdict, replace
+from importlib import metadata
+from pathlib import Path
+from typing import Any
+
+from config import EXTRACT_CACHE_ENABLED, EXTRACT_CACHE_MAX_BYTES, EXTRACT_CACHE_PATH
+
+from .content import ExtractedContent
+
+# Modules whose code decides what extract_content returns, and the libraries they call.
+_EXTRACTOR_MODULES = ("content.py", "document.py", "metadata.py", "parse_html.py", "structured.py")
+_EXTRACTOR_LIBRARIES = ("trafilatura", "readability-lxml", "lxml", "beautifulsoup4")
+
+
+def extractor_version() -> str:
+    """Fingerprint of the extractor code and library versions; a cache written under a
+    different fingerprint is discarded on load."""
+    digest = hashlib.sha256()
+    directory = Path(__file__).resolve().parent
+    for name in _EXTRACTOR_MODULES:
+        digest.update(name.encode("utf8"))
+        digest.update((directory / name).read_bytes())
+    for library in _EXTRACTOR_LIBRARIES:
+        try:
+            version = metadata.version(library)
+        except metadata.PackageNotFoundError:
+            version = "missing"
+        digest.update(f"{library}={version}".encode("utf8"))
+    return digest.hexdigest()[:16]
+
+
+def extraction_key(url: str, html: str) -> str:
+    # Runs of whitespace collapse, so re-indented templates and trailing newlines keep the key.
+    # The URL is part of the key because relative canonicals resolve against it.
+    normalized = " ".join(html.split())
+    return hashlib.sha256(f"{url}\n{normalized}".encode("utf8")).hexdigest()
+
+
+class ExtractionCache:
+    """Persistent ``ExtractedContent`` by page URL and normalized body.
+
+    Stored as one zlib-compressed JSON file, bounded by the total size of the cached text
+    with least-recently-used eviction.
+    """
+
+    def __init__(self, path: Path, *, max_bytes: int, version: str | None = None):
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.version = version or extractor_version()
+        self.hits = 0
+        self.misses = 0
+        self.invalidated = False
+        self._entries: OrderedDict[str, dict[str, Any]] = OrderedDict()
+        self._size = 0
+        self._loaded = False
+        self._dirty = False
+        self._lock = threading.Lock()
+
+    def _load(self) -> None:
+        if self._loaded:
+            return
+        self._loaded = True
+        try:
+            payload = json.loads(zlib.decompress(self.path.read_bytes()))
+        except Exception:
+            return
+        if payload.get("version") != self.version:
+            self.invalidated = True
+            self._dirty = True
+            return
+        for entry in payload.get("entries", []):
+            if isinstance(entry, dict) and entry.get("key") and isinstance(entry.get("content"), dict):
+                self._entries[entry["key"]] = entry
+                self._size += _entry_size(entry)
+
+    def get(self, url: str, html: str) -> ExtractedContent | None:
+        if not isinstance(html, str):
+            return None
+        key = extraction_key(url, html)
+        with self._lock:
+            self._load()
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._dirty = True
+            self.hits += 1
+        try:
+            content = ExtractedContent(**entry["content"])
+        except TypeError:
+            return None
+        # Nothing was parsed or extracted for this run.
+        return replace(content, url=url, parse_ms=0.0, attempts=())
+
+    def put(self, url: str, html: str, content: ExtractedContent) -> None:
+        if not isinstance(html, str):
+            return
+        key = extraction_key(url, html)
+        entry = {"key": key, "content": asdict(replace(content, attempts=()))}
+        with self._lock:
+            self._load()
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= _entry_size(previous)
+            self._entries[key] = entry
+            self._size += _entry_size(entry)
+            while self._size > self.max_bytes and len(self._entries) > 1:
+                _, oldest = self._entries.popitem(last=False)
+                self._size -= _entry_size(oldest)
+            self._dirty = True
+
+    def flush(self) -> None:
+        with self._lock:
+            if not self._dirty:
+                return
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            payload = {"version": self.version, "entries": list(self._entries.values())}
+            tmp_path = self.path.with_suffix(".tmp")
+            tmp_path.write_bytes(zlib.compress(json.dumps(payload).encode("utf8"), 6))
+            os.replace(tmp_path, self.path)
+            self._dirty = False
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "version": self.version,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+                "entries": len(self._entries),
+                "text_bytes": self._size,
+                "invalidated": self.invalidated,
+            }
+
+
+def _entry_size(entry: dict[str, Any]) -> int:
+    content = entry["content"]
+    return len(content.get("text") or "") + len(content.get("title") or "") + 256
+
+
+_EXTRACTION_CACHE: ExtractionCache | None = (
+    ExtractionCache(EXTRACT_CACHE_PATH, max_bytes=EXTRACT_CACHE_MAX_BYTES) if EXTRACT_CACHE_ENABLED else None
+)
+
+
+def cached_extraction(url: str, html: str) -> ExtractedContent | None:
+    return _EXTRACTION_CACHE.get(url, html) if _EXTRACTION_CACHE is not None else None
+
+
+def remember_extraction(url: str, html: str, content: ExtractedContent) -> None:
+    if _EXTRACTION_CACHE is not None:
+        _EXTRACTION_CACHE.put(url, html, content)
+
+
+def flush_extraction_cache() -> None:
+    if _EXTRACTION_CACHE is not None:
+        _EXTRACTION_CACHE.flush()
+
+
+def extraction_cache_stats() -> dict[str, Any] | None:
+    return _EXTRACTION_CACHE.stats() if _EXTRACTION_CACHE is not None else None
@@ -1,22 +1,97 @@
 from __future__ import annotations
 
-import time
-from dataclasses import dataclass
+import codecs
+import re
+import threading
+from concurrent.futures import Future
+from contextlib import contextmanager
+from dataclasses import dataclass, replace
 from datetime import datetime, timezone
-from typing import Any
+from typing import Any, BinaryIO, Iterator, Literal
 from urllib.parse import urlparse
 
 import requests
 
-from config import USER_AGENT
+from cassette import CassetteMiss, through_cassette
+from config import (
+    CASSETTE_MODE,
+    FETCH_BACKOFF_BASE,
+    FETCH_BACKOFF_MAX,
+    FETCH_BREAKER_THRESHOLD,
+    FETCH_BURST,
+    FETCH_MAX_BYTES_ARTICLE,
+    FETCH_MAX_BYTES_FEED,
+    FETCH_MAX_RETRY_AFTER,
+    FETCH_MIN_INTERVAL,
+    HTTP_CACHE_DIR,
+    HTTP_CACHE_ENABLED,
+    HTTP_CACHE_MAX_BYTES,
+    HTTP_CACHE_TTL_ARTICLE,
+    HTTP_CACHE_TTL_FEED,
+    USER_AGENT,
+)
+from metrics import incr
+from ratelimit import DomainLimiter, parse_retry_after
+from urls import remember_redirect
+
+from .http_cache import CachedResponse, HttpCache
 
 _CACHE: dict[str, "FetchResult"] = {}
-_LAST_REQUEST: dict[str, float] = {}
+_INFLIGHT: dict[str, "Future[FetchResult]"] = {}
+_LOCK = threading.Lock()
 _SESSION = requests.Session()
+_CACHE_STATS: dict[str, int] = {"hit": 0, "miss": 0, "revalidated": 0}
+_DISK_CACHE: HttpCache | None = (
+    HttpCache(
+        HTTP_CACHE_DIR,
+        max_bytes=HTTP_CACHE_MAX_BYTES,
+        ttl_by_kind={"feed": HTTP_CACHE_TTL_FEED, "article": HTTP_CACHE_TTL_ARTICLE},
+    )
+    # Recording and replaying must see every request, so the disk cache stays out of the way.
+    if HTTP_CACHE_ENABLED and CASSETTE_MODE == "off"
+    else None
+)
 
 DEFAULT_TIMEOUT = 25
 DEFAULT_RETRIES = 2
-MIN_INTERVAL_PER_DOMAIN = 1.0
+MIN_INTERVAL_PER_DOMAIN = FETCH_MIN_INTERVAL
+_LIMITER = DomainLimiter(
+    interval=MIN_INTERVAL_PER_DOMAIN,
+    burst=FETCH_BURST,
+    failure_threshold=FETCH_BREAKER_THRESHOLD,
+    backoff_base=FETCH_BACKOFF_BASE,
+    backoff_max=FETCH_BACKOFF_MAX,
+    max_retry_after=FETCH_MAX_RETRY_AFTER,
+)
+
+# Bodies are read in chunks and abandoned once they pass the cap for their kind.
+MAX_BYTES_BY_KIND = {"article": FETCH_MAX_BYTES_ARTICLE, "feed": FETCH_MAX_BYTES_FEED}
+CHUNK_SIZE = 64 * 1024
+# Media types worth parsing; a missing or generic type is decided by sniffing the body.
+_MARKUP_TYPES = {"text/html", "application/xhtml+xml", "text/plain"}
+_FEED_TYPES = {"application/rss+xml", "application/atom+xml", "application/rdf+xml", "application/xml", "text/xml"}
+_ACCEPTED_TYPES = {"article": _MARKUP_TYPES, "feed": _MARKUP_TYPES | _FEED_TYPES}
+_GENERIC_TYPES = {"", "application/octet-stream", "binary/octet-stream"}
+# Leading bytes of documents, archives and media that are never markup.
+_BINARY_MAGIC = (
+    b"%PDF-",
+    b"PK\x03\x04",
+    b"\xd0\xcf\x11\xe0",
+    b"\x89PNG",
+    b"GIF8",
+    b"\xff\xd8\xff",
+    b"RIFF",
+    b"OggS",
+    b"ID3",
+    b"\x1f\x8b",
+    b"\x1a\x45\xdf\xa3",
+)
+_META_CHARSET_RE = re.compile(rb"""<meta[^>]+charset\s*=\s*["']?\s*([\w.:-]+)""", re.IGNORECASE)
+_XML_ENCODING_RE = re.compile(rb"""^\s*<\?xml[^>]+encoding\s*=\s*["']([\w.:-]+)""")
+# Labels browsers read as windows-1252; decoding them as strict latin-1 garbles smart quotes.
+_CHARSET_ALIASES = {"iso-8859-1": "cp1252", "latin1": "cp1252", "latin-1": "cp1252", "us-ascii": "cp1252", "ascii": "cp1252"}
+
+SkipReason = Literal["too_large", "unsupported_type", "binary_content"]
 
 
 @dataclass(frozen=True)
@@ -26,9 +101,13 @@ class FetchResult:
     status: int
     content_type: str | None
     text: str
+    # Bytes received on the wire, before content decoding.
     bytes: int
     fetched_at: str
     from_cache: bool
+    cache_status: str = "miss"
+    # Set when the body was not worth parsing; ``text`` is then empty.
+    skip_reason: SkipReason | None = None
 
 
 def _now() -> str:
@@ -40,13 +119,11 @@ def _domain(url: str) -> str:
     return hostname[4:] if hostname.startswith("www.") else hostname
 
 
-def _sleep_for_domain(domain: str) -> None:
-    last = _LAST_REQUEST.get(domain)
-    if last is None:
-        return
-    elapsed = time.time() - last
-    if elapsed < MIN_INTERVAL_PER_DOMAIN:
-        time.sleep(MIN_INTERVAL_PER_DOMAIN - elapsed)
+def _record_failure(domain: str, attempt: int, retry_after: float | None = None) -> bool:
+    if _LIMITER.record_failure(domain, attempt=attempt, retry_after=retry_after):
+        return True
+    print(f"[fetch] {domain}: circuit open ({_LIMITER.open_reason(domain)}), skipping for the rest of the run")
+    return False
 
 
 def fetch_url(
@@ -56,22 +133,47 @@ def fetch_url(
     timeout: int = DEFAULT_TIMEOUT,
     retries: int = DEFAULT_RETRIES,
     allow_cached: bool = True,
+    kind: str = "article",
 ) -> FetchResult:
-    if allow_cached and url in _CACHE:
-        cached = _CACHE[url]
-        return FetchResult(
-            url=cached.url,
-            final_url=cached.final_url,
-            status=cached.status,
-            content_type=cached.content_type,
-            text=cached.text,
-            bytes=cached.bytes,
-            fetched_at=cached.fetched_at,
-            from_cache=True,
-        )
+    with _LOCK:
+        if allow_cached and url in _CACHE:
+            incr("http_memo_hits")
+            return replace(_CACHE[url], from_cache=True)
+        pending = _INFLIGHT.get(url)
+        owner = pending is None
+        if owner:
+            pending = Future()
+            _INFLIGHT[url] = pending
+
+    if not owner:
+        return replace(pending.result(), from_cache=True)
+
+    try:
+        result = _fetch(url, headers=headers, timeout=timeout, retries=retries, kind=kind, allow_cached=allow_cached)
+    except Exception as exc:
+        pending.set_exception(exc)
+        raise
+    finally:
+        with _LOCK:
+            _INFLIGHT.pop(url, None)
+    pending.set_result(result)
+    return result
+
 
+def _fetch(
+    url: str,
+    *,
+    headers: dict[str, str] | None,
+    timeout: int,
+    retries: int,
+    kind: str,
+    allow_cached: bool,
+) -> FetchResult:
     domain = _domain(url)
-    _sleep_for_domain(domain)
+    disk = _DISK_CACHE
+    stored = disk.get(url) if disk is not None and allow_cached else None
+    if stored is not None and stored.is_fresh(disk.ttl(kind)):
+        return _remember(_from_stored(stored, "hit"))
 
     request_headers: dict[str, str] = {
         "User-Agent": USER_AGENT,
@@ -79,37 +181,257 @@ def fetch_url(
     }
     if headers:
         request_headers.update(headers)
+    if stored is not None:
+        request_headers.update(stored.validators())
 
     last_error: Exception | None = None
-    for attempt in range(retries + 1):
+    for attempt in range(1, retries + 2):
+        if attempt > 1:
+            incr("http_retries")
+        # Raises CircuitOpen once the domain is given up on; backoff pauses live in the bucket.
+        _LIMITER.acquire(domain)
+        try:
+            response = through_cassette(
+                "GET", url, _SESSION.get, headers=request_headers, timeout=timeout, allow_redirects=True, stream=True
+            )
+        except CassetteMiss:
+            raise
+        except Exception as exc:
+            last_error = exc
+            if not _record_failure(domain, attempt):
+                break
+            continue
+        incr("http_requests")
         try:
-            if attempt:
-                time.sleep(0.8 * attempt)
-            response = _SESSION.get(url, headers=request_headers, timeout=timeout, allow_redirects=True)
-            _LAST_REQUEST[domain] = time.time()
             if response.status_code >= 500 or response.status_code == 429:
                 last_error = RuntimeError(f"HTTP {response.status_code}")
+                if not _record_failure(domain, attempt, parse_retry_after(response.headers.get("retry-after"))):
+                    break
                 continue
+            _LIMITER.record_success(domain)
+            if response.status_code == 304 and stored is not None:
+                disk.touch(url)
+                return _remember(_from_stored(stored, "revalidated"))
+            # Other 4xx answers are final; retrying them only costs the domain another slot.
             response.raise_for_status()
-            text = response.text or ""
+            content_type = response.headers.get("content-type")
+            body, wire_bytes, skip_reason = _read_body(response, kind)
+            incr("http_bytes_fetched", wire_bytes)
+            if skip_reason is not None:
+                incr(f"http_skipped_{skip_reason}")
+                return _remember(
+                    FetchResult(
+                        url=url,
+                        final_url=str(response.url),
+                        status=response.status_code,
+                        content_type=content_type,
+                        text="",
+                        bytes=wire_bytes,
+                        fetched_at=_now(),
+                        from_cache=False,
+                        skip_reason=skip_reason,
+                    )
+                )
+            text = decode_body(body, content_type)
             result = FetchResult(
                 url=url,
                 final_url=str(response.url),
                 status=response.status_code,
-                content_type=response.headers.get("content-type"),
+                content_type=content_type,
                 text=text,
-                bytes=len(text.encode("utf8")),
+                bytes=wire_bytes,
                 fetched_at=_now(),
                 from_cache=False,
+                cache_status="miss",
             )
-            _CACHE[url] = result
-            return result
-        except Exception as exc:
-            last_error = exc
+            if disk is not None:
+                disk.put(
+                    url,
+                    final_url=result.final_url,
+                    status=result.status,
+                    content_type=result.content_type,
+                    text=text,
+                    etag=response.headers.get("etag"),
+                    last_modified=response.headers.get("last-modified"),
+                    kind=kind,
+                )
+            return _remember(result)
+        finally:
+            response.close()
 
     raise RuntimeError(f"fetch failed for {url}: {last_error}")
 
 
+@contextmanager
+def open_stream(
+    url: str,
+    *,
+    headers: dict[str, str] | None = None,
+    timeout: int = DEFAULT_TIMEOUT,
+) -> Iterator[BinaryIO]:
+    """Opens ``url`` as a byte stream for documents too large to buffer (sitemaps).
+
+    Shares the per-domain limiter and circuit breaker with ``fetch_url`` but bypasses the
+    response caches.
+    Transfer encodings are decoded; gzip *files* are left to the caller.
+    """
+    request_headers: dict[str, str] = {"User-Agent": USER_AGENT}
+    if headers:
+        request_headers.update(headers)
+    domain = _domain(url)
+    _LIMITER.acquire(domain)
+    try:
+        response = through_cassette(
+            "GET", url, _SESSION.get, headers=request_headers, timeout=timeout, allow_redirects=True, stream=True
+        )
+    except CassetteMiss:
+        raise
+    except Exception:
+        _record_failure(domain, 1)
+        raise
+    incr("http_requests")
+    if response.status_code >= 500 or response.status_code == 429:
+        _record_failure(domain, 1, parse_retry_after(response.headers.get("retry-after")))
+    else:
+        _LIMITER.record_success(domain)
+    try:
+        response.raise_for_status()
+        if str(response.url) != url:
+            remember_redirect(url, str(response.url))
+        response.raw.decode_content = True
+        # Report EOF instead of closing so io/gzip wrappers can finish reading.
+        response.raw.auto_close = False
+        yield response.raw
+    finally:
+        incr("http_bytes_fetched", _bytes_read(response.raw))
+        response.close()
+
+
+def _bytes_read(raw: Any) -> int:
+    # urllib3 counts bytes as received, before content decoding; a wrapper may
+    # already have closed a replayed stream, in which case nothing is counted.
+    try:
+        return int(raw.tell())
+    except (AttributeError, OSError, ValueError):
+        return 0
+
+
+def _media_type(content_type: str | None) -> str:
+    return (content_type or "").split(";", 1)[0].strip().lower()
+
+
+def _accepts(kind: str, media_type: str) -> bool:
+    accepted = _ACCEPTED_TYPES.get(kind, _MARKUP_TYPES)
+    return media_type in accepted or media_type in _GENERIC_TYPES or (kind == "feed" and media_type.endswith("+xml"))
+
+
+def _is_binary(head: bytes) -> bool:
+    return head.startswith(_BINARY_MAGIC) or head[4:8] == b"ftyp"
+
+
+def _read_body(response: Any, kind: str) -> tuple[bytes, int, SkipReason | None]:
+    """Streams the body up to the cap for ``kind``. Returns the decoded-transfer body, the
+    bytes received on the wire and why the body was abandoned, if it was."""
+    limit = MAX_BYTES_BY_KIND.get(kind, FETCH_MAX_BYTES_ARTICLE)
+    if not _accepts(kind, _media_type(response.headers.get("content-type"))):
+        return b"", 0, "unsupported_type"
+    try:
+        declared = int(response.headers.get("content-length") or 0)
+    except ValueError:
+        declared = 0
+    if declared > limit:
+        return b"", 0, "too_large"
+    chunks: list[bytes] = []
+    size = 0
+    skip_reason: SkipReason | None = None
+    for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+        if not chunks and _is_binary(chunk[:16]):
+            skip_reason = "binary_content"
+            break
+        size += len(chunk)
+        if size > limit:
+            skip_reason = "too_large"
+            break
+        chunks.append(chunk)
+    body = b"".join(chunks) if skip_reason is None else b""
+    return body, _bytes_read(response.raw) or size, skip_reason
+
+
+def _charset(label: str | None) -> str | None:
+    if not label:
+        return None
+    label = label.strip().strip("\"'").lower()
+    try:
+        return codecs.lookup(_CHARSET_ALIASES.get(label, label)).name
+    except LookupError:
+        return None
+
+
+def decode_body(body: bytes, content_type: str | None) -> str:
+    """Decodes with the byte order mark, the header charset or the charset the document
+    declares in its first bytes, in that order, and never falls back to statistical
+    charset detection: undeclared bodies are read as UTF-8, or windows-1252 if invalid."""
+    for bom, encoding in ((codecs.BOM_UTF8, "utf-8-sig"), (codecs.BOM_UTF16_LE, "utf-16"), (codecs.BOM_UTF16_BE, "utf-16")):
+        if body.startswith(bom):
+            return body.decode(encoding, errors="replace")
+    header = re.search(r"charset\s*=\s*([^\s;]+)", content_type or "", re.IGNORECASE)
+    head = body[:2048]
+    declared = _XML_ENCODING_RE.search(head) or _META_CHARSET_RE.search(head)
+    for label in (header.group(1) if header else None, declared.group(1).decode("ascii") if declared else None):
+        encoding = _charset(label)
+        if encoding is not None:
+            return body.decode(encoding, errors="replace")
+    try:
+        return body.decode("utf-8")
+    except UnicodeDecodeError:
+        return body.decode("cp1252", errors="replace")
+
+
+def _from_stored(stored: CachedResponse, status: str) -> FetchResult:
+    return FetchResult(
+        url=stored.url,
+        final_url=stored.final_url,
+        status=stored.status,
+        content_type=stored.content_type,
+        text=stored.text,
+        bytes=len(stored.text.encode("utf8")),
+        fetched_at=_now(),
+        from_cache=True,
+        cache_status=status,
+    )
+
+
+def _remember(result: FetchResult) -> FetchResult:
+    if result.final_url and result.final_url != result.url:
+        remember_redirect(result.url, result.final_url)
+    with _LOCK:
+        _CACHE[result.url] = result
+        _CACHE_STATS[result.cache_status] = _CACHE_STATS.get(result.cache_status, 0) + 1
+    incr(f"http_cache_{result.cache_status}")
+    return result
+
+
+def cache_stats() -> dict[str, int]:
+    with _LOCK:
+        return dict(_CACHE_STATS)
+
+
+def rate_limit_stats() -> dict[str, Any]:
+    return _LIMITER.stats()
+
+
+def configure_domain_rate(domain: str, *, rate: float, burst: float | None = None) -> None:
+    _LIMITER.configure(domain, rate=rate, burst=burst)
+
+
+def flush_http_cache() -> None:
+    if _DISK_CACHE is not None:
+        _DISK_CACHE.flush()
+
+
 def reset_fetch_cache() -> None:
-    _CACHE.clear()
-    _LAST_REQUEST.clear()
+    _LIMITER.reset(interval=MIN_INTERVAL_PER_DOMAIN)
+    with _LOCK:
+        _CACHE.clear()
+        for key in _CACHE_STATS:
+            _CACHE_STATS[key] = 0
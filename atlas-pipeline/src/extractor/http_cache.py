@@ -0,0 +1,177 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+
+@dataclass(frozen=True)
+class CachedResponse:
+    url: str
+    final_url: str
+    status: int
+    content_type: str | None
+    text: str
+    etag: str | None
+    last_modified: str | None
+    stored_at: float
+    kind: str
+
+    def is_fresh(self, ttl: float, now: float | None = None) -> bool:
+        return ((now or time.time()) - self.stored_at) < ttl
+
+    def validators(self) -> dict[str, str]:
+        headers: dict[str, str] = {}
+        if self.etag:
+            headers["If-None-Match"] = self.etag
+        if self.last_modified:
+            headers["If-Modified-Since"] = self.last_modified
+        return headers
+
+
+def _key(url: str) -> str:
+    return hashlib.sha1(url.encode("utf8")).hexdigest()
+
+
+class HttpCache:
+    def __init__(self, directory: Path, *, max_bytes: int, ttl_by_kind: dict[str, float]):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.ttl_by_kind = ttl_by_kind
+        self._index: OrderedDict[str, dict[str, Any]] = OrderedDict()
+        self._size = 0
+        self._loaded = False
+        self._lock = threading.Lock()
+
+    @property
+    def _index_path(self) -> Path:
+        return self.directory / "index.json"
+
+    def _body_path(self, key: str) -> Path:
+        return self.directory / f"{key}.z"
+
+    def _load(self) -> None:
+        if self._loaded:
+            return
+        self._loaded = True
+        try:
+            payload = json.loads(self._index_path.read_text(encoding="utf8"))
+        except Exception:
+            payload = {}
+        for entry in payload.get("entries", []):
+            key = entry.get("key")
+            if not key or not self._body_path(key).exists():
+                continue
+            self._index[key] = entry
+            self._size += int(entry.get("size") or 0)
+
+    def ttl(self, kind: str) -> float:
+        return self.ttl_by_kind.get(kind, self.ttl_by_kind.get("article", 0.0))
+
+    def get(self, url: str) -> CachedResponse | None:
+        key = _key(url)
+        with self._lock:
+            self._load()
+            entry = self._index.get(key)
+            if entry is None:
+                return None
+            try:
+                body = zlib.decompress(self._body_path(key).read_bytes()).decode("utf8")
+            except Exception:
+                self._drop(key)
+                return None
+            self._index.move_to_end(key)
+        return CachedResponse(
+            url=url,
+            final_url=entry.get("final_url") or url,
+            status=int(entry.get("status") or 200),
+            content_type=entry.get("content_type"),
+            text=body,
+            etag=entry.get("etag"),
+            last_modified=entry.get("last_modified"),
+            stored_at=float(entry.get("stored_at") or 0.0),
+            kind=entry.get("kind") or "article",
+        )
+
+    def put(
+        self,
+        url: str,
+        *,
+        final_url: str,
+        status: int,
+        content_type: str | None,
+        text: str,
+        etag: str | None,
+        last_modified: str | None,
+        kind: str,
+    ) -> None:
+        key = _key(url)
+        body = zlib.compress(text.encode("utf8"), 6)
+        with self._lock:
+            self._load()
+            self.directory.mkdir(parents=True, exist_ok=True)
+            tmp_path = self._body_path(key).with_suffix(".tmp")
+            tmp_path.write_bytes(body)
+            os.replace(tmp_path, self._body_path(key))
+            previous = self._index.pop(key, None)
+            if previous:
+                self._size -= int(previous.get("size") or 0)
+            self._index[key] = {
+                "key": key,
+                "url": url,
+                "final_url": final_url,
+                "status": status,
+                "content_type": content_type,
+                "etag": etag,
+                "last_modified": last_modified,
+                "stored_at": time.time(),
+                "kind": kind,
+                "size": len(body),
+            }
+            self._size += len(body)
+            self._evict()
+
+    def touch(self, url: str) -> None:
+        key = _key(url)
+        with self._lock:
+            self._load()
+            entry = self._index.get(key)
+            if entry is not None:
+                entry["stored_at"] = time.time()
+                self._index.move_to_end(key)
+
+    def _drop(self, key: str) -> None:
+        entry = self._index.pop(key, None)
+        if entry:
+            self._size -= int(entry.get("size") or 0)
+        try:
+            self._body_path(key).unlink()
+        except FileNotFoundError:
+            pass
+
+    def _evict(self) -> None:
+        while self._size > self.max_bytes and len(self._index) > 1:
+            oldest = next(iter(self._index))
+            self._drop(oldest)
+
+    def flush(self) -> None:
+        with self._lock:
+            if not self._loaded:
+                return
+            self.directory.mkdir(parents=True, exist_ok=True)
+            payload = {"entries": list(self._index.values())}
+            tmp_path = self._index_path.with_suffix(".tmp")
+            tmp_path.write_text(json.dumps(payload), encoding="utf8")
+            os.replace(tmp_path, self._index_path)
+
+    def size_bytes(self) -> int:
+        with self._lock:
+            self._load()
+            return self._size
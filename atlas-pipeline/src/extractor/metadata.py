@@ -3,10 +3,12 @@ from __future__ import annotations
 from dataclasses import dataclass
 from datetime import datetime, timezone
 from email.utils import parsedate_to_datetime
-from typing import Any
 from urllib.parse import urljoin
 
-from bs4 import BeautifulSoup
+from lxml import etree
+from lxml.html import HtmlElement
+
+from .document import ParsedDocument
 
 
 @dataclass(frozen=True)
@@ -19,23 +21,28 @@ class Metadata:
     og_description: str | None
 
 
-_PUBLISHED_META_NAMES = {
+# In order of preference: the first one the page declares is its publication time.
+_PUBLISHED_META_NAMES = (
     "article:published_time",
-    "article:modified_time",
     "article:published",
-    "article:modified",
     "og:pubdate",
     "pubdate",
     "date",
-    "dc.date",
     "dc.date.issued",
+    "dc.date",
     "parsely-pub-date",
     "sailthru.date",
     "pdate",
-}
+    "article:modified_time",
+    "article:modified",
+)
+# Text fed to the streaming scanner at a time; most heads end within the first chunk.
+_SCAN_CHUNK = 8192
 
 
-def _parse_datetime(raw: str | None) -> str | None:
+def parse_datetime(raw: str | None) -> str | None:
+    """RFC 2822 or ISO 8601 text as an ISO 8601 string, UTC when no zone is given; None
+    when it is neither."""
     if not raw:
         return None
     value = raw.strip()
@@ -57,49 +64,86 @@ def _parse_datetime(raw: str | None) -> str | None:
         return None
 
 
-def _meta_content(soup: BeautifulSoup, *, prop: str | None = None, name: str | None = None) -> str | None:
-    if prop:
-        tag = soup.find("meta", attrs={"property": prop})
-        if tag and tag.get("content"):
-            return str(tag.get("content")).strip()
-    if name:
-        tag = soup.find("meta", attrs={"name": name})
-        if tag and tag.get("content"):
-            return str(tag.get("content")).strip()
-    return None
-
-
-def extract_metadata(html: str, *, base_url: str | None = None) -> Metadata:
-    soup = BeautifulSoup(html, "lxml")
-
-    title = None
-    if soup.title and soup.title.string:
-        title = soup.title.string.strip()
-    og_title = _meta_content(soup, prop="og:title")
-    if og_title and not title:
-        title = og_title
-
-    og_description = _meta_content(soup, prop="og:description") or _meta_content(soup, name="description")
-
-    canonical_url = None
-    canonical_tag = soup.find("link", attrs={"rel": "canonical"})
-    if canonical_tag and canonical_tag.get("href"):
-        canonical_url = str(canonical_tag.get("href")).strip()
-    if not canonical_url:
-        canonical_url = _meta_content(soup, prop="og:url") or None
+class HeadIndex:
+    """Every ``<meta>``, canonical ``<link>`` and ``<title>`` in the document head, collected
+    in one pass. The first non-empty value of each key wins, as in document order."""
+
+    def __init__(self) -> None:
+        self.title: str | None = None
+        self.canonical: str | None = None
+        self.properties: dict[str, str] = {}
+        self.names: dict[str, str] = {}
+
+    def add(self, element: HtmlElement) -> None:
+        tag = element.tag
+        if tag == "meta":
+            content = (element.get("content") or "").strip()
+            if not content:
+                return
+            prop, name = element.get("property"), element.get("name")
+            if prop:
+                self.properties.setdefault(prop, content)
+            if name:
+                self.names.setdefault(name, content)
+        elif tag == "link":
+            href = (element.get("href") or "").strip()
+            if self.canonical is None and href and "canonical" in (element.get("rel") or "").split():
+                self.canonical = href
+        elif tag == "title":
+            if self.title is None and element.text and len(element) == 0 and element.text.strip():
+                self.title = element.text.strip()
+
+    def meta(self, *, prop: str | None = None, name: str | None = None) -> str | None:
+        return (self.properties.get(prop) if prop else None) or (self.names.get(name) if name else None)
+
+
+def scan_head(html: str | ParsedDocument) -> HeadIndex:
+    """Indexes the head of ``html``, stopping at ``</head>`` or ``<body>``.
+
+    An already parsed document is walked up to its body; raw text is streamed through a
+    pull parser, so the body markup is never parsed at all."""
+    index = HeadIndex()
+    if isinstance(html, ParsedDocument):
+        if html.tree is not None:
+            for element in html.tree.iter():
+                if element.tag == "body":
+                    break
+                index.add(element)
+        return index
+    parser = etree.HTMLPullParser(events=("start", "end"))
+    try:
+        for offset in range(0, len(html), _SCAN_CHUNK):
+            parser.feed(html[offset : offset + _SCAN_CHUNK])
+            for event, element in parser.read_events():
+                if (event == "start" and element.tag == "body") or (event == "end" and element.tag == "head"):
+                    return index
+                if event == "end":
+                    index.add(element)
+    except etree.LxmlError:
+        pass
+    return index
+
+
+def extract_metadata(html: str | ParsedDocument, *, base_url: str | None = None) -> Metadata:
+    head = scan_head(html)
+
+    og_title = head.meta(prop="og:title")
+    title = head.title or og_title
+
+    og_description = head.meta(prop="og:description") or head.meta(name="description")
+
+    canonical_url = head.canonical or head.meta(prop="og:url")
     if canonical_url and base_url:
         canonical_url = urljoin(base_url, canonical_url)
 
     published_raw = None
     for name in _PUBLISHED_META_NAMES:
-        published_raw = _meta_content(soup, prop=name) or _meta_content(soup, name=name)
+        published_raw = head.meta(prop=name, name=name)
         if published_raw:
             break
-    published_at = _parse_datetime(published_raw)
+    published_at = parse_datetime(published_raw)
 
-    author = _meta_content(soup, name="author") or _meta_content(soup, prop="article:author")
-    if author:
-        author = author.strip()
+    author = head.meta(name="author") or head.meta(prop="article:author")
 
     return Metadata(
         title=title,
@@ -1,9 +1,23 @@
 from __future__ import annotations
 
+import time
 from dataclasses import dataclass
 from typing import Any
 
-from bs4 import BeautifulSoup
+from lxml.html import fragment_fromstring
+
+from .document import ParsedDocument, element_text, parse_document, visible_text
+
+
+# Cascade order when nothing is known about the page's domain.
+EXTRACTORS = ("trafilatura", "readability", "bs4")
+
+
+@dataclass(frozen=True)
+class ExtractorAttempt:
+    method: str
+    chars: int
+    ms: float
 
 
 @dataclass(frozen=True)
@@ -11,6 +25,7 @@ class ParsedBody:
     text: str
     method: str
     paywalled: bool
+    attempts: tuple[ExtractorAttempt, ...] = ()
 
 
 def _clean_text(value: str) -> str:
@@ -34,13 +49,16 @@ def _is_paywalled(text: str) -> bool:
     )
 
 
-def _extract_trafilatura(html: str, url: str | None) -> str | None:
+def _extract_trafilatura(document: ParsedDocument, url: str | None) -> str | None:
     try:
         import trafilatura  # type: ignore
     except Exception:
         return None
+    tree = document.copy_tree()
+    if tree is None:
+        return None
     try:
-        return trafilatura.extract(html, url=url, include_comments=False, include_tables=False) or None
+        return trafilatura.extract(tree, url=url, include_comments=False, include_tables=False) or None
     except Exception:
         return None
 
@@ -52,34 +70,34 @@ def _extract_readability(html: str) -> str | None:
         return None
     try:
         summary_html = Document(html).summary()
-        soup = BeautifulSoup(summary_html, "lxml")
-        return soup.get_text(" ", strip=True) or None
+        return element_text(fragment_fromstring(summary_html, create_parent="div")) or None
     except Exception:
         return None
 
 
-def _extract_bs4(html: str) -> str | None:
-    try:
-        soup = BeautifulSoup(html, "lxml")
-    except Exception:
-        soup = BeautifulSoup(html, "html.parser")
-    for tag in soup(["script", "style", "noscript", "svg"]):
-        tag.decompose()
-    text = soup.get_text(" ", strip=True)
-    return text or None
-
-
-def parse_html(html: str, *, url: str | None = None) -> ParsedBody:
-    text = _extract_trafilatura(html, url)
-    if text:
-        cleaned = _clean_text(text)
-        return ParsedBody(text=cleaned, method="trafilatura", paywalled=_is_paywalled(cleaned))
-
-    text = _extract_readability(html)
-    if text:
-        cleaned = _clean_text(text)
-        return ParsedBody(text=cleaned, method="readability", paywalled=_is_paywalled(cleaned))
-
-    text = _extract_bs4(html) or ""
-    cleaned = _clean_text(text)
-    return ParsedBody(text=cleaned, method="bs4", paywalled=_is_paywalled(cleaned))
+def _extract_bs4(document: ParsedDocument) -> str | None:
+    return visible_text(document) or None
+
+
+def _run_extractor(method: str, document: ParsedDocument, url: str | None) -> str | None:
+    if method == "trafilatura":
+        return _extract_trafilatura(document, url)
+    if method == "readability":
+        return _extract_readability(document.html)
+    return _extract_bs4(document)
+
+
+def parse_html(html: str | ParsedDocument, *, url: str | None = None, prefer: str | None = None) -> ParsedBody:
+    """Runs the extractor cascade until one returns text. ``prefer`` moves a method to the
+    front, for domains where the default first choice is known to come back empty."""
+    document = html if isinstance(html, ParsedDocument) else parse_document(html)
+    order = EXTRACTORS if prefer not in EXTRACTORS else (prefer, *(method for method in EXTRACTORS if method != prefer))
+    attempts: list[ExtractorAttempt] = []
+    for method in order:
+        started = time.perf_counter()
+        cleaned = _clean_text(_run_extractor(method, document, url) or "")
+        attempts.append(ExtractorAttempt(method=method, chars=len(cleaned), ms=(time.perf_counter() - started) * 1000))
+        if cleaned:
+            break
+    # The last method's output stands even when empty, as the plain cascade always did.
+    return ParsedBody(text=cleaned, method=method, paywalled=_is_paywalled(cleaned), attempts=tuple(attempts))
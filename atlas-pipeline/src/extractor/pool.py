@@ -0,0 +1,92 @@
+from __future__ import annotations
+
+import multiprocessing
+import signal
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from typing import Iterator
+
+from profiling import profile_extraction
+
+from .content import ExtractedContent, extract_content
+from .extraction_cache import cached_extraction, remember_extraction
+from .strategy import choose_extractor, record_extraction
+
+
+# Workers come from a clean server process instead of being forked from this one. By the
+# time the streaming pipeline submits its first document, ingest and fetch threads are
+# running and may hold locks (stdout, metrics, urllib3's pools) that a forked child would
+# inherit held and never see released.
+POOL_CONTEXT = multiprocessing.get_context(
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+)
+
+
+class ExtractionTimeout(Exception):
+    pass
+
+
+@contextmanager
+def _deadline(seconds: float) -> Iterator[None]:
+    in_main_thread = threading.current_thread() is threading.main_thread()
+    if seconds <= 0 or not hasattr(signal, "SIGALRM") or not in_main_thread:
+        yield
+        return
+
+    def _expired(signum, frame):
+        raise ExtractionTimeout(f"extraction exceeded {seconds:.0f}s")
+
+    previous = signal.signal(signal.SIGALRM, _expired)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def extract_with_deadline(url: str, html: str, timeout: float, prefer: str | None = None) -> ExtractedContent:
+    with _deadline(timeout), profile_extraction(url):
+        return extract_content(url, html, prefer=prefer) if prefer is not None else extract_content(url, html)
+
+
+def _safe_extract(url: str, html: str, timeout: float, prefer: str | None = None) -> ExtractedContent | Exception:
+    try:
+        return extract_with_deadline(url, html, timeout, prefer)
+    except Exception as exc:
+        return exc
+
+
+def extract_many(
+    documents: list[tuple[str, str]],
+    *,
+    workers: int,
+    timeout: float,
+) -> list[ExtractedContent | Exception]:
+    """Extracts each ``(url, html)`` pair, answering unchanged pages from the extraction
+    cache in this process so only the rest are sent to workers. The per-domain extractor
+    choice is also made and learned here, since workers share no state."""
+    results: list[ExtractedContent | Exception | None] = [cached_extraction(url, html) for url, html in documents]
+    pending = [index for index, result in enumerate(results) if result is None]
+    prefer = {index: choose_extractor(documents[index][0]) for index in pending}
+    if workers <= 1 or len(pending) <= 1:
+        for index in pending:
+            results[index] = _safe_extract(*documents[index], timeout, prefer[index])
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(pending)), mp_context=POOL_CONTEXT) as pool:
+            futures = [
+                (index, pool.submit(extract_with_deadline, *documents[index], timeout, prefer[index]))
+                for index in pending
+            ]
+            for index, future in futures:
+                try:
+                    results[index] = future.result()
+                except Exception as exc:
+                    results[index] = exc
+    for index in pending:
+        result = results[index]
+        if isinstance(result, ExtractedContent):
+            remember_extraction(*documents[index], result)
+            record_extraction(documents[index][0], result)
+    return results  # type: ignore[return-value]
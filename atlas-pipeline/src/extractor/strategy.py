@@ -0,0 +1,212 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any
+from urllib.parse import urlparse
+
+from config import (
+    EXTRACT_STRATEGY_DECAY,
+    EXTRACT_STRATEGY_ENABLED,
+    EXTRACT_STRATEGY_MIN_PAGES,
+    EXTRACT_STRATEGY_PATH,
+    EXTRACT_STRATEGY_PROBE_EVERY,
+)
+from metrics import incr
+
+from .content import ExtractedContent
+from .parse_html import EXTRACTORS
+from .structured import STRUCTURED_METHODS
+
+# Share of a domain's recent pages a method must win before it is tried first.
+WIN_SHARE = 0.6
+
+
+def _domain(url: str) -> str:
+    hostname = urlparse(url).hostname or ""
+    return hostname[4:] if hostname.startswith("www.") else hostname
+
+
+def _empty_methods() -> dict[str, dict[str, float]]:
+    return {method: {"attempts": 0.0, "wins": 0.0, "chars": 0.0, "ms": 0.0} for method in EXTRACTORS}
+
+
+class ExtractorStrategy:
+    """Learns per domain which extractor yields the body and tries it first.
+
+    Outcomes are exponentially decayed per page. Once a domain has ``min_pages`` of
+    history and one method other than the default first choice wins at least
+    ``WIN_SHARE`` of them, pages go straight to it. Every ``probe_every``-th page of such
+    a domain runs the full cascade instead; if the default wins that probe the domain's
+    history is dropped and learned again.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        *,
+        min_pages: int = EXTRACT_STRATEGY_MIN_PAGES,
+        probe_every: int = EXTRACT_STRATEGY_PROBE_EVERY,
+        decay: float = EXTRACT_STRATEGY_DECAY,
+    ):
+        self.path = Path(path)
+        self.min_pages = min_pages
+        self.probe_every = max(1, probe_every)
+        self.decay = decay
+        self._domains: dict[str, dict[str, Any]] = {}
+        self._run: dict[str, dict[str, int]] = {}
+        self._loaded = False
+        self._dirty = False
+        self._lock = threading.Lock()
+
+    def _load(self) -> None:
+        if self._loaded:
+            return
+        self._loaded = True
+        try:
+            payload = json.loads(self.path.read_text(encoding="utf8"))
+        except Exception:
+            return
+        for domain, entry in (payload.get("domains") or {}).items():
+            if isinstance(entry, dict) and isinstance(entry.get("methods"), dict):
+                methods = _empty_methods()
+                for method, counts in entry["methods"].items():
+                    if method in methods and isinstance(counts, dict):
+                        methods[method].update({key: float(counts.get(key) or 0.0) for key in methods[method]})
+                self._domains[domain] = {
+                    "pages": float(entry.get("pages") or 0.0),
+                    "since_probe": int(entry.get("since_probe") or 0),
+                    "methods": methods,
+                }
+
+    def _preferred(self, entry: dict[str, Any]) -> str | None:
+        if entry["pages"] < self.min_pages:
+            return None
+        methods = entry["methods"]
+        winner = max(EXTRACTORS, key=lambda method: methods[method]["wins"])
+        if winner == EXTRACTORS[0] or methods[winner]["wins"] < WIN_SHARE * entry["pages"]:
+            return None
+        return winner
+
+    def choose(self, url: str) -> str | None:
+        """Returns the method to try first for ``url``, or None for the full cascade."""
+        domain = _domain(url)
+        with self._lock:
+            self._load()
+            entry = self._domains.get(domain)
+            if entry is None:
+                return None
+            preferred = self._preferred(entry)
+            if preferred is None:
+                return None
+            entry["since_probe"] += 1
+            self._dirty = True
+            if entry["since_probe"] >= self.probe_every:
+                entry["since_probe"] = 0
+                self._run_counts(domain)["probes"] += 1
+                return None
+            return preferred
+
+    def _run_counts(self, domain: str) -> dict[str, int]:
+        return self._run.setdefault(
+            domain, {"pages": 0, "structured": 0, "fast_path": 0, "probes": 0, "attempts_saved": 0}
+        )
+
+    def record(self, url: str, content: ExtractedContent) -> None:
+        if not content.attempts:
+            return
+        domain = _domain(url)
+        with self._lock:
+            self._load()
+            if content.extraction_method in STRUCTURED_METHODS:
+                # Read from the page's own markup; says nothing about which extractor wins here.
+                self._run_counts(domain)["structured"] += 1
+                incr("extractor_structured_pages")
+                return
+            entry = self._domains.get(domain)
+            if entry is not None and self._preferred(entry) and content.extraction_method == EXTRACTORS[0]:
+                # A probe found the default first choice working again: learn this domain anew.
+                entry = None
+            if entry is None:
+                entry = {"pages": 0.0, "since_probe": 0, "methods": _empty_methods()}
+                self._domains[domain] = entry
+            entry["pages"] = entry["pages"] * self.decay + 1.0
+            for counts in entry["methods"].values():
+                for key in counts:
+                    counts[key] *= self.decay
+            for attempt in content.attempts:
+                counts = entry["methods"][attempt.method]
+                counts["attempts"] += 1.0
+                counts["chars"] += attempt.chars
+                counts["ms"] += attempt.ms
+            entry["methods"][content.extraction_method]["wins"] += 1.0
+            run = self._run_counts(domain)
+            run["pages"] += 1
+            first = content.attempts[0].method
+            if first != EXTRACTORS[0] and content.extraction_method == first:
+                saved = EXTRACTORS.index(first)
+                run["fast_path"] += 1
+                run["attempts_saved"] += saved
+                incr("extractor_attempts_saved", saved)
+            self._dirty = True
+
+    def flush(self) -> None:
+        with self._lock:
+            if not self._dirty:
+                return
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(".tmp")
+            tmp_path.write_text(json.dumps({"domains": self._domains}), encoding="utf8")
+            os.replace(tmp_path, self.path)
+            self._dirty = False
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            self._load()
+            domains: dict[str, Any] = {}
+            for domain, run in sorted(self._run.items()):
+                entry = self._domains.get(domain)
+                if entry is None:
+                    continue
+                domains[domain] = {
+                    **run,
+                    "preferred": self._preferred(entry),
+                    "methods": {
+                        method: {
+                            "win_share": round(counts["wins"] / entry["pages"], 3) if entry["pages"] else 0.0,
+                            "mean_chars": round(counts["chars"] / counts["attempts"]) if counts["attempts"] else None,
+                            "mean_ms": round(counts["ms"] / counts["attempts"], 2) if counts["attempts"] else None,
+                        }
+                        for method, counts in entry["methods"].items()
+                    },
+                }
+            return {
+                "pages": sum(run["pages"] for run in self._run.values()),
+                "structured": sum(run["structured"] for run in self._run.values()),
+                "fast_path": sum(run["fast_path"] for run in self._run.values()),
+                "attempts_saved": sum(run["attempts_saved"] for run in self._run.values()),
+                "domains": domains,
+            }
+
+
+_STRATEGY: ExtractorStrategy | None = ExtractorStrategy(EXTRACT_STRATEGY_PATH) if EXTRACT_STRATEGY_ENABLED else None
+
+
+def choose_extractor(url: str) -> str | None:
+    return _STRATEGY.choose(url) if _STRATEGY is not None else None
+
+
+def record_extraction(url: str, content: ExtractedContent) -> None:
+    if _STRATEGY is not None:
+        _STRATEGY.record(url, content)
+
+
+def flush_extractor_strategy() -> None:
+    if _STRATEGY is not None:
+        _STRATEGY.flush()
+
+
+def extractor_strategy_stats() -> dict[str, Any] | None:
+    return _STRATEGY.stats() if _STRATEGY is not None else None
@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass
+from html import unescape
+from typing import Any, Iterator
+
+from lxml.html import HtmlElement, fragment_fromstring
+
+from .document import ParsedDocument, element_text
+from .metadata import parse_datetime
+
+# schema.org types whose markup describes the page's main article.
+ARTICLE_TYPES = {
+    "Article",
+    "NewsArticle",
+    "AnalysisNewsArticle",
+    "ReportageNewsArticle",
+    "BackgroundNewsArticle",
+    "BlogPosting",
+    "Report",
+}
+# Methods reported in ``ExtractedContent.extraction_method`` when structured data was complete.
+STRUCTURED_METHODS = ("jsonld", "microdata", "amp")
+# Shorter bodies are usually teasers on paywalled pages; the cascade reads the page instead.
+MIN_BODY_CHARS = 400
+
+
+@dataclass(frozen=True)
+class StructuredArticle:
+    method: str
+    headline: str | None
+    published_at: str | None
+    author: str | None
+    body: str
+
+    @property
+    def complete(self) -> bool:
+        return bool(self.headline and self.published_at and len(self.body) >= MIN_BODY_CHARS)
+
+
+def _clean(value: Any) -> str:
+    if not isinstance(value, str):
+        return ""
+    text = unescape(value)
+    if "<" in text:
+        try:
+            text = element_text(fragment_fromstring(text, create_parent="div"))
+        except Exception:
+            pass
+    return " ".join(text.split())
+
+
+def _types(value: Any) -> set[str]:
+    raw = value if isinstance(value, list) else [value]
+    # "http://schema.org/NewsArticle" and "NewsArticle" name the same type.
+    return {item.rsplit("/", 1)[-1] for item in raw if isinstance(item, str)}
+
+
+def _author_name(value: Any) -> str | None:
+    if isinstance(value, list):
+        names = [name for name in (_author_name(item) for item in value) if name]
+        return ", ".join(names) or None
+    if isinstance(value, dict):
+        value = value.get("name")
+    return _clean(value) or None
+
+
+def _jsonld_nodes(value: Any) -> Iterator[dict[str, Any]]:
+    if isinstance(value, list):
+        for item in value:
+            yield from _jsonld_nodes(item)
+    elif isinstance(value, dict):
+        yield value
+        yield from _jsonld_nodes(value.get("@graph"))
+        yield from _jsonld_nodes(value.get("mainEntity"))
+
+
+def _from_jsonld(tree: HtmlElement) -> StructuredArticle | None:
+    found: StructuredArticle | None = None
+    for script in tree.xpath("//script[@type='application/ld+json']"):
+        try:
+            payload = json.loads(script.text or "")
+        except ValueError:
+            continue
+        for node in _jsonld_nodes(payload):
+            if not _types(node.get("@type")) & ARTICLE_TYPES:
+                continue
+            article = StructuredArticle(
+                method="jsonld",
+                headline=_clean(node.get("headline") or node.get("name")) or None,
+                published_at=parse_datetime(_clean(node.get("datePublished"))),
+                author=_author_name(node.get("author")),
+                body=_clean(node.get("articleBody")),
+            )
+            if article.complete:
+                return article
+            found = found or article
+    return found
+
+
+def _scope_of(element: HtmlElement) -> HtmlElement | None:
+    parent = element.getparent()
+    while parent is not None and parent.get("itemscope") is None:
+        parent = parent.getparent()
+    return parent
+
+
+def _item_value(element: HtmlElement) -> str:
+    for attribute in ("content", "datetime"):
+        if element.get(attribute):
+            return element.get(attribute)
+    return element_text(element)
+
+
+def _from_microdata(tree: HtmlElement) -> StructuredArticle | None:
+    for scope in tree.xpath("//*[@itemscope and @itemtype]"):
+        if not _types(scope.get("itemtype", "").split()) & ARTICLE_TYPES:
+            continue
+        props: dict[str, HtmlElement] = {}
+        for element in scope.iterdescendants():
+            name = element.get("itemprop")
+            # Properties of nested items (the author's Person, the publisher) are not the article's.
+            if name and name not in props and _scope_of(element) is scope:
+                props[name] = element
+        author = props.get("author")
+        if author is not None and author.get("itemscope") is not None:
+            names = [element for element in author.iterdescendants() if element.get("itemprop") == "name"]
+            author_name = _clean(_item_value(names[0])) if names else ""
+        else:
+            author_name = _clean(_item_value(author)) if author is not None else ""
+        headline = props.get("headline")
+        published = props.get("datePublished")
+        body = props.get("articleBody")
+        return StructuredArticle(
+            method="microdata",
+            headline=_clean(_item_value(headline)) or None if headline is not None else None,
+            published_at=parse_datetime(_item_value(published)) if published is not None else None,
+            author=author_name or None,
+            body=_clean(element_text(body)) if body is not None else "",
+        )
+    return None
+
+
+def _is_amp(tree: HtmlElement) -> bool:
+    return tree.get("amp") is not None or tree.get("⚡") is not None
+
+
+def extract_structured(document: ParsedDocument) -> StructuredArticle | None:
+    """Reads the article the page describes in JSON-LD or microdata, or None when it has
+    neither. AMP pages must declare their article in JSON-LD but rarely repeat the body
+    there; since AMP forbids author scripts, their single ``<article>`` element is taken
+    as the body."""
+    tree = document.tree
+    if tree is None:
+        return None
+    article = _from_jsonld(tree)
+    if article is None or not article.complete:
+        microdata = _from_microdata(tree)
+        if microdata is not None and (article is None or microdata.complete):
+            article = microdata
+    if article is not None and not article.body and _is_amp(tree):
+        bodies = tree.xpath("//article")
+        if len(bodies) == 1:
+            article = StructuredArticle(
+                method="amp",
+                headline=article.headline,
+                published_at=article.published_at,
+                author=article.author,
+                body=_clean(element_text(bodies[0])),
+            )
+    return article
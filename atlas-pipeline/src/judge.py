@@ -1,19 +1,30 @@
 from __future__ import annotations
 
+import re
+from datetime import date
 from typing import Any
 
-from config import ALLOWED_EVENT_TYPES
+from config import (
+    ALLOWED_EVENT_TYPES,
+    CLUSTER_BANDS,
+    CLUSTER_PERMUTATIONS,
+    CLUSTER_SIMILARITY,
+    CLUSTER_TEXT_CHARS,
+    CLUSTER_WINDOW_DAYS,
+)
 from evidence import build_evidence_pack
-from llm import verify_theme
+from llm import verify_themes
 from normalize import classify_label, stable_event_id
-from theme_filter import evaluate_theme
+from similarity import DisjointSet, LshIndex, estimate_similarity, minhash, shingles, tokenize
+from theme_filter import evaluate_themes
 
+_WORD_SPLIT_RE = re.compile(r"\s+")
 
-def apply_thematic_filter(items: list[dict[str, Any]]) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
-    approved: list[dict[str, Any]] = []
+
+def apply_theme_rules(items: list[dict[str, Any]]) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+    themed: list[dict[str, Any]] = []
     rejected: list[dict[str, Any]] = []
-    for item in items:
-        decision = evaluate_theme(item.get("title", ""), item.get("summary", ""), item.get("content", ""))
+    for item, decision in zip(items, evaluate_themes(items)):
         if not decision:
             rejected.append(
                 {
@@ -35,12 +46,20 @@ def apply_thematic_filter(items: list[dict[str, Any]]) -> tuple[list[dict[str, A
             item.get("period"),
             item.get("ticker"),
         )
-        llm_result = verify_theme(item, decision.theme)
+        themed.append(item)
+    return themed, rejected
+
+
+def apply_llm_verification(items: list[dict[str, Any]]) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+    approved: list[dict[str, Any]] = []
+    rejected: list[dict[str, Any]] = []
+    verdicts = verify_themes([(item, item["event_type"]) for item in items])
+    for item, llm_result in zip(items, verdicts):
         if llm_result is False:
             rejected.append(
                 {
                     "event_id": item.get("event_id"),
-                    "event_type": decision.theme,
+                    "event_type": item["event_type"],
                     "entity": item.get("entity"),
                     "rejection_reason": "llm_verification_failed",
                 }
@@ -50,11 +69,133 @@ def apply_thematic_filter(items: list[dict[str, Any]]) -> tuple[list[dict[str, A
     return approved, rejected
 
 
-def cluster_events(items: list[dict[str, Any]]) -> dict[str, list[dict[str, Any]]]:
-    clusters: dict[str, list[dict[str, Any]]] = {}
-    for item in items:
+def apply_thematic_filter(items: list[dict[str, Any]]) -> tuple[list[dict[str, Any]], list[dict[str, Any]]]:
+    themed, rule_rejected = apply_theme_rules(items)
+    approved, llm_rejected = apply_llm_verification(themed)
+    return approved, rule_rejected + llm_rejected
+
+
+def _cluster_text(item: dict[str, Any]) -> str:
+    content = str(item.get("content") or "")[:CLUSTER_TEXT_CHARS]
+    return " ".join([str(item.get("title") or ""), str(item.get("summary") or ""), content])
+
+
+def _event_day(item: dict[str, Any]) -> date | None:
+    try:
+        return date.fromisoformat(str(item.get("event_at") or "")[:10])
+    except ValueError:
+        return None
+
+
+def _name_runs(text: str) -> list[list[str]]:
+    """Runs of consecutive capitalized words, tokenized: "Form S-1: Acme Robotics Inc."
+    gives ``[["form", "acme", "robotics", "inc"]]``."""
+    runs: list[list[str]] = [[]]
+    for word in _WORD_SPLIT_RE.split(text):
+        if word[:1].isupper():
+            runs[-1].extend(tokenize(word))
+        elif runs[-1]:
+            runs.append([])
+    return [run for run in runs if run]
+
+
+def _blocking_keys(item: dict[str, Any]) -> list[tuple[str, ...]]:
+    event_type = str(item.get("event_type") or "")
+    keys: list[tuple[str, ...]] = []
+    if item.get("ticker"):
+        keys.append((event_type, "ticker", str(item["ticker"]).upper()))
+    entity = tokenize(str(item.get("entity") or ""))[:3]
+    if entity:
+        keys.append((event_type, "entity", *entity))
+    # Adjacent name words in the title ("acme robotics") find rewrites whose wording differs.
+    for run in _name_runs(str(item.get("title") or "")):
+        keys.extend((event_type, "name", *run[start : start + 2]) for start in range(len(run) - 1))
+    return keys
+
+
+def _lead_name(item: dict[str, Any]) -> set[str]:
+    runs = _name_runs(str(item.get("entity") or ""))
+    return set(runs[0][:2]) if runs else set()
+
+
+def _same_subject(left: dict[str, Any], right: dict[str, Any], words: tuple[set[str], set[str]]) -> bool:
+    """False when neither item's text mentions the name the other's entity leads with:
+    "Acme Robotics" and "Globex Foods" releases sharing IPO boilerplate are different events
+    however alike the rest reads. Items without a capitalized name are not gated."""
+    if left.get("ticker") and left.get("ticker") == right.get("ticker"):
+        return True
+    left_lead, right_lead = _lead_name(left), _lead_name(right)
+    if not left_lead or not right_lead:
+        return True
+    left_words, right_words = words
+    return left_lead <= right_words or right_lead <= left_words
+
+
+def _compatible(left: dict[str, Any], right: dict[str, Any], window_days: int) -> bool:
+    if left.get("event_type") != right.get("event_type"):
+        return False
+    if left.get("ticker") and right.get("ticker") and left["ticker"] != right["ticker"]:
+        return False
+    left_day, right_day = _event_day(left), _event_day(right)
+    if left_day and right_day and abs((left_day - right_day).days) > window_days:
+        return False
+    return True
+
+
+def cluster_events(
+    items: list[dict[str, Any]],
+    *,
+    threshold: float = CLUSTER_SIMILARITY,
+    window_days: int = CLUSTER_WINDOW_DAYS,
+) -> dict[str, list[dict[str, Any]]]:
+    """Groups items that share an event_id or read as the same story.
+
+    Candidate pairs come from MinHash/LSH buckets over word 2- and 3-grams of title, summary
+    and lead text plus ticker/entity/name blocks, so each item is only compared against a
+    bounded set of earlier items. A pair is merged when its estimated Jaccard similarity
+    reaches ``threshold`` and both items are about the same subject.
+    Clusters are keyed by the event_id of their earliest item and keep input order.
+    """
+    forest = DisjointSet(len(items))
+    rows = max(1, CLUSTER_PERMUTATIONS // max(1, CLUSTER_BANDS))
+    index = LshIndex(bands=CLUSTER_PERMUTATIONS // rows, rows=rows)
+    first_by_id: dict[str, int] = {}
+    blocks: dict[tuple[str, ...], list[int]] = {}
+    signatures: list[tuple[int, ...] | None] = []
+    words: list[set[str]] = []
+
+    for position, item in enumerate(items):
         event_id = item["event_id"]
-        clusters.setdefault(event_id, []).append(item)
+        if event_id in first_by_id:
+            forest.union(first_by_id[event_id], position)
+        else:
+            first_by_id[event_id] = position
+
+        text = _cluster_text(item)
+        signature = minhash(shingles(text), CLUSTER_PERMUTATIONS)
+        signatures.append(signature)
+        words.append(set(tokenize(text)))
+        candidates = index.query_and_add(position, signature) if signature is not None else set()
+        for key in _blocking_keys(item):
+            block = blocks.setdefault(key, [])
+            candidates.update(block[-index.max_bucket :])
+            block.append(position)
+
+        for other in sorted(candidates):
+            other_signature = signatures[other]
+            if signature is None or other_signature is None or forest.find(other) == forest.find(position):
+                continue
+            if not _compatible(items[other], item, window_days):
+                continue
+            if not _same_subject(items[other], item, (words[other], words[position])):
+                continue
+            if estimate_similarity(signature, other_signature) >= threshold:
+                forest.union(other, position)
+
+    clusters: dict[str, list[dict[str, Any]]] = {}
+    for position, item in enumerate(items):
+        root = items[forest.find(position)]["event_id"]
+        clusters.setdefault(root, []).append(item)
     return clusters
 
 
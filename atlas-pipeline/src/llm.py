@@ -1,12 +1,78 @@
 from __future__ import annotations
 
 import json
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 from typing import Any
 
 import requests
 
-from config import LLM_ENABLED, LLM_PROVIDER, OPENROUTER_API_KEY, OPENROUTER_MODEL
+from config import (
+    CASSETTE_MODE,
+    LLM_CACHE_ENABLED,
+    LLM_CACHE_MAX_ENTRIES,
+    LLM_CACHE_PATH,
+    LLM_CACHE_TTL,
+    LLM_BASE_URL,
+    LLM_BATCH_SIZE,
+    LLM_CONCURRENCY,
+    LLM_ENABLED,
+    LLM_MAX_RETRIES,
+    LLM_PROVIDER,
+    LLM_RATE_BURST,
+    LLM_RATE_PER_SEC,
+    LLM_RUN_DEADLINE,
+    LLM_TIMEOUT,
+    OPENROUTER_API_KEY,
+    OPENROUTER_MODEL,
+)
+from cassette import replaying, through_cassette
+from llm_cache import VerdictCache, verdict_key
+from metrics import incr, observe
+from ratelimit import TokenBucket, parse_retry_after
+
+VERIFY_PROMPT_VERSION = "verify-v1"
+# Verdicts from the batch prompt are cached apart from single-prompt ones.
+VERIFY_BATCH_PROMPT_VERSION = "verify-batch-v1"
+# Statuses that mean the key, model or endpoint is wrong rather than this one request.
+_CONFIG_STATUSES = {401, 403, 404}
+
+_VERDICT_CACHE: VerdictCache | None = (
+    VerdictCache(LLM_CACHE_PATH, ttl=LLM_CACHE_TTL, max_entries=LLM_CACHE_MAX_ENTRIES)
+    if LLM_CACHE_ENABLED and CASSETTE_MODE == "off"
+    else None
+)
+_BUCKET = TokenBucket(LLM_RATE_PER_SEC, LLM_RATE_BURST)
+
+VERIFY_SYSTEM_PROMPT = (
+    "You are a strict verifier. Reply only with 'SIM' or 'NAO'. "
+    "Answer SIM only if the event is unequivocally about the specified theme."
+)
+VERIFY_BATCH_SYSTEM_PROMPT = (
+    "You are a strict verifier. For each numbered item answer 'SIM' or 'NAO'. "
+    "Answer SIM only if the item is unequivocally about its specified theme. "
+    "Reply only with a JSON array of answers in item order."
+)
+_VERDICT_RE = re.compile(r"\b(SIM|NAO)\b", re.IGNORECASE)
+
+
+class LlmConfigError(RuntimeError):
+    """Missing credentials or a request the provider refuses outright (bad key, unknown
+    model, wrong URL). Retrying cannot help, so it fails the run instead of reading as
+    "no verdict"."""
+
+
+class PayloadRejected(RuntimeError):
+    """A 4xx about this request's payload (context length exceeded, body too large).
+    A smaller request may pass, so batches are split; a single item gets no verdict."""
+
+
+class RateLimited(RuntimeError):
+    def __init__(self, retry_after: float | None):
+        super().__init__("LLM rate limited")
+        self.retry_after = retry_after
 
 
 @dataclass(frozen=True)
@@ -17,25 +83,36 @@ class LlmResult:
     checklist: list[str]
 
 
-def _call_openrouter(messages: list[dict[str, str]]) -> str:
-    if not OPENROUTER_API_KEY:
-        raise RuntimeError("OPENROUTER_API_KEY missing")
-    response = requests.post(
-        "https://openrouter.ai/api/v1/chat/completions",
+def _call_openrouter(messages: list[dict[str, str]], *, timeout: float = LLM_TIMEOUT) -> str:
+    if not OPENROUTER_API_KEY and not replaying():
+        raise LlmConfigError("OPENROUTER_API_KEY missing")
+    started = time.monotonic()
+    response = through_cassette(
+        "POST",
+        f"{LLM_BASE_URL}/chat/completions",
+        requests.post,
         headers={
             "Authorization": f"Bearer {OPENROUTER_API_KEY}",
             "Content-Type": "application/json",
             "X-Title": "Atlas",
             "HTTP-Referer": "https://atlas.local",
         },
-        json={
+        body={
             "model": OPENROUTER_MODEL,
             "max_tokens": 700,
             "temperature": 0.2,
             "messages": messages,
         },
-        timeout=35,
+        timeout=timeout,
     )
+    observe("llm_call", time.monotonic() - started)
+    if response.status_code == 429:
+        incr("llm_rate_limited")
+        raise RateLimited(parse_retry_after(response.headers.get("retry-after")))
+    if response.status_code in _CONFIG_STATUSES:
+        raise LlmConfigError(f"LLM request rejected: HTTP {response.status_code}")
+    if 400 <= response.status_code < 500 and response.status_code != 408:
+        raise PayloadRejected(f"LLM request rejected: HTTP {response.status_code}")
     response.raise_for_status()
     payload = response.json()
     content = payload.get("choices", [{}])[0].get("message", {}).get("content")
@@ -81,29 +158,150 @@ def generate(event: dict[str, Any]) -> LlmResult | None:
         raise RuntimeError(f"LLM output invalid: {exc}") from exc
 
 
-def verify_theme(event: dict[str, Any], theme: str) -> bool | None:
-    if not LLM_ENABLED:
+def _verify_payload(event: dict[str, Any], theme: str) -> dict[str, Any]:
+    return {
+        "theme": theme.upper(),
+        "title": event.get("title"),
+        "summary": event.get("summary"),
+        "content": event.get("content"),
+        "link": event.get("link"),
+    }
+
+
+def _request_with_limits(messages: list[dict[str, str]], deadline: float) -> str | None:
+    for attempt in range(LLM_MAX_RETRIES + 1):
+        if not _BUCKET.acquire(deadline=deadline):
+            return None
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            return None
+        try:
+            return _call_openrouter(messages, timeout=min(LLM_TIMEOUT, remaining))
+        except RateLimited as exc:
+            _BUCKET.pause(exc.retry_after if exc.retry_after is not None else 2.0 ** attempt)
+        except (LlmConfigError, PayloadRejected):
+            raise
+        except Exception as exc:
+            # Timeouts, 5xx and malformed replies only cost this batch its verdicts.
+            incr("llm_errors")
+            print(f"[llm] verify failed ({exc})")
+            return None
+    return None
+
+
+def _rejected(exc: PayloadRejected) -> None:
+    incr("llm_errors")
+    print(f"[llm] verify failed ({exc})")
+
+
+def _verify_one(event: dict[str, Any], theme: str, deadline: float) -> bool | None:
+    try:
+        raw = _request_with_limits(
+            [
+                {"role": "system", "content": VERIFY_SYSTEM_PROMPT},
+                {"role": "user", "content": json.dumps(_verify_payload(event, theme), ensure_ascii=True)},
+            ],
+            deadline,
+        )
+    except PayloadRejected as exc:
+        _rejected(exc)
         return None
+    if raw is None:
+        return None
+    return raw.strip().lower().startswith("sim")
+
+
+def _parse_batch_verdicts(raw: str, size: int) -> list[bool | None]:
+    answers: list[str] = []
+    try:
+        payload = json.loads(raw)
+        if isinstance(payload, list):
+            answers = [str(answer) for answer in payload]
+    except Exception:
+        answers = [match.group(1) for match in _VERDICT_RE.finditer(raw)]
+    if len(answers) != size:
+        return [None] * size
+    return [answer.strip().lower().startswith("sim") for answer in answers]
+
+
+def _verify_batch(pairs: list[tuple[dict[str, Any], str]], deadline: float) -> list[bool | None]:
+    """Verifies ``pairs`` with the batch prompt, even a single leftover pair, so every verdict
+    is cached under the prompt that produced it. A rejected payload is split in half and
+    retried until single items are left."""
+    items = [{"id": index, **_verify_payload(event, theme)} for index, (event, theme) in enumerate(pairs)]
+    try:
+        raw = _request_with_limits(
+            [
+                {"role": "system", "content": VERIFY_BATCH_SYSTEM_PROMPT},
+                {"role": "user", "content": json.dumps(items, ensure_ascii=True)},
+            ],
+            deadline,
+        )
+    except PayloadRejected as exc:
+        if len(pairs) == 1:
+            _rejected(exc)
+            return [None]
+        middle = len(pairs) // 2
+        return _verify_batch(pairs[:middle], deadline) + _verify_batch(pairs[middle:], deadline)
+    if raw is None:
+        return [None] * len(pairs)
+    return _parse_batch_verdicts(raw, len(pairs))
+
+
+def verify_themes(
+    pairs: list[tuple[dict[str, Any], str]],
+    *,
+    concurrency: int = LLM_CONCURRENCY,
+    batch_size: int = LLM_BATCH_SIZE,
+    deadline_seconds: float = LLM_RUN_DEADLINE,
+) -> list[bool | None]:
+    if not LLM_ENABLED or not pairs:
+        return [None] * len(pairs)
     if LLM_PROVIDER != "openrouter":
         raise RuntimeError("LLM provider must be openrouter")
-    system_prompt = (
-        "You are a strict verifier. Reply only with 'SIM' or 'NAO'. "
-        "Answer SIM only if the event is unequivocally about the specified theme."
-    )
-    user_prompt = json.dumps(
-        {
-            "theme": theme.upper(),
-            "title": event.get("title"),
-            "summary": event.get("summary"),
-            "content": event.get("content"),
-            "link": event.get("link"),
-        },
-        ensure_ascii=True,
-    )
-    raw = _call_openrouter(
-        [
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": user_prompt},
-        ]
-    )
-    return raw.strip().lower().startswith("sim")
+
+    size = max(1, batch_size)
+    prompt_version = VERIFY_PROMPT_VERSION if size == 1 else VERIFY_BATCH_PROMPT_VERSION
+    cache = _VERDICT_CACHE
+    keys = [verdict_key(event, theme, OPENROUTER_MODEL, prompt_version) for event, theme in pairs]
+    verdicts: list[bool | None] = [cache.get(key) if cache is not None else None for key in keys]
+    pending = [index for index, verdict in enumerate(verdicts) if verdict is None]
+    incr("llm_cache_hits", len(pairs) - len(pending))
+    if not pending:
+        return verdicts
+
+    deadline = time.monotonic() + deadline_seconds
+    chunks = [pending[start : start + size] for start in range(0, len(pending), size)]
+
+    def verify_chunk(chunk: list[int]) -> list[bool | None]:
+        if size == 1:
+            return [_verify_one(*pairs[chunk[0]], deadline)]
+        return _verify_batch([pairs[index] for index in chunk], deadline)
+
+    with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(chunks)))) as pool:
+        results = list(pool.map(verify_chunk, chunks))
+
+    unanswered = 0
+    for chunk, answers in zip(chunks, results):
+        for index, verdict in zip(chunk, answers):
+            verdicts[index] = verdict
+            if verdict is None:
+                unanswered += 1
+            elif cache is not None:
+                cache.put(keys[index], verdict)
+    if unanswered:
+        print(f"[llm] no verdict for {unanswered} of {len(pending)} candidates")
+    return verdicts
+
+
+def verify_theme(event: dict[str, Any], theme: str) -> bool | None:
+    return verify_themes([(event, theme)], concurrency=1, batch_size=1)[0]
+
+
+def verification_cache_stats() -> dict[str, Any] | None:
+    return _VERDICT_CACHE.stats() if _VERDICT_CACHE is not None else None
+
+
+def flush_verification_cache() -> None:
+    if _VERDICT_CACHE is not None:
+        _VERDICT_CACHE.flush()
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any
+
+
+def verdict_key(event: dict[str, Any], theme: str, model: str, prompt_version: str) -> str:
+    payload = json.dumps(
+        [
+            event.get("title") or "",
+            event.get("summary") or "",
+            event.get("content") or "",
+            event.get("link") or "",
+            theme,
+            model,
+            prompt_version,
+        ],
+        ensure_ascii=True,
+    )
+    return hashlib.sha256(payload.encode("utf8")).hexdigest()
+
+
+class VerdictCache:
+    def __init__(self, path: Path, *, ttl: float, max_entries: int):
+        self.path = Path(path)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, dict[str, Any]] = OrderedDict()
+        self._loaded = False
+        self._dirty = False
+        self._lock = threading.Lock()
+
+    def _load(self) -> None:
+        if self._loaded:
+            return
+        self._loaded = True
+        try:
+            payload = json.loads(self.path.read_text(encoding="utf8"))
+        except Exception:
+            return
+        for entry in payload.get("entries", []):
+            if isinstance(entry, dict) and entry.get("key") and isinstance(entry.get("verdict"), bool):
+                self._entries[entry["key"]] = entry
+
+    def get(self, key: str) -> bool | None:
+        with self._lock:
+            self._load()
+            entry = self._entries.get(key)
+            if entry is not None and time.time() - float(entry.get("stored_at") or 0) >= self.ttl:
+                del self._entries[key]
+                self._dirty = True
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self._dirty = True
+            self.hits += 1
+            return bool(entry["verdict"])
+
+    def put(self, key: str, verdict: bool) -> None:
+        with self._lock:
+            self._load()
+            self._entries.pop(key, None)
+            self._entries[key] = {"key": key, "verdict": verdict, "stored_at": time.time()}
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._dirty = True
+
+    def flush(self) -> None:
+        with self._lock:
+            if not self._dirty:
+                return
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = self.path.with_suffix(".tmp")
+            tmp_path.write_text(json.dumps({"entries": list(self._entries.values())}), encoding="utf8")
+            os.replace(tmp_path, self.path)
+            self._dirty = False
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 3) if lookups else None,
+                "entries": len(self._entries),
+            }
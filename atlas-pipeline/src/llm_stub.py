@@ -0,0 +1,134 @@
+from __future__ import annotations
+
+import argparse
+import json
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+
+from theme_filter import evaluate_theme
+
+
+def _answer(item: dict[str, Any]) -> str:
+    decision = evaluate_theme(str(item.get("title") or ""), str(item.get("summary") or ""), str(item.get("content") or ""))
+    theme = str(item.get("theme") or "").lower()
+    return "SIM" if decision is not None and decision.theme.lower() == theme else "NAO"
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address: tuple[str, int], *, latency: float, rate: float):
+        super().__init__(address, _Handler)
+        self.latency = latency
+        self.rate = rate
+        self.requests = 0
+        self.throttled = 0
+        # When set, every completion is answered with this HTTP status instead.
+        self.fail_status: int | None = None
+        # When set, batches with more items than this are refused with 413.
+        self.max_items: int | None = None
+        self.batch_sizes: list[int] = []
+        self._window: deque[float] = deque()
+        self._lock = threading.Lock()
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/api/v1"
+
+    def admit(self) -> bool:
+        with self._lock:
+            self.requests += 1
+            if self.rate <= 0:
+                return True
+            now = time.monotonic()
+            while self._window and now - self._window[0] >= 1.0:
+                self._window.popleft()
+            if len(self._window) >= self.rate:
+                self.throttled += 1
+                return False
+            self._window.append(now)
+            return True
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: StubServer
+
+    def log_message(self, format: str, *args: Any) -> None:
+        return None
+
+    def _send(self, status: int, payload: dict[str, Any], headers: dict[str, str] | None = None) -> None:
+        body = json.dumps(payload).encode("utf8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self) -> None:
+        if not self.path.endswith("/chat/completions"):
+            self._send(404, {"error": "not found"})
+            return
+        length = int(self.headers.get("Content-Length") or 0)
+        request = json.loads(self.rfile.read(length) or b"{}")
+        if not self.server.admit():
+            self._send(429, {"error": "rate limited"}, {"Retry-After": "1"})
+            return
+        if self.server.fail_status is not None:
+            self._send(self.server.fail_status, {"error": "stub failure"})
+            return
+        time.sleep(self.server.latency)
+        messages = request.get("messages") or []
+        prompt = messages[-1].get("content") if messages else "{}"
+        try:
+            payload = json.loads(prompt)
+        except Exception:
+            payload = {}
+        if isinstance(payload, list):
+            with self.server._lock:
+                self.server.batch_sizes.append(len(payload))
+            if self.server.max_items is not None and len(payload) > self.server.max_items:
+                self._send(413, {"error": "payload too large"})
+                return
+            content = json.dumps([_answer(item) for item in payload])
+        else:
+            content = _answer(payload if isinstance(payload, dict) else {})
+        self._send(
+            200,
+            {
+                "id": "stub",
+                "model": request.get("model"),
+                "choices": [{"index": 0, "message": {"role": "assistant", "content": content}}],
+            },
+        )
+
+
+def serve(host: str = "127.0.0.1", port: int = 0, *, latency: float = 0.5, rate: float = 0.0) -> StubServer:
+    server = StubServer((host, port), latency=latency, rate=rate)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Local OpenRouter-compatible stub for LLM verification runs")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.5, help="seconds per completion")
+    parser.add_argument("--rate", type=float, default=0.0, help="requests per second before 429 (0 = unlimited)")
+    args = parser.parse_args()
+    server = StubServer((args.host, args.port), latency=args.latency, rate=args.rate)
+    print(f"[llm-stub] serving {server.base_url} (latency={args.latency}s rate={args.rate}/s)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
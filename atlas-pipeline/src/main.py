@@ -1,20 +1,54 @@
 from __future__ import annotations
 
 import json
+from contextlib import contextmanager
 from datetime import datetime, timezone
 from pathlib import Path
+from typing import Iterator
 
-from config import FEED_PATH, FEED_VERSION, LOG_DIR, MAX_ITEMS, STATE_PATH, WINDOW_HOURS
-from dedup import filter_new_entries
-from extractor import extract_content, fetch_url
-from ingest import ingest_sources
-from judge import apply_thematic_filter, cluster_events, judge_clusters
-from normalize import normalize_candidate
+from cassette import cassette_stats, flush_cassette
+from config import (
+    EXTRACT_TIMEOUT,
+    EXTRACT_WORKERS,
+    FEED_PATH,
+    FEED_VERSION,
+    LOG_DIR,
+    MAX_ITEMS,
+    METRICS_TEXTFILE,
+    PIPELINE_MODE,
+    PRESCREEN_MODE,
+    SCHEDULER_ENABLED,
+    STATE_RETENTION_DAYS,
+    WATERMARKS_ENABLED,
+    WINDOW_HOURS,
+)
+from dedup import build_known_url_index, filter_known_entries, filter_new_entries
+from extractor import (
+    cache_stats,
+    extraction_cache_stats,
+    extractor_strategy_stats,
+    fetch_url,
+    flush_extraction_cache,
+    flush_extractor_strategy,
+    flush_http_cache,
+    rate_limit_stats,
+)
+from extractor.pool import extract_many
+from ingest import apply_source_rate_limits, ingest_sources
+from judge import apply_llm_verification, apply_theme_rules, cluster_events, judge_clusters
+from llm import flush_verification_cache, verification_cache_stats
+from metrics import StageRecord, metrics_snapshot, stage, write_prometheus
+from pipeline import StageOutput, run_streaming, to_normalized
+from prescreen import prescreen_entries
+from profiling import collect_worker_profiles, profile_stage, profile_summary, write_section_profiles
 from rank import rank_events
 from render import render_event
+from scheduler import SourceScheduler
 from schema import validate_feed_payload, validate_state_payload
 from sources import load_sources
-from state import load_state, update_state, write_state
+from state import StateStore, update_state
+from urls import load_redirects, save_redirects
+from watermarks import Watermarks
 
 
 def write_feed(feed: dict, path: Path) -> None:
@@ -25,33 +59,85 @@ def _now() -> str:
     return datetime.now(timezone.utc).isoformat()
 
 
-def _extract_candidates(candidates: list[dict]) -> list[dict]:
-    extracted_items: list[dict] = []
+@contextmanager
+def _stage(name: str, *, items_in: int = 0) -> Iterator[StageRecord]:
+    with stage(name, items_in=items_in) as record, profile_stage(name):
+        yield record
+
+
+def _extract_candidates(
+    candidates: list[dict],
+    *,
+    workers: int = EXTRACT_WORKERS,
+    timeout: float = EXTRACT_TIMEOUT,
+    watermarks: Watermarks | None = None,
+) -> list[dict]:
+    fetched: list[tuple[dict, str, str]] = []
     for candidate in candidates:
         url = candidate.get("url")
         if not url:
             continue
         try:
             response = fetch_url(url)
-            extracted = extract_content(url, response.text)
-            extracted_items.append(
-                normalize_candidate(
-                    candidate,
-                    {
-                        "title": extracted.title,
-                        "canonical_url": extracted.canonical_url,
-                        "published_at": extracted.published_at or candidate.get("published_at"),
-                        "text": extracted.text,
-                        "extraction_method": extracted.extraction_method,
-                        "paywalled": extracted.paywalled,
-                    },
-                )
-            )
         except Exception as exc:
             print(f"[extract] {url}: failed ({exc})")
+            if watermarks is not None:
+                watermarks.hold(candidate["source"].id)
+            continue
+        if response.skip_reason is not None:
+            # Final for this URL, so the source's watermark still moves past it.
+            print(f"[extract] {url}: skipped ({response.skip_reason})")
+            continue
+        fetched.append((candidate, url, response.text))
+
+    results = extract_many([(url, html) for _, url, html in fetched], workers=workers, timeout=timeout)
+
+    extracted_items: list[dict] = []
+    for (candidate, url, _), extracted in zip(fetched, results):
+        if isinstance(extracted, Exception):
+            print(f"[extract] {url}: failed ({extracted})")
+            if watermarks is not None:
+                watermarks.hold(candidate["source"].id)
+            continue
+        extracted_items.append(to_normalized(candidate, extracted))
     return extracted_items
 
 
+def _run_batch(sources: list, state: dict | StateStore, watermarks: Watermarks | None = None) -> StageOutput:
+    with _stage("ingest", items_in=len(sources)) as record:
+        raw_entries = ingest_sources(sources, watermarks=watermarks)
+        record.items_out = len(raw_entries)
+    with _stage("dedup", items_in=len(raw_entries)) as record:
+        unknown_entries = filter_known_entries(raw_entries, build_known_url_index(state))
+        record.items_out = len(unknown_entries)
+    with _stage("prescreen", items_in=len(unknown_entries)) as record:
+        plausible = prescreen_entries(unknown_entries)
+        record.items_out = len(plausible)
+    with _stage("extract", items_in=len(plausible)) as record:
+        extracted = _extract_candidates(plausible, watermarks=watermarks)
+        record.items_out = len(extracted)
+    with _stage("fresh", items_in=len(extracted)) as record:
+        fresh = filter_new_entries(extracted, state)
+        record.items_out = len(fresh)
+    with _stage("theme", items_in=len(fresh)) as record:
+        themed, theme_rejected = apply_theme_rules(fresh)
+        record.items_out = len(themed)
+    output = StageOutput(
+        discovered=len(raw_entries),
+        known_skipped=len(raw_entries) - len(unknown_entries),
+        prescreen_skipped=len(unknown_entries) - len(plausible),
+        candidates=len(extracted),
+        fresh=len(fresh),
+        parse_ms_total=sum(item["extraction"].get("parse_ms") or 0.0 for item in extracted),
+        themed=themed,
+        theme_rejected=theme_rejected,
+    )
+    output.count("entries", raw_entries)
+    output.count("fresh", fresh)
+    output.count("themed", themed)
+    return output
+
+
 def _select_by_windows(items: list[dict]) -> tuple[list[dict], dict[str, str]]:
     selected: list[dict] = []
     decisions: dict[str, str] = {}
@@ -81,6 +167,28 @@ def _select_by_windows(items: list[dict]) -> tuple[list[dict], dict[str, str]]:
     return selected, decisions
 
 
+def _record_yield(scheduler: SourceScheduler, polled: list, stages: StageOutput, approved: list[dict]) -> None:
+    approved_by_source: dict[str, int] = {}
+    for decision in approved:
+        for source_id in {item["source"].id for item in decision["items"]}:
+            approved_by_source[source_id] = approved_by_source.get(source_id, 0) + 1
+    ingested = metrics_snapshot()["sources"]
+    for source in polled:
+        listing = ingested.get(source.id, {})
+        if listing.get("failures"):
+            # A failed poll says nothing about yield; leaving it unrecorded retries it next run.
+            continue
+        counts = stages.source_counts.get(source.id, {})
+        scheduler.record(
+            source.id,
+            entries=counts.get("entries", 0),
+            fresh=counts.get("fresh", 0),
+            themed=counts.get("themed", 0),
+            approved=approved_by_source.get(source.id, 0),
+            latency_seconds=listing.get("seconds", 0.0),
+        )
+
+
 def _write_log(payload: dict) -> None:
     LOG_DIR.mkdir(parents=True, exist_ok=True)
     stamp = datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
@@ -93,22 +201,52 @@ def main() -> int:
     sources = load_sources()
 
     print(f"[atlas] sources: {len(sources)}")
-    raw_entries = ingest_sources(sources)
-    extracted = _extract_candidates(raw_entries)
+    apply_source_rate_limits(sources)
+    state = StateStore()
+    load_redirects()
+    watermarks = Watermarks(state.load_cursors()) if WATERMARKS_ENABLED else None
+    scheduler = SourceScheduler(state.load_source_history()) if SCHEDULER_ENABLED else None
+    polled = scheduler.plan(sources) if scheduler is not None else sources
+    print(f"[atlas] polling {len(polled)} of {len(sources)} sources")
+    if PIPELINE_MODE == "streaming":
+        # Ingest, fetch, extraction and screening overlap here, so they are timed as one stage
+        # and profiled per stage from the threads that run them.
+        with stage("stream", items_in=len(polled)) as record:
+            stages = run_streaming(polled, state, watermarks=watermarks)
+            record.items_out = len(stages.themed)
+        write_section_profiles()
+    else:
+        stages = _run_batch(polled, state, watermarks)
+    collect_worker_profiles()
+    flush_http_cache()
+    flush_extraction_cache()
+    flush_extractor_strategy()
+    save_redirects()
+    print(f"[atlas] known urls skipped before extraction: {stages.known_skipped}")
+    print(f"[atlas] off-theme entries skipped before fetch: {stages.prescreen_skipped}")
 
-    state = load_state()
-    fresh = filter_new_entries(extracted, state)
-    themed, theme_rejected = apply_thematic_filter(fresh)
-    clusters = cluster_events(themed)
-    approved, rejected = judge_clusters(clusters)
-    ranked = rank_events(approved)
-    selected, window_decisions = _select_by_windows(ranked)
+    with _stage("llm_verify", items_in=len(stages.themed)) as record:
+        themed, llm_rejected = apply_llm_verification(stages.themed)
+        record.items_out = len(themed)
+    theme_rejected = stages.theme_rejected + llm_rejected
+    flush_verification_cache()
+    flush_cassette()
+    with _stage("cluster", items_in=len(themed)) as record:
+        clusters = cluster_events(themed)
+        record.items_out = len(clusters)
+    with _stage("judge", items_in=len(clusters)) as record:
+        approved, rejected = judge_clusters(clusters)
+        record.items_out = len(approved)
+    with _stage("rank", items_in=len(approved)) as record:
+        ranked = rank_events(approved)
+        selected, window_decisions = _select_by_windows(ranked)
+        record.items_out = len(selected)
 
     print(
         "[atlas] candidates:",
-        len(extracted),
+        stages.candidates,
         "fresh:",
-        len(fresh),
+        stages.fresh,
         "themed:",
         len(themed),
         "clusters:",
@@ -125,7 +263,9 @@ def main() -> int:
     for decision in rejected:
         print(f"[atlas] reject {decision['event_id']}: {decision.get('rejection_reason')}")
 
-    feed_items = [render_event(event) for event in selected][:MAX_ITEMS]
+    with _stage("render", items_in=len(selected)) as record:
+        feed_items = [render_event(event) for event in selected][:MAX_ITEMS]
+        record.items_out = len(feed_items)
     feed = {
         "version": FEED_VERSION,
         "generated_at": _now(),
@@ -135,20 +275,40 @@ def main() -> int:
     if errors:
         raise RuntimeError(f"feed schema invalid: {errors}")
 
-    next_state = update_state(state, feed_items)
-    state_errors = validate_state_payload(next_state)
+    members = {event["event_id"]: event["items"] for event in selected}
+    additions = update_state({"events": []}, feed_items, members)
+    state_errors = validate_state_payload(additions)
     if state_errors:
         raise RuntimeError(f"state schema invalid: {state_errors}")
 
-    write_feed(feed, FEED_PATH)
-    write_state(next_state)
+    with _stage("persist", items_in=len(feed_items)) as record:
+        write_feed(feed, FEED_PATH)
+        state.add_events(additions["events"])
+        pruned = state.prune(retention_days=STATE_RETENTION_DAYS)
+        if state.changed:
+            state.write_json(state.export())
+        if watermarks is not None:
+            # Cursors move only once the feed and state for this run are on disk.
+            state.save_cursors(watermarks.pending())
+        if scheduler is not None:
+            _record_yield(scheduler, polled, stages, approved)
+            state.save_source_history(scheduler.history)
+        state_size = state.count()
+        record.items_out = len(additions["events"])
+    state.close()
     print(f"[atlas] wrote feed: {FEED_PATH}")
 
+    metrics = metrics_snapshot()
     _write_log(
         {
             "generated_at": feed["generated_at"],
             "source_count": len(sources),
-            "candidate_count": len(extracted),
+            "pipeline_mode": PIPELINE_MODE,
+            "discovered_count": stages.discovered,
+            "known_skipped_count": stages.known_skipped,
+            "prescreen_skipped_count": stages.prescreen_skipped,
+            "prescreen_mode": PRESCREEN_MODE,
+            "candidate_count": stages.candidates,
             "selected_count": len(feed_items),
             "windows": window_decisions,
             "rejections": {
@@ -156,8 +316,22 @@ def main() -> int:
                 "evidence": len(rejected),
             },
             "window_hours": WINDOW_HOURS,
+            "http_cache": cache_stats(),
+            "extraction_cache": extraction_cache_stats(),
+            "extractors": extractor_strategy_stats(),
+            "rate_limits": rate_limit_stats(),
+            "llm_cache": verification_cache_stats(),
+            "cassette": cassette_stats(),
+            "watermarks": watermarks.stats() if watermarks is not None else None,
+            "schedule": scheduler.summary() if scheduler is not None else None,
+            "parse_ms_total": round(stages.parse_ms_total, 2),
+            "state": {"events": state_size, "added": len(additions["events"]), "pruned": pruned},
+            "metrics": metrics,
+            "profile": profile_summary(),
         }
     )
+    if METRICS_TEXTFILE:
+        write_prometheus(METRICS_TEXTFILE, metrics)
 
     if not feed_items:
         print("[atlas] no-op: no approved events")
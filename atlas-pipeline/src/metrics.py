@@ -0,0 +1,217 @@
+from __future__ import annotations
+
+import os
+import re
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any, Iterator
+
+_NAME_RE = re.compile(r"[^a-zA-Z0-9_]")
+
+
+@dataclass
+class StageStats:
+    wall_seconds: float = 0.0
+    cpu_seconds: float = 0.0
+    items_in: int = 0
+    items_out: int = 0
+    runs: int = 0
+
+
+@dataclass
+class SourceStats:
+    entries: int = 0
+    new: int = 0
+    failures: int = 0
+    unchanged: int = 0
+    seconds: float = 0.0
+
+
+@dataclass
+class Timing:
+    count: int = 0
+    total_seconds: float = 0.0
+    max_seconds: float = 0.0
+
+
+class StageRecord:
+    """Handed out by ``Metrics.stage``; callers set ``items_out`` before the block ends."""
+
+    def __init__(self, items_in: int):
+        self.items_in = items_in
+        self.items_out = 0
+
+
+class Metrics:
+    """Thread-safe per-run counters: stage timings, named counters, call latencies and
+    per-source ingest results. CPU time is process-wide, so it also covers helper
+    threads working during a stage but not the extraction worker processes."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        with self._lock:
+            self.started = time.time()
+            self._started_wall = time.perf_counter()
+            self.stages: dict[str, StageStats] = {}
+            self.counters: dict[str, int] = {}
+            self.timings: dict[str, Timing] = {}
+            self.sources: dict[str, SourceStats] = {}
+
+    @contextmanager
+    def stage(self, name: str, *, items_in: int = 0) -> Iterator[StageRecord]:
+        record = StageRecord(items_in)
+        wall = time.perf_counter()
+        cpu = time.process_time()
+        try:
+            yield record
+        finally:
+            wall_seconds = time.perf_counter() - wall
+            cpu_seconds = time.process_time() - cpu
+            with self._lock:
+                stats = self.stages.setdefault(name, StageStats())
+                stats.wall_seconds += wall_seconds
+                stats.cpu_seconds += cpu_seconds
+                stats.items_in += record.items_in
+                stats.items_out += record.items_out
+                stats.runs += 1
+
+    def incr(self, name: str, value: int = 1) -> None:
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+
+    def observe(self, name: str, seconds: float) -> None:
+        with self._lock:
+            timing = self.timings.setdefault(name, Timing())
+            timing.count += 1
+            timing.total_seconds += seconds
+            timing.max_seconds = max(timing.max_seconds, seconds)
+
+    def record_source(
+        self,
+        source_id: str,
+        *,
+        entries: int = 0,
+        new: int = 0,
+        failed: bool = False,
+        unchanged: bool = False,
+        seconds: float = 0.0,
+    ) -> None:
+        with self._lock:
+            stats = self.sources.setdefault(source_id, SourceStats())
+            stats.entries += entries
+            stats.new += new
+            stats.failures += int(failed)
+            stats.unchanged += int(unchanged)
+            stats.seconds += seconds
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "started_at": self.started,
+                "wall_seconds": round(time.perf_counter() - self._started_wall, 4),
+                "stages": {name: _rounded(asdict(stats)) for name, stats in self.stages.items()},
+                "counters": dict(sorted(self.counters.items())),
+                "timings": {
+                    name: _rounded({**asdict(timing), "mean_seconds": timing.total_seconds / timing.count})
+                    for name, timing in self.timings.items()
+                },
+                "sources": {
+                    source_id: _rounded(asdict(stats)) for source_id, stats in sorted(self.sources.items())
+                },
+            }
+
+
+def _rounded(values: dict[str, Any]) -> dict[str, Any]:
+    return {key: round(value, 4) if isinstance(value, float) else value for key, value in values.items()}
+
+
+def _metric_name(name: str) -> str:
+    return "atlas_" + _NAME_RE.sub("_", name).lower()
+
+
+def _label(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def render_prometheus(snapshot: dict[str, Any]) -> str:
+    """Renders a snapshot in the Prometheus text exposition format. Everything is a gauge
+    describing the last run, which is what the node_exporter textfile collector expects."""
+    lines: list[str] = []
+
+    def family(name: str, help_text: str, samples: list[tuple[dict[str, str], float]]) -> None:
+        if not samples:
+            return
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} gauge")
+        for labels, value in samples:
+            rendered = ",".join(f'{key}="{_label(str(label))}"' for key, label in labels.items())
+            lines.append(f"{name}{{{rendered}}} {value}" if rendered else f"{name} {value}")
+
+    family("atlas_last_run_timestamp_seconds", "Unix time the run started.", [({}, snapshot["started_at"])])
+    family("atlas_run_wall_seconds", "Wall-clock seconds of the whole run.", [({}, snapshot["wall_seconds"])])
+    stages = snapshot["stages"]
+    for field, help_text in (
+        ("wall_seconds", "Wall-clock seconds spent in the stage."),
+        ("cpu_seconds", "Process CPU seconds spent in the stage."),
+        ("items_in", "Items entering the stage."),
+        ("items_out", "Items leaving the stage."),
+    ):
+        family(f"atlas_stage_{field}", help_text, [({"stage": name}, stats[field]) for name, stats in stages.items()])
+    for name, value in snapshot["counters"].items():
+        family(_metric_name(name), f"Run counter {name}.", [({}, value)])
+    for name, timing in snapshot["timings"].items():
+        metric = _metric_name(name)
+        family(f"{metric}_count", f"Number of {name} calls.", [({}, timing["count"])])
+        family(f"{metric}_seconds_total", f"Total seconds spent in {name} calls.", [({}, timing["total_seconds"])])
+        family(f"{metric}_seconds_max", f"Slowest {name} call in seconds.", [({}, timing["max_seconds"])])
+    sources = snapshot["sources"]
+    for field, help_text in (
+        ("entries", "Entries listed by the source."),
+        ("new", "Entries kept after watermarks."),
+        ("failures", "Failed ingest attempts."),
+        ("unchanged", "Listings skipped as unchanged."),
+        ("seconds", "Seconds spent ingesting the source."),
+    ):
+        family(
+            f"atlas_source_{field}",
+            help_text,
+            [({"source": source_id}, stats[field]) for source_id, stats in sources.items()],
+        )
+    return "\n".join(lines) + "\n"
+
+
+def write_prometheus(path: Path, snapshot: dict[str, Any]) -> None:
+    # The collector reads every *.prom file, so the temporary name must not end in .prom.
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(path.name + ".tmp")
+    tmp_path.write_text(render_prometheus(snapshot), encoding="utf8")
+    os.replace(tmp_path, path)
+
+
+METRICS = Metrics()
+
+
+def stage(name: str, *, items_in: int = 0):
+    return METRICS.stage(name, items_in=items_in)
+
+
+def incr(name: str, value: int = 1) -> None:
+    METRICS.incr(name, value)
+
+
+def observe(name: str, seconds: float) -> None:
+    METRICS.observe(name, seconds)
+
+
+def record_source(source_id: str, **counts: Any) -> None:
+    METRICS.record_source(source_id, **counts)
+
+
+def metrics_snapshot() -> dict[str, Any]:
+    return METRICS.snapshot()
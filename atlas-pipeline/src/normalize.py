@@ -159,5 +159,6 @@ def normalize_candidate(payload: dict[str, Any], extracted: dict[str, Any]) -> d
             "method": extracted.get("extraction_method"),
             "paywalled": bool(extracted.get("paywalled")),
             "body_length": len(content),
+            "parse_ms": extracted.get("parse_ms"),
         },
     }
@@ -0,0 +1,271 @@
+from __future__ import annotations
+
+import queue
+import threading
+from concurrent.futures import BrokenExecutor, Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any
+
+from config import EXTRACT_TIMEOUT, EXTRACT_WORKERS, INGEST_WORKERS, STREAM_QUEUE_SIZE
+from dedup import build_known_url_index, filter_known_entries, filter_new_entries
+from extractor import ExtractedContent, fetch_url
+from extractor.extraction_cache import cached_extraction, remember_extraction
+from extractor.pool import POOL_CONTEXT, extract_with_deadline
+from extractor.strategy import choose_extractor, record_extraction
+from ingest import group_sources_by_domain, ingest_source
+from judge import apply_theme_rules
+from normalize import normalize_candidate
+from prescreen import prescreen_entries
+from profiling import profile_section
+from sources import SourceConfig
+from state import StateStore
+from watermarks import Watermarks
+
+_DONE = object()
+_STOPPED = object()
+# How often blocked queue calls wake up to check whether the run was stopped.
+_POLL_SECONDS = 0.1
+
+
+@dataclass
+class StageOutput:
+    discovered: int = 0
+    known_skipped: int = 0
+    # Entries whose headline or URL ruled out every theme, so they were never fetched.
+    prescreen_skipped: int = 0
+    candidates: int = 0
+    fresh: int = 0
+    parse_ms_total: float = 0.0
+    themed: list[dict[str, Any]] = field(default_factory=list)
+    theme_rejected: list[dict[str, Any]] = field(default_factory=list)
+    # source id -> {"entries", "fresh", "themed"}, used to learn per-source yield.
+    source_counts: dict[str, dict[str, int]] = field(default_factory=dict)
+
+    def count(self, stage: str, items: list[dict[str, Any]]) -> None:
+        for item in items:
+            counts = self.source_counts.setdefault(item["source"].id, {"entries": 0, "fresh": 0, "themed": 0})
+            counts[stage] += 1
+
+
+def to_normalized(candidate: dict[str, Any], extracted: ExtractedContent) -> dict[str, Any]:
+    return normalize_candidate(
+        candidate,
+        {
+            "title": extracted.title,
+            "canonical_url": extracted.canonical_url,
+            "published_at": extracted.published_at or candidate.get("published_at"),
+            "text": extracted.text,
+            "extraction_method": extracted.extraction_method,
+            "paywalled": extracted.paywalled,
+            "parse_ms": extracted.parse_ms,
+        },
+    )
+
+
+def _put(channel: queue.Queue, message: Any, stop: threading.Event) -> bool:
+    while not stop.is_set():
+        try:
+            channel.put(message, timeout=_POLL_SECONDS)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+def _get(channel: queue.Queue, stop: threading.Event) -> Any:
+    while not stop.is_set():
+        try:
+            return channel.get(timeout=_POLL_SECONDS)
+        except queue.Empty:
+            continue
+    return _STOPPED
+
+
+def run_streaming(
+    sources: list[SourceConfig],
+    state: dict[str, Any] | StateStore,
+    *,
+    queue_size: int = STREAM_QUEUE_SIZE,
+    fetch_workers: int = INGEST_WORKERS,
+    extract_workers: int = EXTRACT_WORKERS,
+    timeout: float = EXTRACT_TIMEOUT,
+    watermarks: Watermarks | None = None,
+) -> StageOutput:
+    """Runs ingest, pre-screen, fetch, extraction and screening as overlapping stages connected by
+    bounded queues. The first fatal error (a broken extraction pool, a crashed stage
+    thread) stops every stage and is re-raised here; per-item failures are logged and
+    hold the source's watermark as in batch mode."""
+    known_urls = build_known_url_index(state)
+    entries: queue.Queue = queue.Queue(maxsize=queue_size)
+    documents: queue.Queue = queue.Queue(maxsize=queue_size)
+    fetch_workers = max(1, fetch_workers)
+    counts = {"discovered": 0, "known_skipped": 0, "prescreen_skipped": 0}
+    counts_lock = threading.Lock()
+    executor = (
+        ProcessPoolExecutor(max_workers=extract_workers, mp_context=POOL_CONTEXT) if extract_workers > 1 else None
+    )
+    discovered_entries: list[dict[str, Any]] = []
+    # Set on the first fatal error; every blocked producer and consumer wakes up and exits.
+    stop = threading.Event()
+    failures: list[BaseException] = []
+
+    def fail(exc: BaseException) -> None:
+        with counts_lock:
+            failures.append(exc)
+        stop.set()
+
+    def ingest_domain(indexes: list[int]) -> None:
+        try:
+            for source_index in indexes:
+                with profile_section("ingest"):
+                    ingested = ingest_source(sources[source_index], watermarks)
+                for entry_index, entry in enumerate(ingested):
+                    if not _put(entries, ((source_index, entry_index), entry), stop):
+                        return
+        except BaseException as exc:
+            fail(exc)
+
+    def ingest_all() -> None:
+        try:
+            groups = list(group_sources_by_domain(sources).values())
+            threads = [threading.Thread(target=ingest_domain, args=(group,), daemon=True) for group in groups]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        except BaseException as exc:
+            fail(exc)
+        finally:
+            for _ in range(fetch_workers):
+                _put(entries, _DONE, stop)
+
+    def fetch_one(seq: tuple[int, int], candidate: dict[str, Any]) -> None:
+        with counts_lock:
+            counts["discovered"] += 1
+            discovered_entries.append(candidate)
+        with profile_section("dedup"):
+            known = not filter_known_entries([candidate], known_urls)
+        if known:
+            with counts_lock:
+                counts["known_skipped"] += 1
+            return
+        with profile_section("prescreen"):
+            plausible = prescreen_entries([candidate])
+        if not plausible:
+            with counts_lock:
+                counts["prescreen_skipped"] += 1
+            return
+        url = candidate.get("url")
+        if not url:
+            return
+        try:
+            with profile_section("fetch"):
+                response = fetch_url(url)
+        except Exception as exc:
+            print(f"[extract] {url}: failed ({exc})")
+            if watermarks is not None:
+                watermarks.hold(candidate["source"].id)
+            return
+        if response.skip_reason is not None:
+            print(f"[extract] {url}: skipped ({response.skip_reason})")
+            return
+        html = response.text
+        payload: ExtractedContent | Future | str | None = cached_extraction(url, html)
+        prefer = choose_extractor(url) if payload is None else None
+        if payload is None:
+            payload = (
+                executor.submit(extract_with_deadline, url, html, timeout, prefer) if executor is not None else html
+            )
+        _put(documents, (seq, candidate, url, html, prefer, payload), stop)
+
+    def fetch_loop() -> None:
+        try:
+            while True:
+                message = _get(entries, stop)
+                if message is _DONE or message is _STOPPED:
+                    return
+                seq, candidate = message
+                try:
+                    fetch_one(seq, candidate)
+                except BrokenExecutor as exc:
+                    # The extraction pool is gone; every later item would fail the same way.
+                    fail(exc)
+                    return
+                except Exception as exc:
+                    print(f"[extract] {candidate.get('url')}: failed ({exc})")
+                    if watermarks is not None:
+                        watermarks.hold(candidate["source"].id)
+        except BaseException as exc:
+            fail(exc)
+        finally:
+            _put(documents, _DONE, stop)
+
+    threads = [threading.Thread(target=ingest_all, daemon=True)]
+    threads += [threading.Thread(target=fetch_loop, daemon=True) for _ in range(fetch_workers)]
+    for thread in threads:
+        thread.start()
+
+    output = StageOutput()
+    themed: list[tuple[tuple[int, int], dict[str, Any]]] = []
+    rejected: list[tuple[tuple[int, int], dict[str, Any]]] = []
+    pending_done = fetch_workers
+    try:
+        while pending_done:
+            message = _get(documents, stop)
+            if message is _STOPPED:
+                break
+            if message is _DONE:
+                pending_done -= 1
+                continue
+            seq, candidate, url, html, prefer, payload = message
+            try:
+                if isinstance(payload, ExtractedContent):
+                    extracted = payload
+                else:
+                    if isinstance(payload, Future):
+                        extracted = payload.result()
+                    else:
+                        with profile_section("extract"):
+                            extracted = extract_with_deadline(url, payload, timeout, prefer)
+                    remember_extraction(url, html, extracted)
+                    record_extraction(url, extracted)
+            except BrokenExecutor as exc:
+                fail(exc)
+                break
+            except Exception as exc:
+                print(f"[extract] {url}: failed ({exc})")
+                if watermarks is not None:
+                    watermarks.hold(candidate["source"].id)
+                continue
+            item = to_normalized(candidate, extracted)
+            output.candidates += 1
+            output.parse_ms_total += extracted.parse_ms
+            with profile_section("fresh"):
+                fresh = filter_new_entries([item], state)
+            with profile_section("theme"):
+                accepted, refused = apply_theme_rules(fresh)
+            output.fresh += len(fresh)
+            output.count("fresh", fresh)
+            output.count("themed", accepted)
+            themed.extend((seq, entry) for entry in accepted)
+            rejected.extend((seq, entry) for entry in refused)
+    except BaseException as exc:
+        fail(exc)
+    finally:
+        if failures:
+            stop.set()
+        # With the stop event set every thread leaves its queue wait within _POLL_SECONDS.
+        for thread in threads:
+            thread.join()
+        if executor is not None:
+            executor.shutdown(wait=not failures, cancel_futures=bool(failures))
+    if failures:
+        raise failures[0]
+
+    output.discovered = counts["discovered"]
+    output.known_skipped = counts["known_skipped"]
+    output.prescreen_skipped = counts["prescreen_skipped"]
+    output.count("entries", discovered_entries)
+    output.themed = [entry for _, entry in sorted(themed, key=lambda pair: pair[0])]
+    output.theme_rejected = [entry for _, entry in sorted(rejected, key=lambda pair: pair[0])]
+    return output
@@ -0,0 +1,111 @@
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import Any
+from urllib.parse import unquote, urlparse
+
+from config import PRESCREEN_MODE
+from metrics import incr
+from theme_filter import BILLIONAIRE_KEYWORDS, HTML_RE, IPO_KEYWORDS, REVENUE_KEYWORDS
+
+# Headline wording for each theme, looser than the phrases evaluate_theme requires of the
+# full article: a headline saying "debut" or "net worth" may well lead to one that passes.
+THEME_CUES: dict[str, list[str]] = {
+    "ipo": IPO_KEYWORDS
+    + [
+        r"ipos?",
+        r"initial public",
+        r"public offering",
+        r"go(?:es|ing)? public",
+        r"listings?",
+        r"lists",
+        r"debuts?",
+        r"s-1",
+        r"f-1",
+        r"spac",
+        r"flotation",
+        r"begins trading",
+    ],
+    "billionaire": BILLIONAIRE_KEYWORDS + [r"billionaires?", r"net worth", r"rich list", r"richest", r"fortune"],
+    "revenue_record": REVENUE_KEYWORDS
+    + [r"record", r"revenues?", r"sales", r"earnings", r"results", r"quarterly", r"annual report", r"turnover"],
+}
+# Kinds of press release that never carry one of the themes: enforcement, speeches,
+# testimony, personnel news.
+OFF_THEME_CUES = [
+    r"charge[sd]?",
+    r"enforcement",
+    r"speech(?:es)?",
+    r"remarks",
+    r"testimony",
+    r"settle(?:s|d|ment)",
+    r"fraud",
+    r"penalt(?:y|ies)",
+    r"fined",
+    r"sanctions?",
+    r"roundtable",
+    r"webinar",
+    r"statement on",
+    r"appoint(?:s|ed|ment)",
+    r"obituary",
+]
+# Fewer words than this in the headline, summary and URL slug together decide nothing.
+MIN_WORDS = 3
+
+_THEME_RES = {theme: re.compile(r"\b(?:" + "|".join(cues) + r")\b") for theme, cues in THEME_CUES.items()}
+_OFF_THEME_RE = re.compile(r"\b(?:" + "|".join(OFF_THEME_CUES) + r")\b")
+_SLUG_SPLIT_RE = re.compile(r"[/\-_.+]+")
+_WORD_RE = re.compile(r"[a-z]{2,}")
+_PAGE_SUFFIXES = {"html", "htm", "php", "asp", "aspx", "shtml"}
+
+
+@dataclass(frozen=True)
+class PrescreenDecision:
+    keep: bool
+    reason: str
+
+
+def slug_words(url: str) -> list[str]:
+    """Words in the URL path, e.g. ``["sec", "charges", "adviser"]`` for
+    ``/news/2025-41-sec-charges-adviser``; numbers and page suffixes are dropped."""
+    path = unquote(urlparse(url).path).lower()
+    return [
+        token
+        for token in _SLUG_SPLIT_RE.split(path)
+        if _WORD_RE.fullmatch(token) and token not in _PAGE_SUFFIXES
+    ]
+
+
+def prescreen_entry(entry: dict[str, Any], mode: str = PRESCREEN_MODE) -> PrescreenDecision:
+    """Decides from an ingested entry's title, summary and URL slug whether the article could
+    pass the theme filter. Anything with a cue for one of the source's themes is kept, as is
+    anything too short to judge; ``conservative`` also keeps entries with no cue either way,
+    ``strict`` drops them."""
+    if mode == "off":
+        return PrescreenDecision(keep=True, reason="off")
+    headline = HTML_RE.sub(" ", f"{entry.get('title') or ''} {entry.get('summary') or ''}")
+    text = " ".join([*headline.lower().split(), *slug_words(str(entry.get("url") or ""))])
+    source = entry.get("source")
+    hints = [hint for hint in getattr(source, "category_hints", None) or [] if hint in _THEME_RES]
+    themes = hints or list(_THEME_RES)
+    if any(_THEME_RES[theme].search(text) for theme in themes):
+        return PrescreenDecision(keep=True, reason="theme_cue")
+    if len(text.split()) < MIN_WORDS:
+        return PrescreenDecision(keep=True, reason="ambiguous")
+    if _OFF_THEME_RE.search(text):
+        return PrescreenDecision(keep=False, reason="off_theme")
+    if mode == "strict":
+        return PrescreenDecision(keep=False, reason="no_theme_cue")
+    return PrescreenDecision(keep=True, reason="ambiguous")
+
+
+def prescreen_entries(entries: list[dict[str, Any]], mode: str = PRESCREEN_MODE) -> list[dict[str, Any]]:
+    kept: list[dict[str, Any]] = []
+    for entry in entries:
+        decision = prescreen_entry(entry, mode)
+        if decision.keep:
+            kept.append(entry)
+        else:
+            incr(f"prescreen_skipped_{decision.reason}")
+    return kept
@@ -0,0 +1,283 @@
+from __future__ import annotations
+
+import cProfile
+import hashlib
+import io
+import multiprocessing
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Iterator
+
+from config import LOG_DIR, PROFILE_ENABLED, PROFILE_SAMPLE_RATE, PROFILE_TOP_N
+
+_IGNORED_FRAMES = (
+    tracemalloc.Filter(False, tracemalloc.__file__),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+    tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+    tracemalloc.Filter(False, __file__),
+)
+WORKER_SPOOL = LOG_DIR / "profile-workers"
+
+
+class StageProfiler:
+    """Runs each stage under cProfile and tracemalloc and writes ``<stage>.txt`` (top
+    functions by cumulative and own time, top allocation sites, peak memory) plus the raw
+    ``<stage>.prof`` into ``directory``.
+
+    cProfile only sees the thread that enables it, so threads started while a stage is
+    open get a profiler of their own and are merged into the stage report.
+
+    Stages that overlap, as in the streaming pipeline, are profiled with ``section``
+    instead, from the threads that run them, and written by ``write_sections``.
+
+    Only one profiler may be active per process on Python 3.12+ (and under coverage or a
+    debugger); when cProfile refuses to start, profiling turns itself off for the rest of
+    the run rather than failing it.
+    """
+
+    def __init__(self, directory: Path, *, top_n: int = PROFILE_TOP_N):
+        self.directory = Path(directory)
+        self.top_n = top_n
+        self.started = time.time()
+        self.reports: dict[str, str] = {}
+        self.enabled = True
+        self._lock = threading.Lock()
+        self._sections: dict[str, list[cProfile.Profile]] = {}
+        self._thread_sections = threading.local()
+
+    def _disable(self, exc: Exception) -> None:
+        with self._lock:
+            if not self.enabled:
+                return
+            self.enabled = False
+        print(f"[profile] disabled: {exc}")
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        if not self.enabled:
+            yield
+            return
+        profiles: list[cProfile.Profile] = []
+        lock = threading.Lock()
+
+        def profile_new_thread(frame: Any, event: str, arg: Any) -> None:
+            # Runs once per thread: enabling a profiler replaces this hook, and a thread
+            # left unprofiled must not keep calling it.
+            sys.setprofile(None)
+            if not self.enabled:
+                return
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+            except ValueError as exc:
+                self._disable(exc)
+                return
+            with lock:
+                profiles.append(profile)
+
+        started_tracing = not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        before = tracemalloc.take_snapshot().filter_traces(_IGNORED_FRAMES)
+        main_profile = cProfile.Profile()
+        try:
+            main_profile.enable()
+        except ValueError as exc:
+            if started_tracing:
+                tracemalloc.stop()
+            self._disable(exc)
+            yield
+            return
+        threading.setprofile(profile_new_thread)
+        try:
+            yield
+        finally:
+            main_profile.disable()
+            threading.setprofile(None)
+            after = tracemalloc.take_snapshot().filter_traces(_IGNORED_FRAMES)
+            peak = tracemalloc.get_traced_memory()[1]
+            if started_tracing:
+                tracemalloc.stop()
+            with lock:
+                thread_profiles = list(profiles)
+            # A stage some of whose threads went unprofiled would under-report them.
+            if self.enabled:
+                self._write(name, [main_profile, *thread_profiles], after.compare_to(before, "lineno"), peak)
+
+    @contextmanager
+    def section(self, name: str) -> Iterator[None]:
+        """Profiles the calling thread for the duration of the block as part of the ``name``
+        report. Blocks in the same thread must not nest; allocations are not tracked, since
+        tracemalloc cannot tell overlapping stages apart."""
+        if not self.enabled:
+            yield
+            return
+        profiles: dict[str, cProfile.Profile] | None = getattr(self._thread_sections, "profiles", None)
+        if profiles is None:
+            profiles = self._thread_sections.profiles = {}
+        profile = profiles.get(name)
+        if profile is None:
+            profile = profiles[name] = cProfile.Profile()
+            with self._lock:
+                self._sections.setdefault(name, []).append(profile)
+        try:
+            profile.enable()
+        except ValueError as exc:
+            self._disable(exc)
+            yield
+            return
+        try:
+            yield
+        finally:
+            profile.disable()
+
+    def write_sections(self) -> None:
+        with self._lock:
+            sections = {name: list(profiles) for name, profiles in self._sections.items()}
+            self._sections.clear()
+        if not self.enabled:
+            return
+        for name, profiles in sections.items():
+            self._write(name, profiles, None, None)
+
+    def _write(
+        self, name: str, profiles: list[cProfile.Profile], allocations: list | None, peak: int | None
+    ) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        stats = _merged(profiles)
+        if stats is not None:
+            stats.dump_stats(str(self.directory / f"{name}.prof"))
+        memory = f"{peak / 1024:.1f} KB" if peak is not None else "not tracked (stage overlapped others)"
+        lines = [f"stage: {name}", f"threads profiled: {len(profiles)}", f"peak traced memory: {memory}", ""]
+        lines += _hot_functions(stats, self.top_n)
+        if allocations is not None:
+            lines += ["", f"top {self.top_n} allocation sites (net growth during the stage)"]
+            for difference in allocations[: self.top_n]:
+                frame = difference.traceback[0]
+                lines.append(
+                    f"{difference.size_diff / 1024:>10.1f} KB {difference.count_diff:>8} blocks  {frame.filename}:{frame.lineno}"
+                )
+        path = self.directory / f"{name}.txt"
+        path.write_text("\n".join(lines) + "\n", encoding="utf8")
+        self.reports[name] = str(path)
+
+    def collect_worker_profiles(self, spool: Path = WORKER_SPOOL) -> None:
+        """Merges the sampled extraction profiles left by worker processes into
+        ``extract_workers.txt`` and clears the spool."""
+        # Files older than this run are leftovers from an interrupted one.
+        files = sorted(path for path in spool.glob("*.prof") if path.stat().st_mtime >= self.started)
+        if not files:
+            return
+        self.directory.mkdir(parents=True, exist_ok=True)
+        stats = pstats.Stats(str(files[0]), stream=io.StringIO())
+        for path in files[1:]:
+            stats.add(str(path))
+        stats.dump_stats(str(self.directory / "extract_workers.prof"))
+        lines = ["stage: extract (worker sample)", f"documents profiled: {len(files)}", ""]
+        lines += _hot_functions(stats, self.top_n)
+        path = self.directory / "extract_workers.txt"
+        path.write_text("\n".join(lines) + "\n", encoding="utf8")
+        self.reports["extract_workers"] = str(path)
+        for file in files:
+            file.unlink(missing_ok=True)
+
+    def summary(self) -> dict[str, Any]:
+        return {"directory": str(self.directory), "reports": dict(self.reports)}
+
+
+def _merged(profiles: list[cProfile.Profile]) -> pstats.Stats | None:
+    stats: pstats.Stats | None = None
+    for profile in profiles:
+        try:
+            current = pstats.Stats(profile, stream=io.StringIO())
+        except TypeError:
+            # A thread that never made a call leaves an empty profile behind.
+            continue
+        if stats is None:
+            stats = current
+        else:
+            stats.add(current)
+    return stats
+
+
+def _hot_functions(stats: pstats.Stats | None, top_n: int) -> list[str]:
+    if stats is None:
+        return ["no calls profiled"]
+    stats.files = []  # print_stats would otherwise list every merged .prof file
+    lines: list[str] = []
+    for order in ("cumulative", "tottime"):
+        buffer = io.StringIO()
+        stats.stream = buffer
+        stats.sort_stats(order).print_stats(top_n)
+        lines += [f"top {top_n} functions by {order}", buffer.getvalue().strip(), ""]
+    return lines
+
+
+def _sampled(url: str, rate: float) -> bool:
+    if rate >= 1.0:
+        return True
+    if rate <= 0.0:
+        return False
+    # Hashing the URL keeps the sample stable across runs and worker processes.
+    bucket = int.from_bytes(hashlib.blake2b(url.encode("utf8"), digest_size=4).digest(), "big")
+    return bucket / 0xFFFFFFFF < rate
+
+
+@contextmanager
+def profile_extraction(url: str) -> Iterator[None]:
+    """Profiles a sampled extraction inside a worker process and spools the stats for
+    ``StageProfiler.collect_worker_profiles``. In the parent the stage profiler already
+    covers extraction, so nothing happens there."""
+    if not PROFILE_ENABLED or multiprocessing.parent_process() is None or not _sampled(url, PROFILE_SAMPLE_RATE):
+        yield
+        return
+    profile = cProfile.Profile()
+    profile.enable()
+    try:
+        yield
+    finally:
+        profile.disable()
+        WORKER_SPOOL.mkdir(parents=True, exist_ok=True)
+        digest = hashlib.blake2b(url.encode("utf8"), digest_size=8).hexdigest()
+        profile.dump_stats(str(WORKER_SPOOL / f"{os.getpid()}-{digest}.prof"))
+
+
+_PROFILER: StageProfiler | None = (
+    StageProfiler(LOG_DIR / f"profile-{datetime.now(timezone.utc).strftime('%Y%m%dT%H%M%SZ')}")
+    if PROFILE_ENABLED
+    else None
+)
+
+
+def profile_stage(name: str):
+    if _PROFILER is None:
+        return nullcontext()
+    return _PROFILER.stage(name)
+
+
+def profile_section(name: str):
+    if _PROFILER is None:
+        return nullcontext()
+    return _PROFILER.section(name)
+
+
+def write_section_profiles() -> None:
+    if _PROFILER is not None:
+        _PROFILER.write_sections()
+
+
+def collect_worker_profiles() -> None:
+    if _PROFILER is not None:
+        _PROFILER.collect_worker_profiles()
+
+
+def profile_summary() -> dict[str, Any] | None:
+    return _PROFILER.summary() if _PROFILER is not None else None
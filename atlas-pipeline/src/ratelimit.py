@@ -0,0 +1,191 @@
+from __future__ import annotations
+
+import random
+import threading
+import time
+from dataclasses import asdict, dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float):
+        self.rate = max(rate, 1e-6)
+        self.capacity = max(capacity, 1.0)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, *, deadline: float | None = None) -> bool:
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if now >= self._blocked_until and self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return True
+                wait = max(self._blocked_until - now, (1.0 - self._tokens) / self.rate, 0.0)
+            if deadline is not None and now + wait > deadline:
+                return False
+            time.sleep(wait)
+
+    def pause(self, seconds: float) -> None:
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + max(seconds, 0.0))
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    if not value:
+        return None
+    text = value.strip()
+    try:
+        return max(float(text), 0.0)
+    except ValueError:
+        pass
+    try:
+        moment = parsedate_to_datetime(text)
+    except Exception:
+        return None
+    if moment.tzinfo is None:
+        moment = moment.replace(tzinfo=timezone.utc)
+    return max((moment - datetime.now(timezone.utc)).total_seconds(), 0.0)
+
+
+class CircuitOpen(RuntimeError):
+    def __init__(self, domain: str):
+        super().__init__(f"circuit open for {domain}")
+        self.domain = domain
+
+
+@dataclass
+class DomainHealth:
+    requests: int = 0
+    failures: int = 0
+    consecutive_failures: int = 0
+    retry_after_seconds: float = 0.0
+    rejected: int = 0
+    opened_at: str | None = None
+    open_reason: str | None = None
+
+
+class DomainLimiter:
+    """Per-domain request control: a token bucket per domain, exponential backoff with
+    full jitter (or the server's ``Retry-After``) applied as a pause on that domain's
+    bucket, and a circuit breaker that refuses the domain for the rest of the run once it
+    fails ``failure_threshold`` requests in a row or asks for a longer wait than
+    ``max_retry_after``."""
+
+    def __init__(
+        self,
+        *,
+        interval: float,
+        burst: float = 1.0,
+        failure_threshold: int = 5,
+        backoff_base: float = 0.8,
+        backoff_max: float = 30.0,
+        max_retry_after: float = 60.0,
+    ):
+        self.interval = interval
+        self.burst = burst
+        self.failure_threshold = failure_threshold
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.max_retry_after = max_retry_after
+        self._overrides: dict[str, tuple[float, float]] = {}
+        self._buckets: dict[str, TokenBucket] = {}
+        self._health: dict[str, DomainHealth] = {}
+        self._lock = threading.Lock()
+
+    def configure(self, domain: str, *, rate: float, burst: float | None = None) -> None:
+        with self._lock:
+            current = self._overrides.get(domain)
+            # Sources sharing a domain get the most conservative of their limits.
+            if current is not None:
+                rate = min(rate, current[0])
+                burst = min(burst or current[1], current[1])
+            self._overrides[domain] = (rate, burst or 1.0)
+            self._buckets.pop(domain, None)
+
+    def _bucket(self, domain: str) -> TokenBucket:
+        with self._lock:
+            if domain not in self._buckets:
+                if domain in self._overrides:
+                    rate, burst = self._overrides[domain]
+                else:
+                    # A zero interval means no spacing, but the bucket still carries backoff pauses.
+                    rate, burst = (1.0 / self.interval if self.interval > 0 else 1e6), self.burst
+                self._buckets[domain] = TokenBucket(rate, burst)
+            return self._buckets[domain]
+
+    def acquire(self, domain: str) -> None:
+        with self._lock:
+            health = self._health.setdefault(domain, DomainHealth())
+            if health.opened_at is not None:
+                health.rejected += 1
+                raise CircuitOpen(domain)
+            health.requests += 1
+        self._bucket(domain).acquire()
+
+    def backoff(self, attempt: int) -> float:
+        ceiling = min(self.backoff_max, self.backoff_base * (2 ** max(attempt - 1, 0)))
+        return random.uniform(0.0, ceiling)
+
+    def record_success(self, domain: str) -> None:
+        with self._lock:
+            self._health.setdefault(domain, DomainHealth()).consecutive_failures = 0
+
+    def record_failure(self, domain: str, *, attempt: int = 1, retry_after: float | None = None) -> bool:
+        """Counts a failed request and pauses the domain before the next one. Returns False
+        when the circuit opened, so the caller should stop retrying."""
+        with self._lock:
+            health = self._health.setdefault(domain, DomainHealth())
+            health.failures += 1
+            health.consecutive_failures += 1
+            if retry_after is not None:
+                health.retry_after_seconds += retry_after
+            if health.opened_at is None:
+                if retry_after is not None and retry_after > self.max_retry_after:
+                    reason = f"retry-after {retry_after:.0f}s"
+                elif health.consecutive_failures >= self.failure_threshold:
+                    reason = f"{health.consecutive_failures} consecutive failures"
+                else:
+                    reason = None
+                if reason is not None:
+                    health.opened_at = datetime.now(timezone.utc).isoformat()
+                    health.open_reason = reason
+            opened = health.opened_at is not None
+        if opened:
+            return False
+        self._bucket(domain).pause(retry_after if retry_after is not None else self.backoff(attempt))
+        return True
+
+    def open_reason(self, domain: str) -> str | None:
+        with self._lock:
+            health = self._health.get(domain)
+            return health.open_reason if health is not None else None
+
+    def reset(self, *, interval: float | None = None) -> None:
+        with self._lock:
+            if interval is not None:
+                self.interval = interval
+            self._buckets.clear()
+            self._health.clear()
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            troubled = {
+                domain: asdict(health)
+                for domain, health in sorted(self._health.items())
+                if health.failures or health.rejected
+            }
+            return {
+                "domains": len(self._health),
+                "open_circuits": sorted(domain for domain, health in troubled.items() if health["opened_at"]),
+                "failing_domains": troubled,
+            }
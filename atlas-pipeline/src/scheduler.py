@@ -0,0 +1,172 @@
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass, replace
+from datetime import datetime, timezone
+from typing import Any
+
+from config import (
+    HTML_MAX_LINKS,
+    MAX_PER_SOURCE,
+    SCHEDULE_DECAY,
+    SCHEDULE_MIN_LINK_SHARE,
+    SCHEDULE_PERIOD_HOURS,
+    SCHEDULE_PRIORITY_WEIGHT,
+    SITEMAP_MAX_LINKS,
+)
+from sources import SourceConfig
+from watermarks import parse_instant
+
+# Weight of each outcome when scoring a polled run; an approved event is what the feed needs.
+YIELD_WEIGHTS = {"approved": 1.0, "themed": 0.25, "fresh": 0.02}
+# Listing latency at which the yield score is halved.
+LATENCY_HALF_SECONDS = 30.0
+
+
+@dataclass(frozen=True)
+class SourceHistory:
+    """Exponentially decayed per-source totals; ``runs`` is the decayed number of polls."""
+
+    runs: float = 0.0
+    entries: float = 0.0
+    fresh: float = 0.0
+    themed: float = 0.0
+    approved: float = 0.0
+    latency_seconds: float = 0.0
+    last_polled_at: str | None = None
+
+    def weighted_yield(self) -> float:
+        if self.runs <= 0:
+            return 0.0
+        total = sum(getattr(self, field) * weight for field, weight in YIELD_WEIGHTS.items())
+        return total / self.runs
+
+
+@dataclass(frozen=True)
+class ScheduledSource:
+    source_id: str
+    score: float
+    interval_hours: float
+    max_links: int
+    due: bool
+    reason: str
+
+
+def _link_cap(source: SourceConfig) -> int:
+    if source.method == "html":
+        return HTML_MAX_LINKS
+    if source.method == "sitemap":
+        return SITEMAP_MAX_LINKS
+    return MAX_PER_SOURCE
+
+
+class SourceScheduler:
+    """Decides which sources a run polls and how many new links each may follow.
+
+    A source's score blends its configured ``priority`` and its observed yield, both
+    relative to the best source in the whitelist, with yield discounted by listing
+    latency. The polling interval is ``period_hours * (1 - score) ** 2``: productive
+    sources are polled every run, and every source at least once per period. The score
+    also scales the link budget between ``min_link_share`` and the full per-method cap.
+    """
+
+    def __init__(
+        self,
+        history: dict[str, SourceHistory] | None = None,
+        *,
+        period_hours: float = SCHEDULE_PERIOD_HOURS,
+        priority_weight: float = SCHEDULE_PRIORITY_WEIGHT,
+        min_link_share: float = SCHEDULE_MIN_LINK_SHARE,
+        decay: float = SCHEDULE_DECAY,
+    ):
+        self.history = dict(history or {})
+        self.period_hours = period_hours
+        self.priority_weight = min(max(priority_weight, 0.0), 1.0)
+        self.min_link_share = min(max(min_link_share, 0.0), 1.0)
+        self.decay = decay
+        self.decisions: dict[str, ScheduledSource] = {}
+
+    def score(self, source: SourceConfig, top_priority: int, top_yield: float) -> float:
+        priority = source.priority / top_priority if top_priority > 0 else 0.0
+        history = self.history.get(source.id, SourceHistory())
+        yield_score = history.weighted_yield() / top_yield if top_yield > 0 else 0.0
+        yield_score /= 1.0 + history.latency_seconds / LATENCY_HALF_SECONDS
+        return self.priority_weight * max(priority, 0.0) + (1.0 - self.priority_weight) * yield_score
+
+    def plan(self, sources: list[SourceConfig], *, now: datetime | None = None) -> list[SourceConfig]:
+        """Returns the sources due this run, each with ``max_links`` set."""
+        now = now or datetime.now(timezone.utc)
+        top_priority = max((source.priority for source in sources), default=0)
+        top_yield = max(
+            (self.history[source.id].weighted_yield() for source in sources if source.id in self.history), default=0.0
+        )
+        selected: list[SourceConfig] = []
+        for source in sources:
+            score = self.score(source, top_priority, top_yield)
+            interval = self.period_hours * (1.0 - score) ** 2
+            history = self.history.get(source.id)
+            last_polled = parse_instant(history.last_polled_at) if history is not None else None
+            if last_polled is None:
+                due, reason = True, "never_polled"
+            else:
+                elapsed = (now - last_polled).total_seconds() / 3600
+                if elapsed >= self.period_hours:
+                    due, reason = True, "period_elapsed"
+                elif elapsed >= interval:
+                    due, reason = True, "interval_elapsed"
+                else:
+                    due, reason = False, "not_due"
+            # A source seen for the first time gets the full cap so its yield is measured fairly.
+            share = 1.0 if last_polled is None else self.min_link_share + (1.0 - self.min_link_share) * score
+            max_links = max(1, math.ceil(_link_cap(source) * share))
+            self.decisions[source.id] = ScheduledSource(
+                source_id=source.id,
+                score=round(score, 4),
+                interval_hours=round(interval, 2),
+                max_links=max_links,
+                due=due,
+                reason=reason,
+            )
+            if due:
+                selected.append(replace(source, max_links=max_links))
+        return selected
+
+    def record(
+        self,
+        source_id: str,
+        *,
+        entries: int = 0,
+        fresh: int = 0,
+        themed: int = 0,
+        approved: int = 0,
+        latency_seconds: float = 0.0,
+        polled_at: str | None = None,
+    ) -> None:
+        previous = self.history.get(source_id, SourceHistory())
+        decay = self.decay if previous.runs else 0.0
+        runs = previous.runs * decay + 1.0
+        self.history[source_id] = SourceHistory(
+            runs=runs,
+            entries=previous.entries * decay + entries,
+            fresh=previous.fresh * decay + fresh,
+            themed=previous.themed * decay + themed,
+            approved=previous.approved * decay + approved,
+            latency_seconds=(previous.latency_seconds * previous.runs * decay + latency_seconds) / runs,
+            last_polled_at=polled_at or datetime.now(timezone.utc).isoformat(),
+        )
+
+    def summary(self) -> dict[str, Any]:
+        skipped = sorted(source_id for source_id, decision in self.decisions.items() if not decision.due)
+        return {
+            "polled": len(self.decisions) - len(skipped),
+            "skipped": skipped,
+            "sources": {
+                source_id: {
+                    "score": decision.score,
+                    "interval_hours": decision.interval_hours,
+                    "max_links": decision.max_links,
+                    "reason": decision.reason,
+                }
+                for source_id, decision in sorted(self.decisions.items())
+            },
+        }
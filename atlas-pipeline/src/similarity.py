@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import hashlib
+import re
+import unicodedata
+from typing import Iterable
+
+TOKEN_RE = re.compile(r"[a-z0-9]+(?:[.,][0-9]+)*")
+STOPWORDS = frozenset(
+    """
+    a an and are as at be been but by de do for from has have in is it its of on or que the their this to
+    was were will with after before over into about said says new
+    """.split()
+)
+_MAX_HASH = (1 << 64) - 1
+
+
+def _fold(text: str) -> str:
+    decomposed = unicodedata.normalize("NFKD", text.lower())
+    return "".join(char for char in decomposed if not unicodedata.combining(char))
+
+
+def tokenize(text: str) -> list[str]:
+    return [token for token in TOKEN_RE.findall(_fold(text)) if len(token) > 1 and token not in STOPWORDS]
+
+
+def shingles(text: str, sizes: tuple[int, ...] = (2, 3)) -> set[str]:
+    """Word n-grams of each size in ``sizes``. Single words are shared by any two stories on
+    one theme; runs of words are not. Text too short for the smallest size falls back to
+    its words."""
+    tokens = tokenize(text)
+    grams = {" ".join(tokens[start : start + size]) for size in sizes for start in range(len(tokens) - size + 1)}
+    return grams or set(tokens)
+
+
+def _hash64(token: str) -> int:
+    return int.from_bytes(hashlib.blake2b(token.encode("utf8"), digest_size=8).digest(), "big")
+
+
+def minhash(tokens: Iterable[str], num_perm: int = 64) -> tuple[int, ...] | None:
+    """One-permutation MinHash: each token hash lands in one of ``num_perm`` bins and
+    empty bins borrow from the next filled bin so signatures stay comparable."""
+    bins = [_MAX_HASH] * num_perm
+    filled = False
+    for token in tokens:
+        value = _hash64(token)
+        slot = value % num_perm
+        if value < bins[slot]:
+            bins[slot] = value
+            filled = True
+    if not filled:
+        return None
+    for slot in range(num_perm):
+        offset = 1
+        while bins[slot] == _MAX_HASH:
+            source = bins[(slot + offset) % num_perm]
+            if source != _MAX_HASH:
+                bins[slot] = source + offset
+            offset += 1
+    return tuple(bins)
+
+
+def estimate_similarity(left: tuple[int, ...], right: tuple[int, ...]) -> float:
+    if not left or len(left) != len(right):
+        return 0.0
+    return sum(1 for a, b in zip(left, right) if a == b) / len(left)
+
+
+class LshIndex:
+    """Banded LSH buckets. Buckets keep only their most recent ``max_bucket`` members so
+    a degenerate band (boilerplate text) cannot turn lookups quadratic."""
+
+    def __init__(self, *, bands: int, rows: int, max_bucket: int = 64):
+        self.bands = bands
+        self.rows = rows
+        self.max_bucket = max_bucket
+        self._buckets: dict[tuple[int, tuple[int, ...]], list[int]] = {}
+
+    def query_and_add(self, key: int, signature: tuple[int, ...]) -> set[int]:
+        found: set[int] = set()
+        for band in range(self.bands):
+            start = band * self.rows
+            bucket = self._buckets.setdefault((band, signature[start : start + self.rows]), [])
+            found.update(bucket)
+            bucket.append(key)
+            if len(bucket) > self.max_bucket:
+                del bucket[0]
+        return found
+
+
+class DisjointSet:
+    def __init__(self, size: int):
+        self._parent = list(range(size))
+
+    def find(self, index: int) -> int:
+        root = index
+        while self._parent[root] != root:
+            root = self._parent[root]
+        while self._parent[index] != root:
+            self._parent[index], index = root, self._parent[index]
+        return root
+
+    def union(self, left: int, right: int) -> None:
+        left_root, right_root = self.find(left), self.find(right)
+        if left_root != right_root:
+            # The lower index wins so the cluster root is the earliest member.
+            if right_root < left_root:
+                left_root, right_root = right_root, left_root
+            self._parent[right_root] = left_root
@@ -0,0 +1,150 @@
+from __future__ import annotations
+
+import gzip
+import heapq
+import io
+from contextlib import AbstractContextManager
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any, BinaryIO, Callable, Iterator
+from xml.etree import ElementTree
+
+from config import SITEMAP_MAX_DEPTH, SITEMAP_MAX_FILES, USER_AGENT
+from extractor.fetch import open_stream
+
+GZIP_MAGIC = b"\x1f\x8b"
+
+Opener = Callable[[str], AbstractContextManager[BinaryIO]]
+
+
+@dataclass(frozen=True)
+class SitemapEntry:
+    kind: str
+    loc: str
+    lastmod: str
+    title: str = ""
+
+
+def _local(tag: Any) -> str:
+    return tag.rsplit("}", 1)[-1] if isinstance(tag, str) else ""
+
+
+def _parse_moment(value: str) -> datetime | None:
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.strip().replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo is not None else parsed.replace(tzinfo=timezone.utc)
+
+
+def _entry(kind: str, element: ElementTree.Element) -> SitemapEntry:
+    fields: dict[str, str] = {}
+    for child in element.iter():
+        name = _local(child.tag)
+        if name not in fields and child.text and child.text.strip():
+            fields[name] = child.text.strip()
+    return SitemapEntry(
+        kind=kind,
+        loc=fields.get("loc", ""),
+        lastmod=fields.get("lastmod") or fields.get("publication_date", ""),
+        title=fields.get("title", ""),
+    )
+
+
+def iter_sitemap(stream: BinaryIO) -> Iterator[SitemapEntry]:
+    """Yields ``url`` and ``sitemap`` records as they are parsed; gzip files are
+    detected by magic bytes and each record is dropped from the tree once read."""
+    reader = io.BufferedReader(stream)  # type: ignore[arg-type]
+    source: BinaryIO = gzip.GzipFile(fileobj=reader) if reader.peek(2)[:2] == GZIP_MAGIC else reader
+    root: ElementTree.Element | None = None
+    try:
+        for event, element in ElementTree.iterparse(source, events=("start", "end")):
+            if event == "start":
+                if root is None:
+                    root = element
+                continue
+            kind = _local(element.tag)
+            if kind in ("url", "sitemap") and root is not None:
+                yield _entry(kind, element)
+                root.clear()
+    except (ElementTree.ParseError, OSError, EOFError) as exc:
+        print(f"[sitemap] stopped early ({exc})")
+
+
+def _open(url: str) -> AbstractContextManager[BinaryIO]:
+    return open_stream(url, headers={"User-Agent": USER_AGENT}, timeout=25)
+
+
+def read_sitemap(
+    url: str,
+    *,
+    limit: int,
+    cutoff: datetime | None = None,
+    opener: Opener = _open,
+    max_depth: int = SITEMAP_MAX_DEPTH,
+    max_files: int = SITEMAP_MAX_FILES,
+) -> list[dict[str, Any]]:
+    """Collects up to ``limit`` page URLs, newest ``lastmod`` first.
+
+    Sitemap indexes are followed newest child first. Records older than ``cutoff``
+    are skipped. Reading stops once ``limit`` dated records newer than the cutoff have
+    been collected, but only while every dated record so far came no later than the
+    one before it: a sitemap listed oldest first is read to the end (or ``max_files``)
+    and the bounded heap keeps its newest records. Undated records are kept but rank last.
+    """
+    if limit <= 0:
+        return []
+    newest: list[tuple[float, int, SitemapEntry]] = []
+    dated = 0
+    # Newest-first so far; cleared by the first dated record newer than the one before it.
+    descending = True
+    previous = float("inf")
+    seq = 0
+    files = 0
+    pending: list[tuple[str, int]] = [(url, 0)]
+    visited: set[str] = set()
+
+    while pending and not (descending and dated >= limit) and files < max_files:
+        target, depth = pending.pop(0)
+        if target in visited:
+            continue
+        visited.add(target)
+        files += 1
+        children: list[tuple[float, str]] = []
+        try:
+            with opener(target) as stream:
+                for entry in iter_sitemap(stream):
+                    if not entry.loc:
+                        continue
+                    moment = _parse_moment(entry.lastmod)
+                    if cutoff is not None and moment is not None and moment < cutoff:
+                        continue
+                    stamp = moment.timestamp() if moment is not None else float("-inf")
+                    if entry.kind == "sitemap":
+                        if depth < max_depth:
+                            children.append((stamp, entry.loc))
+                        continue
+                    seq += 1
+                    # Min-heap on (lastmod, -seq): the oldest, latest-listed record goes first.
+                    heapq.heappush(newest, (stamp, -seq, entry))
+                    if len(newest) > limit:
+                        heapq.heappop(newest)
+                    if moment is not None:
+                        dated += 1
+                        descending = descending and stamp <= previous
+                        previous = stamp
+                        if descending and dated >= limit:
+                            break
+        except Exception as exc:
+            if target == url:
+                raise
+            print(f"[sitemap] {target}: failed ({exc})")
+        children.sort(key=lambda child: child[0], reverse=True)
+        pending[:0] = [(loc, depth + 1) for _, loc in children]
+
+    return [
+        {"title": entry.title, "summary": "", "content": "", "link": entry.loc, "published": entry.lastmod}
+        for _, _, entry in sorted(newest, reverse=True)
+    ]
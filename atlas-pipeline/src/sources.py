@@ -22,6 +22,10 @@ class SourceConfig:
     selectors: dict[str, Any] | None
     priority: int
     category_hints: list[str]
+    rate_per_sec: float | None = None
+    burst: float | None = None
+    # Set per run by the scheduler: how many new entries this source may hand to extraction.
+    max_links: int | None = None
 
 
 def _domain_from_url(value: str) -> str:
@@ -54,6 +58,8 @@ def load_sources(path: Path | None = None) -> list[SourceConfig]:
         hints = item.get("category_hints") or item.get("categories") or []
         if isinstance(hints, str):
             hints = [hints]
+        rate = item.get("rate_per_sec")
+        burst = item.get("burst")
         sources.append(
             SourceConfig(
                 id=str(item.get("id") or feed_url or url),
@@ -67,6 +73,8 @@ def load_sources(path: Path | None = None) -> list[SourceConfig]:
                 selectors=selectors,
                 priority=int(item.get("priority") or 0),
                 category_hints=[str(hint) for hint in hints],
+                rate_per_sec=float(rate) if rate else None,
+                burst=float(burst) if burst else None,
             )
         )
     return sources
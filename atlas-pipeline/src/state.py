@@ -1,21 +1,29 @@
 from __future__ import annotations
 
+import hashlib
 import json
-from datetime import datetime, timezone
+import sqlite3
+import threading
+from dataclasses import asdict
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
 from typing import Any
 
-from config import STATE_PATH, STATE_VERSION
+from config import STATE_DB_PATH, STATE_PATH, STATE_VERSION
+from scheduler import SourceHistory
+from urls import canonicalize_url
+from watermarks import SourceCursor
 
 
 def _now() -> str:
     return datetime.now(timezone.utc).isoformat()
 
 
-def load_state() -> dict[str, Any]:
-    if not STATE_PATH.exists():
+def load_state(path: Path = STATE_PATH) -> dict[str, Any]:
+    if not path.exists():
         return {"version": STATE_VERSION, "updated_at": _now(), "events": []}
     try:
-        payload = json.loads(STATE_PATH.read_text(encoding="utf8"))
+        payload = json.loads(path.read_text(encoding="utf8"))
         if isinstance(payload, dict):
             if "events" in payload:
                 return payload
@@ -41,19 +49,50 @@ def load_state() -> dict[str, Any]:
     return {"version": STATE_VERSION, "updated_at": _now(), "events": []}
 
 
-def update_state(state: dict[str, Any], new_items: list[dict[str, Any]]) -> dict[str, Any]:
+def _member_aliases(event_id: str, url: str, members: list[dict[str, Any]]) -> dict[str, list[str]]:
+    primary_url = canonicalize_url(url)
+    ids = {member.get("event_id") for member in members} - {event_id, None}
+    urls = {
+        canonicalize_url(value)
+        for member in members
+        for value in (member.get("link"), member.get("url"))
+        if isinstance(value, str) and value
+    } - {primary_url, ""}
+    return {"event_ids": sorted(ids), "urls": sorted(urls)}
+
+
+def event_aliases(event: dict[str, Any]) -> tuple[list[str], list[str]]:
+    """Event ids and canonical URLs a state event answers for besides its own."""
+    aliases = event.get("aliases")
+    if not isinstance(aliases, dict):
+        return [], []
+    ids = [value for value in aliases.get("event_ids") or [] if isinstance(value, str) and value]
+    urls = [value for value in aliases.get("urls") or [] if isinstance(value, str) and value]
+    return ids, urls
+
+
+def update_state(
+    state: dict[str, Any],
+    new_items: list[dict[str, Any]],
+    members: dict[str, list[dict[str, Any]]] | None = None,
+) -> dict[str, Any]:
+    """Appends one state event per feed item. ``members`` maps a feed item id to the
+    items of its cluster; their event ids and URLs are kept as ``aliases`` so a later run
+    does not report any of them again."""
     entries = list(state.get("events", []))
     for item in new_items:
-        entries.append(
-            {
-                "event_id": item["id"],
-                "url": item["canonical_url"],
-                "added_at": _now(),
-                "published_at": item["published_at"],
-                "event_at": item.get("event_at"),
-                "domains": sorted({source.get("domain") for source in item.get("sources", []) if source.get("domain")}),
-            }
-        )
+        entry = {
+            "event_id": item["id"],
+            "url": item["canonical_url"],
+            "added_at": _now(),
+            "published_at": item["published_at"],
+            "event_at": item.get("event_at"),
+            "domains": sorted({source.get("domain") for source in item.get("sources", []) if source.get("domain")}),
+        }
+        cluster = (members or {}).get(item["id"])
+        if cluster:
+            entry["aliases"] = _member_aliases(item["id"], item["canonical_url"], cluster)
+        entries.append(entry)
     return {
         "version": state.get("version", STATE_VERSION),
         "updated_at": _now(),
@@ -63,3 +102,227 @@ def update_state(state: dict[str, Any], new_items: list[dict[str, Any]]) -> dict
 
 def write_state(state: dict[str, Any], path=STATE_PATH) -> None:
     path.write_text(json.dumps(state, indent=2), encoding="utf8")
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS events (
+    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+    event_id TEXT,
+    url TEXT,
+    canonical_url TEXT,
+    added_at TEXT,
+    event_at TEXT,
+    payload TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS events_event_id ON events (event_id);
+CREATE INDEX IF NOT EXISTS events_canonical_url ON events (canonical_url);
+CREATE INDEX IF NOT EXISTS events_event_at ON events (event_at);
+CREATE INDEX IF NOT EXISTS events_added_at ON events (added_at);
+CREATE TABLE IF NOT EXISTS event_aliases (
+    seq INTEGER NOT NULL,
+    event_id TEXT,
+    canonical_url TEXT
+);
+CREATE INDEX IF NOT EXISTS event_aliases_seq ON event_aliases (seq);
+CREATE INDEX IF NOT EXISTS event_aliases_event_id ON event_aliases (event_id);
+CREATE INDEX IF NOT EXISTS event_aliases_canonical_url ON event_aliases (canonical_url);
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT);
+CREATE TABLE IF NOT EXISTS cursors (
+    source_id TEXT PRIMARY KEY,
+    watermark TEXT,
+    body_sha256 TEXT,
+    seen_at_mark TEXT,
+    updated_at TEXT
+);
+CREATE TABLE IF NOT EXISTS source_history (
+    source_id TEXT PRIMARY KEY,
+    payload TEXT NOT NULL,
+    updated_at TEXT
+);
+"""
+
+
+class _Membership:
+    def __init__(self, store: "StateStore", column: str):
+        self._store = store
+        self._column = column
+
+    def __contains__(self, value: object) -> bool:
+        if not isinstance(value, str) or not value:
+            return False
+        return self._store._exists(self._column, value)
+
+
+class StateStore:
+    def __init__(self, db_path: Path = STATE_DB_PATH, *, json_path: Path = STATE_PATH):
+        self.db_path = Path(db_path)
+        self.json_path = Path(json_path)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.db_path), check_same_thread=False)
+        self._conn.executescript(_SCHEMA)
+        self._migrate()
+        self._lock = threading.Lock()
+        self.changed = False
+        self.urls = _Membership(self, "canonical_url")
+        self.ids = _Membership(self, "event_id")
+        self._sync_from_json()
+
+    def _migrate(self) -> None:
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(cursors)")}
+        if "seen_at_mark" not in columns:
+            with self._conn:
+                self._conn.execute("ALTER TABLE cursors ADD COLUMN seen_at_mark TEXT")
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def _meta(self, key: str) -> str | None:
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key: str, value: str) -> None:
+        self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def _json_digest(self) -> str:
+        if not self.json_path.exists():
+            return ""
+        return hashlib.sha256(self.json_path.read_bytes()).hexdigest()
+
+    def _sync_from_json(self) -> None:
+        digest = self._json_digest()
+        with self._lock:
+            if self._meta("json_sha256") == digest:
+                return
+            payload = load_state(self.json_path)
+            with self._conn:
+                self._conn.execute("DELETE FROM events")
+                self._conn.execute("DELETE FROM event_aliases")
+                self._insert(payload.get("events", []))
+                self._set_meta("version", str(payload.get("version", STATE_VERSION)))
+                self._set_meta("updated_at", str(payload.get("updated_at") or _now()))
+                self._set_meta("json_sha256", digest)
+        print(f"[state] imported {self.count()} events from {self.json_path.name}")
+
+    def _insert(self, events: list[dict[str, Any]]) -> None:
+        for event in events:
+            if not isinstance(event, dict):
+                continue
+            seq = self._conn.execute(
+                "INSERT INTO events (event_id, url, canonical_url, added_at, event_at, payload) VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    event.get("event_id") or event.get("id"),
+                    event.get("url"),
+                    canonicalize_url(event.get("url") or "") or None,
+                    event.get("added_at"),
+                    event.get("event_at") or event.get("published_at"),
+                    json.dumps(event),
+                ),
+            ).lastrowid
+            alias_ids, alias_urls = event_aliases(event)
+            self._conn.executemany(
+                "INSERT INTO event_aliases (seq, event_id, canonical_url) VALUES (?, ?, ?)",
+                [(seq, alias, None) for alias in alias_ids]
+                + [(seq, None, canonicalize_url(alias) or None) for alias in alias_urls],
+            )
+
+    def _exists(self, column: str, value: str) -> bool:
+        with self._lock:
+            row = self._conn.execute(f"SELECT 1 FROM events WHERE {column} = ? LIMIT 1", (value,)).fetchone()
+            if row is None:
+                row = self._conn.execute(
+                    f"SELECT 1 FROM event_aliases WHERE {column} = ? LIMIT 1", (value,)
+                ).fetchone()
+        return row is not None
+
+    def count(self) -> int:
+        with self._lock:
+            return int(self._conn.execute("SELECT COUNT(*) FROM events").fetchone()[0])
+
+    def events_between(self, start: str | None = None, end: str | None = None) -> list[dict[str, Any]]:
+        query = "SELECT payload FROM events WHERE event_at IS NOT NULL"
+        params: list[str] = []
+        if start:
+            query += " AND event_at >= ?"
+            params.append(start)
+        if end:
+            query += " AND event_at < ?"
+            params.append(end)
+        with self._lock:
+            rows = self._conn.execute(query + " ORDER BY event_at", params).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+    def add_events(self, entries: list[dict[str, Any]]) -> None:
+        if not entries:
+            return
+        with self._lock, self._conn:
+            self._insert(entries)
+            self._set_meta("json_sha256", "pending")
+        self.changed = True
+
+    def prune(self, *, retention_days: int) -> int:
+        if retention_days <= 0:
+            return 0
+        cutoff = (datetime.now(timezone.utc) - timedelta(days=retention_days)).isoformat()
+        with self._lock, self._conn:
+            removed = self._conn.execute("DELETE FROM events WHERE added_at < ?", (cutoff,)).rowcount
+            if removed:
+                self._conn.execute("DELETE FROM event_aliases WHERE seq NOT IN (SELECT seq FROM events)")
+                self._set_meta("json_sha256", "pending")
+        if removed:
+            self.changed = True
+        return removed
+
+    def load_cursors(self) -> dict[str, SourceCursor]:
+        with self._lock:
+            rows = self._conn.execute("SELECT source_id, watermark, body_sha256, seen_at_mark FROM cursors").fetchall()
+        return {
+            row[0]: SourceCursor(watermark=row[1], body_sha256=row[2], seen_at_mark=tuple(json.loads(row[3] or "[]")))
+            for row in rows
+        }
+
+    def save_cursors(self, cursors: dict[str, SourceCursor]) -> None:
+        if not cursors:
+            return
+        updated_at = _now()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO cursors (source_id, watermark, body_sha256, seen_at_mark, updated_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                [
+                    (key, cursor.watermark, cursor.body_sha256, json.dumps(list(cursor.seen_at_mark)), updated_at)
+                    for key, cursor in cursors.items()
+                ],
+            )
+
+    def load_source_history(self) -> dict[str, SourceHistory]:
+        with self._lock:
+            rows = self._conn.execute("SELECT source_id, payload FROM source_history").fetchall()
+        return {row[0]: SourceHistory(**json.loads(row[1])) for row in rows}
+
+    def save_source_history(self, history: dict[str, SourceHistory]) -> None:
+        if not history:
+            return
+        updated_at = _now()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO source_history (source_id, payload, updated_at) VALUES (?, ?, ?)",
+                [(key, json.dumps(asdict(entry)), updated_at) for key, entry in history.items()],
+            )
+
+    def export(self) -> dict[str, Any]:
+        with self._lock:
+            rows = self._conn.execute("SELECT payload FROM events ORDER BY seq").fetchall()
+            version = self._meta("version")
+        return {
+            "version": int(version) if version and version.isdigit() else STATE_VERSION,
+            "updated_at": _now(),
+            "events": [json.loads(row[0]) for row in rows],
+        }
+
+    def write_json(self, state: dict[str, Any]) -> None:
+        write_state(state, self.json_path)
+        with self._lock, self._conn:
+            self._set_meta("json_sha256", self._json_digest())
+            self._set_meta("updated_at", state["updated_at"])
+        self.changed = False
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 import re
 from dataclasses import dataclass
-from typing import Iterable
+from typing import Any, Iterable
 
 
 IPO_KEYWORDS = [
@@ -36,95 +36,130 @@ REVENUE_KEYWORDS = [
 ]
 
 HTML_RE = re.compile(r"<[^>]+>")
-MONEY_RE = re.compile(r"(\$|usd)\s?[0-9][0-9,\.]*(\s*(billion|bn|million|m))?", re.IGNORECASE)
-YEAR_RE = re.compile(r"\b20[0-9]{2}\b")
-PERIOD_RE = re.compile(r"\b(q[1-4]|fy[0-9]{2,4}|annual|quarterly|full[- ]year)\b", re.IGNORECASE)
 TICKER_RE = re.compile(r"\([A-Z]{1,5}\)")
 NAME_RE = re.compile(r"\b[A-Z][a-z]+ [A-Z][a-z]+(?: [A-Z][a-z]+)?\b")
 
+REGULATOR_TOKENS = [
+    "sec",
+    "nyse",
+    "nasdaq",
+    "euronext",
+    "lseg",
+    "b3",
+    "tsx",
+    "asx",
+    "nse",
+    "jpx",
+    "hkex",
+    "fca",
+    "esma",
+    "bafin",
+    "amf",
+    "cvm",
+    "sebi",
+    "asic",
+    "mas",
+]
+RANKING_TOKENS = [
+    "forbes",
+    "bloomberg billionaire",
+    "bloomberg billionaires index",
+    "sunday times rich",
+]
+EARNINGS_TOKENS = ["earnings", "results", "financial statements"]
 
-@dataclass(frozen=True)
-class ThemeDecision:
-    theme: str
-    evidences: list[str]
+# The scanner runs over lowercased text. Each category has an exact regex
+# that is tried only at positions where one of its literal-led anchors
+# starts; anchors are merged into one alternation grouped by leading
+# character so the regex engine can skip non-candidate positions.
+_CATEGORY_PATTERNS: dict[str, tuple[str, list[str]]] = {
+    "ipo": ("|".join(IPO_KEYWORDS), IPO_KEYWORDS),
+    "billionaire": ("|".join(BILLIONAIRE_KEYWORDS), BILLIONAIRE_KEYWORDS),
+    "revenue_record": ("|".join(REVENUE_KEYWORDS), REVENUE_KEYWORDS),
+    "money": (r"(\$|usd)\s?[0-9]", [r"\$\s?[0-9]", r"usd\s?[0-9]"]),
+    "billion_value": (r"1(\.0+)?\s*(billion|bn)\b", [r"1(\.0+)?\s*b"]),
+    "date": (
+        r"\b20[0-9]{2}\b|\b(q[1-4]|fy[0-9]{2,4}|annual|quarterly|full[- ]year)\b",
+        [r"20[0-9]{2}", r"q[1-4]", r"fy[0-9]{2}", "annual", "quarterly", r"full[- ]year"],
+    ),
+    "regulator_or_exchange": ("|".join(REGULATOR_TOKENS), REGULATOR_TOKENS),
+    "ranking_source": ("|".join(RANKING_TOKENS), RANKING_TOKENS),
+    "earnings_release": ("|".join(EARNINGS_TOKENS), EARNINGS_TOKENS),
+}
 
 
-def _clean_text(text: str) -> str:
-    return re.sub(r"\s+", " ", HTML_RE.sub(" ", text)).strip()
+def _lead(anchor: str) -> tuple[str, str]:
+    size = 2 if anchor.startswith("\\") else 1
+    return anchor[:size], anchor[size:]
 
 
-def _lower(text: str) -> str:
-    return _clean_text(text).lower()
+def _build_anchor_re(anchors: Iterable[str]) -> re.Pattern[str]:
+    grouped: dict[str, list[str]] = {}
+    for anchor in anchors:
+        lead, rest = _lead(anchor)
+        grouped.setdefault(lead, []).append(rest)
+    return re.compile("|".join(f"{lead}(?:{'|'.join(rests)})" for lead, rests in grouped.items()))
 
 
-def _matches_any(text: str, patterns: Iterable[str]) -> bool:
-    return any(re.search(pattern, text) for pattern in patterns)
+_CATEGORY_RES = {name: re.compile(exact) for name, (exact, _) in _CATEGORY_PATTERNS.items()}
+_ANCHOR_RE = _build_anchor_re(anchor for _, anchors in _CATEGORY_PATTERNS.values() for anchor in anchors)
 
 
-def _has_money(text: str) -> bool:
-    return bool(MONEY_RE.search(text))
+@dataclass(frozen=True)
+class ThemeDecision:
+    theme: str
+    evidences: list[str]
 
 
-def _has_billion_value(text: str) -> bool:
-    return bool(re.search(r"\$?\s*1(\.0+)?\s*(billion|bn)\b", text, re.IGNORECASE))
+def _clean_text(text: str) -> str:
+    if "<" in text:
+        text = HTML_RE.sub(" ", text)
+    return " ".join(text.split())
 
 
-def _has_date(text: str) -> bool:
-    return bool(YEAR_RE.search(text) or PERIOD_RE.search(text))
+def _lower(text: str) -> str:
+    return _clean_text(text).lower()
 
 
-def _extract_evidence_tokens(text: str, original: str) -> dict[str, bool]:
+def scan_text(lowered: str) -> dict[str, str]:
+    hits: dict[str, str] = {}
+    position = 0
+    while len(hits) < len(_CATEGORY_RES):
+        anchor = _ANCHOR_RE.search(lowered, position)
+        if anchor is None:
+            break
+        position = anchor.start()
+        for name, pattern in _CATEGORY_RES.items():
+            if name in hits:
+                continue
+            found = pattern.match(lowered, position)
+            if found:
+                hits[name] = found.group(0)
+        position += 1
+    return hits
+
+
+def _extract_evidence_tokens(hits: dict[str, str], original: str) -> dict[str, bool]:
     return {
-        "money": _has_money(text),
-        "billion_value": _has_billion_value(text),
-        "date": _has_date(text),
+        "money": "money" in hits,
+        "billion_value": "billion_value" in hits,
+        "date": "date" in hits,
         "ticker": bool(TICKER_RE.search(original)),
         "person_name": bool(NAME_RE.search(original)),
-        "regulator_or_exchange": any(
-            token in text
-            for token in [
-                "sec",
-                "nyse",
-                "nasdaq",
-                "euronext",
-                "lseg",
-                "b3",
-                "tsx",
-                "asx",
-                "nse",
-                "jpx",
-                "hkex",
-                "fca",
-                "esma",
-                "bafin",
-                "amf",
-                "cvm",
-                "sebi",
-                "asic",
-                "mas",
-            ]
-        ),
-        "ranking_source": any(
-            token in text
-            for token in [
-                "forbes",
-                "bloomberg billionaire",
-                "bloomberg billionaires index",
-                "sunday times rich",
-            ]
-        ),
-        "earnings_release": any(token in text for token in ["earnings", "results", "financial statements"]),
+        "regulator_or_exchange": "regulator_or_exchange" in hits,
+        "ranking_source": "ranking_source" in hits,
+        "earnings_release": "earnings_release" in hits,
     }
 
 
 def evaluate_theme(title: str, summary: str, content: str) -> ThemeDecision | None:
     raw = _clean_text(" ".join([title, summary, content]))
-    lowered = raw.lower()
-    evidences = _extract_evidence_tokens(lowered, raw)
+    hits = scan_text(raw.lower())
+    evidences = _extract_evidence_tokens(hits, raw)
 
     candidates: list[ThemeDecision] = []
 
-    if _matches_any(lowered, IPO_KEYWORDS):
+    if "ipo" in hits:
         evidence_list = []
         if evidences["regulator_or_exchange"]:
             evidence_list.append("regulator_or_exchange")
@@ -135,7 +170,7 @@ def evaluate_theme(title: str, summary: str, content: str) -> ThemeDecision | No
         if evidence_list:
             candidates.append(ThemeDecision(theme="ipo", evidences=evidence_list))
 
-    if _matches_any(lowered, BILLIONAIRE_KEYWORDS):
+    if "billionaire" in hits:
         evidence_list = []
         if evidences["billion_value"]:
             evidence_list.append("explicit_billion_value")
@@ -146,7 +181,7 @@ def evaluate_theme(title: str, summary: str, content: str) -> ThemeDecision | No
         if evidence_list:
             candidates.append(ThemeDecision(theme="billionaire", evidences=evidence_list))
 
-    if _matches_any(lowered, REVENUE_KEYWORDS):
+    if "revenue_record" in hits:
         evidence_list = []
         if evidences["money"]:
             evidence_list.append("explicit_value")
@@ -160,3 +195,10 @@ def evaluate_theme(title: str, summary: str, content: str) -> ThemeDecision | No
     if len(candidates) != 1:
         return None
     return candidates[0]
+
+
+def evaluate_themes(items: Iterable[dict[str, Any]]) -> list[ThemeDecision | None]:
+    return [
+        evaluate_theme(item.get("title") or "", item.get("summary") or "", item.get("content") or "")
+        for item in items
+    ]
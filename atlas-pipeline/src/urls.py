@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import json
+import threading
+from pathlib import Path
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from config import REDIRECTS_PATH
+
+TRACKING_PARAMS = {
+    "cmpid",
+    "dclid",
+    "fbclid",
+    "gclid",
+    "icid",
+    "mc_cid",
+    "mc_eid",
+    "mkt_tok",
+    "ocid",
+    "ref",
+    "ref_src",
+    "rss",
+    "smid",
+    "taid",
+    "yclid",
+}
+TRACKING_PREFIXES = ("utm_", "__hs", "_hs", "hsa_", "pk_", "piwik_")
+
+MAX_REDIRECTS = 20000
+
+_REDIRECTS: dict[str, str] = {}
+_LOCK = threading.Lock()
+
+
+def _is_tracking(name: str) -> bool:
+    lowered = name.lower()
+    return lowered in TRACKING_PARAMS or lowered.startswith(TRACKING_PREFIXES)
+
+
+def canonicalize_url(url: str) -> str:
+    raw = (url or "").strip()
+    if not raw:
+        return ""
+    try:
+        parts = urlsplit(raw)
+    except ValueError:
+        return raw
+    host = (parts.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    if not host:
+        return raw
+    scheme = (parts.scheme or "https").lower()
+    if scheme in ("http", "https"):
+        scheme = "https"
+    port = parts.port
+    netloc = host if port in (None, 80, 443) else f"{host}:{port}"
+    path = parts.path or "/"
+    if len(path) > 1 and path.endswith("/"):
+        path = path.rstrip("/")
+    query = [(key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True) if not _is_tracking(key)]
+    return urlunsplit((scheme, netloc, path, urlencode(sorted(query)), ""))
+
+
+def remember_redirect(source_url: str, target_url: str) -> None:
+    source = canonicalize_url(source_url)
+    target = canonicalize_url(target_url)
+    if not source or not target or source == target:
+        return
+    with _LOCK:
+        _REDIRECTS.pop(source, None)
+        _REDIRECTS[source] = target
+        while len(_REDIRECTS) > MAX_REDIRECTS:
+            _REDIRECTS.pop(next(iter(_REDIRECTS)))
+
+
+def resolve_url(url: str) -> str:
+    current = canonicalize_url(url)
+    seen = {current}
+    with _LOCK:
+        while current in _REDIRECTS:
+            current = _REDIRECTS[current]
+            if current in seen:
+                break
+            seen.add(current)
+    return current
+
+
+def url_aliases(url: str) -> set[str]:
+    return {alias for alias in (canonicalize_url(url), resolve_url(url)) if alias}
+
+
+def load_redirects(path: Path = REDIRECTS_PATH) -> None:
+    try:
+        payload = json.loads(path.read_text(encoding="utf8"))
+    except Exception:
+        return
+    if not isinstance(payload, dict):
+        return
+    with _LOCK:
+        for source, target in payload.items():
+            if isinstance(source, str) and isinstance(target, str):
+                _REDIRECTS[source] = target
+
+
+def save_redirects(path: Path = REDIRECTS_PATH) -> None:
+    with _LOCK:
+        payload = dict(_REDIRECTS)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(payload), encoding="utf8")
+
+
+def reset_redirects() -> None:
+    with _LOCK:
+        _REDIRECTS.clear()
@@ -0,0 +1,139 @@
+from __future__ import annotations
+
+import hashlib
+import threading
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from typing import Any
+
+
+@dataclass(frozen=True)
+class SourceCursor:
+    watermark: str | None = None
+    body_sha256: str | None = None
+    # URLs already taken at exactly ``watermark``; coarse dates (a sitemap lastmod with no
+    # time) make ties common, and only these are dropped when the instant repeats.
+    seen_at_mark: tuple[str, ...] = ()
+
+
+def body_digest(text: str) -> str:
+    return hashlib.sha256(text.encode("utf8")).hexdigest()
+
+
+def parse_instant(value: str | None) -> datetime | None:
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    return parsed if parsed.tzinfo is not None else parsed.replace(tzinfo=timezone.utc)
+
+
+class Watermarks:
+    """Per-source ingest cursors for one run.
+
+    Cursors loaded from the previous run are read-only; advances are staged and only
+    returned by ``pending()`` for sources whose entries all made it through
+    extraction, so a failed or interrupted run never moves a cursor past unseen items.
+    """
+
+    def __init__(self, cursors: dict[str, SourceCursor] | None = None):
+        self._previous = dict(cursors or {})
+        self._staged: dict[str, SourceCursor] = {}
+        self._held: set[str] = set()
+        self._lock = threading.Lock()
+        self.unchanged_sources = 0
+        self.dropped_entries = 0
+
+    def get(self, source_id: str) -> SourceCursor | None:
+        return self._previous.get(source_id)
+
+    def is_unchanged(self, source_id: str, digest: str | None) -> bool:
+        cursor = self._previous.get(source_id)
+        if digest is None or cursor is None or cursor.body_sha256 != digest:
+            return False
+        with self._lock:
+            self.unchanged_sources += 1
+        return True
+
+    def advance(
+        self,
+        source_id: str,
+        entries: list[dict[str, Any]],
+        digest: str | None,
+        *,
+        limit: int | None = None,
+    ) -> list[dict[str, Any]]:
+        """Drops entries older than the source watermark, or at or after it and already seen,
+        and stages the new cursor. The cursor never moves past the current time.
+
+        With ``limit``, only the oldest ``limit`` new entries are kept and the cursor moves
+        no further than the newest of them, so the rest are picked up by later runs.
+        """
+        cursor = self._previous.get(source_id) or SourceCursor()
+        mark = parse_instant(cursor.watermark)
+        seen = set(cursor.seen_at_mark)
+        kept: list[dict[str, Any]] = []
+        repeated: list[dict[str, Any]] = []
+        for entry in entries:
+            published = parse_instant(entry.get("published_at"))
+            if published is not None and mark is not None:
+                if published < mark:
+                    continue
+                if entry.get("url") in seen:
+                    repeated.append(entry)
+                    continue
+            kept.append(entry)
+        dropped = len(entries) - len(kept)
+        truncated = limit is not None and len(kept) > limit
+        if truncated:
+            dated = [entry for entry in kept if parse_instant(entry.get("published_at")) is not None]
+            undated = [entry for entry in kept if parse_instant(entry.get("published_at")) is None]
+            dated.sort(key=lambda entry: parse_instant(entry.get("published_at")))
+            kept = (dated + undated)[:limit]
+        newest = mark
+        for entry in kept:
+            published = parse_instant(entry.get("published_at"))
+            if published is not None and (newest is None or published > newest):
+                newest = published
+        # A future-dated entry (a typo, an embargo date) must not carry the cursor past
+        # entries that really are published before it; it stays in the seen set instead
+        # until the cursor catches up with it.
+        now = datetime.now(timezone.utc)
+        if newest is not None and newest > now:
+            newest = now
+        at_newest: set[str] = set()
+        if newest is not None:
+            for entry in kept + repeated:
+                published = parse_instant(entry.get("published_at"))
+                if entry.get("url") and published is not None and published >= newest:
+                    at_newest.add(entry["url"])
+        if newest is not None and newest == mark:
+            at_newest |= seen
+        with self._lock:
+            self.dropped_entries += dropped
+            self._staged[source_id] = SourceCursor(
+                watermark=newest.isoformat() if newest is not None else None,
+                # A listing that was only partly consumed must not be skipped as unchanged next run.
+                body_sha256=None if truncated else digest,
+                seen_at_mark=tuple(sorted(at_newest)) if newest is not None else (),
+            )
+        return kept
+
+    def hold(self, source_id: str) -> None:
+        with self._lock:
+            self._held.add(source_id)
+
+    def pending(self) -> dict[str, SourceCursor]:
+        with self._lock:
+            return {key: cursor for key, cursor in self._staged.items() if key not in self._held}
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {
+                "unchanged_sources": self.unchanged_sources,
+                "dropped_entries": self.dropped_entries,
+                "held_sources": len(self._held),
+                "advanced_sources": len([key for key in self._staged if key not in self._held]),
+            }
@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+import json
+
+import bench
+
+
+def test_measure_reports_throughput_and_percentiles():
+    result = bench.measure("noop", [1, 2, 3], lambda value: [value] * 100, repeat=4, min_seconds=0)
+    assert result.calls == 12
+    assert result.items == 12
+    assert result.items_per_sec > 0
+    assert 0 <= result.p50_ms <= result.p95_ms
+    assert result.peak_kb > 0
+
+
+def test_compare_flags_only_regressions_beyond_tolerance():
+    baseline = {"stages": {"theme": {"items_per_sec": 100.0, "p50_ms": 2.0, "peak_kb": 50.0}}}
+    steady = {"stages": {"theme": {"items_per_sec": 90.0, "p50_ms": 2.2, "peak_kb": 55.0}}}
+    slower = {"stages": {"theme": {"items_per_sec": 60.0, "p50_ms": 3.0, "peak_kb": 50.0}}}
+    assert bench.compare(steady, baseline, tolerance=0.25) == []
+    assert len(bench.compare(slower, baseline, tolerance=0.25)) == 2
+
+
+def test_fixture_corpus_runs_every_stage(tmp_path):
+    report = bench.run_benchmarks(repeat=1, min_seconds=0)
+    assert set(report["stages"]) == set(bench.STAGES)
+    assert report["corpus"]["articles"] >= 5
+    json.dumps(report)
+    baseline = json.loads(bench.BENCH_BASELINE_PATH.read_text(encoding="utf8"))
+    assert set(baseline["stages"]) == set(bench.STAGES)
@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import io
+import time
+
+import pytest
+import requests
+
+import cassette
+import llm
+import llm_stub
+from extractor import fetch
+from ratelimit import TokenBucket
+from sitemap import iter_sitemap
+
+SITEMAP = b'<urlset xmlns="http://www.sitemaps.org/schemas/sitemap/0.9"><url><loc>https://sec.gov/a</loc></url></urlset>'
+
+
+class LiveSession:
+    def __init__(self):
+        self.calls: list[str] = []
+
+    def get(self, url, **kwargs):
+        self.calls.append(url)
+        response = requests.Response()
+        response.status_code = 200
+        response.url = url.replace("/old", "/new")
+        response.headers["Content-Type"] = "text/html; charset=utf-8"
+        response.headers["Set-Cookie"] = "session=secret"
+        response._content = SITEMAP if url.endswith(".xml") else f"<html><p>{url}</p></html>".encode("utf8")
+        return response
+
+
+class OfflineSession:
+    def get(self, url, **kwargs):
+        raise AssertionError(f"network used in replay: {url}")
+
+
+@pytest.fixture(autouse=True)
+def isolated_fetch(monkeypatch):
+    monkeypatch.setattr(fetch, "_DISK_CACHE", None)
+    monkeypatch.setattr(fetch, "MIN_INTERVAL_PER_DOMAIN", 0.0)
+    fetch.reset_fetch_cache()
+    yield
+    fetch.reset_fetch_cache()
+
+
+def _use(monkeypatch, tape: cassette.Cassette) -> None:
+    monkeypatch.setattr(cassette, "_CASSETTE", tape)
+
+
+def test_record_then_replay_fetches_offline(monkeypatch, tmp_path):
+    path = tmp_path / "run.zip"
+    live = LiveSession()
+    monkeypatch.setattr(fetch, "_SESSION", live)
+    _use(monkeypatch, cassette.Cassette(path, mode="record"))
+    recorded = fetch.fetch_url("https://sec.gov/old")
+    with fetch.open_stream("https://sec.gov/sitemap.xml") as stream:
+        assert [entry.loc for entry in iter_sitemap(stream)] == ["https://sec.gov/a"]
+    cassette.flush_cassette()
+    assert live.calls == ["https://sec.gov/old", "https://sec.gov/sitemap.xml"]
+
+    fetch.reset_fetch_cache()
+    monkeypatch.setattr(fetch, "_SESSION", OfflineSession())
+    tape = cassette.Cassette(path, mode="replay", latency_by_domain={"sec.gov": 0.05})
+    _use(monkeypatch, tape)
+    started = time.monotonic()
+    replayed = fetch.fetch_url("https://sec.gov/old")
+    assert time.monotonic() - started >= 0.05
+    assert (replayed.text, replayed.final_url, replayed.status) == (recorded.text, recorded.final_url, 200)
+    assert replayed.content_type == "text/html; charset=utf-8"
+    with fetch.open_stream("https://sec.gov/sitemap.xml") as stream:
+        assert [entry.loc for entry in iter_sitemap(stream)] == ["https://sec.gov/a"]
+    assert "set-cookie" not in tape._entries[cassette.request_key("GET", "https://sec.gov/old")]["headers"]
+
+    with pytest.raises(cassette.CassetteMiss):
+        fetch.fetch_url("https://sec.gov/unrecorded")
+    assert tape.stats()["misses"] == 1
+
+
+def test_replay_covers_llm_verification(monkeypatch, tmp_path):
+    path = tmp_path / "llm.zip"
+    server = llm_stub.serve(latency=0.0)
+    monkeypatch.setattr(llm, "LLM_ENABLED", True)
+    monkeypatch.setattr(llm, "OPENROUTER_API_KEY", "test")
+    monkeypatch.setattr(llm, "LLM_BASE_URL", server.base_url)
+    monkeypatch.setattr(llm, "_VERDICT_CACHE", None)
+    monkeypatch.setattr(llm, "_BUCKET", TokenBucket(1000, 1000))
+    pairs = [
+        ({"title": "Company 1 filed for an IPO", "summary": "Filed with the SEC in 2025.", "link": "https://sec.gov/1"}, "ipo"),
+        ({"title": "Company 2 weather update", "summary": "Filed with the SEC in 2025.", "link": "https://sec.gov/2"}, "ipo"),
+    ]
+    try:
+        _use(monkeypatch, cassette.Cassette(path, mode="record"))
+        assert llm.verify_themes(pairs) == [True, False]
+        cassette.flush_cassette()
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    monkeypatch.setattr(llm, "OPENROUTER_API_KEY", None)
+    _use(monkeypatch, cassette.Cassette(path, mode="replay"))
+    assert llm.verify_themes(pairs) == [True, False]
+
+
+def test_replay_stream_accepts_urllib3_attributes():
+    stream = cassette._ReplayStream(b"abc")
+    stream.decode_content = True
+    stream.auto_close = False
+    assert io.BufferedReader(stream).read() == b"abc"
@@ -0,0 +1,113 @@
+from __future__ import annotations
+
+import random
+
+from judge import cluster_events
+from similarity import estimate_similarity, minhash, shingles
+
+
+def _item(event_id: str, title: str, summary: str, *, ticker: str | None = None, day: str = "2025-03-04"):
+    return {
+        "event_id": event_id,
+        "event_type": "ipo",
+        "entity": title.split(" - ")[0],
+        "title": title,
+        "summary": summary,
+        "content": summary,
+        "ticker": ticker,
+        "event_at": f"{day}T00:00:00+00:00",
+    }
+
+
+def _stories():
+    return [
+        _item(
+            "a1",
+            "Acme Robotics prices IPO at $18 a share - Reuters",
+            "Acme Robotics priced its initial public offering at $18 per share, raising $420 million on Nasdaq.",
+            ticker="ACME",
+        ),
+        _item(
+            "b1",
+            "Globex Foods files for Nasdaq IPO",
+            "Globex Foods filed a registration statement for a proposed IPO of its common stock.",
+            ticker="GLBX",
+        ),
+        _item(
+            "a2",
+            "Acme Robotics (ACME) IPO priced: raises $420 million",
+            "Acme Robotics priced its initial public offering at $18 per share and raised $420 million.",
+            ticker="ACME",
+        ),
+        _item(
+            "a3",
+            "Form S-1: Acme Robotics Inc.",
+            "Acme Robotics initial public offering priced at $18 per share on Nasdaq, raising $420 million.",
+        ),
+    ]
+
+
+def test_minhash_estimates_jaccard():
+    left = shingles("acme robotics priced its initial public offering at 18 per share raising 420 million")
+    right = shingles("acme robotics priced its initial public offering at 18 per share and raised 420 million")
+    exact = len(left & right) / len(left | right)
+    estimate = estimate_similarity(minhash(left, 128), minhash(right, 128))
+    assert abs(estimate - exact) < 0.2
+    assert minhash(set()) is None
+
+
+def test_cluster_merges_same_story_across_sources():
+    clusters = cluster_events(_stories())
+    assert list(clusters) == ["a1", "b1"]
+    assert [item["event_id"] for item in clusters["a1"]] == ["a1", "a2", "a3"]
+    assert [item["event_id"] for item in clusters["b1"]] == ["b1"]
+
+
+def test_cluster_keeps_conflicting_tickers_and_distant_days_apart():
+    stories = _stories()
+    stories[2]["ticker"] = "ACMX"
+    stories[3]["event_at"] = "2025-04-20T00:00:00+00:00"
+    clusters = cluster_events(stories)
+    assert [item["event_id"] for item in clusters["a1"]] == ["a1"]
+    assert set(clusters) == {"a1", "b1", "a2", "a3"}
+
+
+def _pricing_release(event_id: str, name: str, day: str, shares: str, price: str):
+    title = f"{name} Announces Pricing of Initial Public Offering"
+    summary = (
+        f"{name} today announced the pricing of its initial public offering of {shares} shares of its common "
+        f"stock at a public offering price of ${price} per share. The shares are expected to begin trading on the "
+        "Nasdaq Global Select Market. The offering is expected to close subject to customary closing conditions. "
+        "Goldman Sachs & Co. LLC and Morgan Stanley are acting as lead book-running managers for the offering. "
+        "A registration statement relating to these securities has been filed with the SEC and became effective."
+    )
+    return _item(event_id, title, summary, day=day)
+
+
+def test_cluster_keeps_boilerplate_releases_of_different_companies_apart():
+    acme = _pricing_release("acme", "Acme Robotics", "2025-03-04", "20,000,000", "18.00")
+    globex = _pricing_release("globex", "Globex Foods", "2025-03-05", "12,500,000", "24.00")
+    clusters = cluster_events([acme, globex])
+    assert clusters == {"acme": [acme], "globex": [globex]}
+
+
+def test_cluster_exact_event_id_always_merges():
+    first = _item("same", "Acme Robotics prices IPO", "Pricing details.")
+    second = _item("same", "Unrelated wording entirely", "Nothing in common here.")
+    assert cluster_events([first, second]) == {"same": [first, second]}
+
+
+def test_cluster_is_deterministic_at_scale():
+    rng = random.Random(7)
+    vocabulary = [f"word{index}" for index in range(5000)]
+    items = []
+    for story in range(300):
+        base = rng.sample(vocabulary, 30)
+        for copy in range(3):
+            words = base[:]
+            words[rng.randrange(30)] = rng.choice(vocabulary)
+            items.append(_item(f"s{story}-{copy}", " ".join(words[:8]), " ".join(words)))
+    first = {key: [item["event_id"] for item in value] for key, value in cluster_events(items).items()}
+    second = {key: [item["event_id"] for item in value] for key, value in cluster_events(items).items()}
+    assert first == second
+    assert len(first) == 300
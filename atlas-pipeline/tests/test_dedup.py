@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 from dedup import filter_new_entries
+from state import update_state
 
 
 def test_dedup_filters_known_url_and_id():
@@ -13,3 +14,20 @@ def test_dedup_filters_known_url_and_id():
     fresh = filter_new_entries(items, state)
     assert len(fresh) == 1
     assert fresh[0]["link"] == "https://example.com/c"
+
+
+def test_dedup_respects_cluster_member_aliases():
+    members = [
+        {"event_id": "root", "link": "https://sec.gov/filing"},
+        {"event_id": "member", "link": "https://reuters.com/story?utm_source=feed"},
+    ]
+    item = {"id": "root", "canonical_url": "https://sec.gov/filing", "published_at": "2025-01-02", "sources": []}
+    state = update_state({"events": []}, [item], {"root": members})
+    assert state["events"][0]["aliases"] == {"event_ids": ["member"], "urls": ["https://reuters.com/story"]}
+
+    items = [
+        {"link": "https://reuters.com/story", "event_id": "other"},
+        {"link": "https://nasdaq.com/new", "event_id": "member"},
+        {"link": "https://nasdaq.com/fresh", "event_id": "fresh"},
+    ]
+    assert [entry["event_id"] for entry in filter_new_entries(items, state)] == ["fresh"]
@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+from extractor.content import extract_content
+from extractor.document import parse_document, visible_text
+from extractor.metadata import extract_metadata, scan_head
+from extractor.parse_html import parse_html
+
+PAGE = """<html><head><title>Acme files for IPO</title>
+<link rel="stylesheet canonical" href="/markets/acme-ipo">
+<meta property="article:published_time" content="2025-03-04T10:00:00Z">
+<meta name="author" content=" Jane Roe "><script>var hidden = 1;</script></head>
+<body><p>Acme filed a registration statement.</p><noscript>enable js</noscript></body></html>"""
+
+
+def test_shared_document_feeds_metadata_and_body():
+    document = parse_document(PAGE)
+    metadata = extract_metadata(document, base_url="https://www.reuters.com/x")
+    body = parse_html(document, url="https://www.reuters.com/x")
+    assert metadata.canonical_url == "https://www.reuters.com/markets/acme-ipo"
+    assert metadata.published_at == "2025-03-04T10:00:00+00:00"
+    assert metadata.author == "Jane Roe"
+    assert "registration statement" in body.text
+    fallback = visible_text(document)
+    assert "registration statement" in fallback
+    assert "hidden" not in fallback and "enable js" not in fallback
+
+
+def test_extract_content_reports_parse_time():
+    extracted = extract_content("https://www.reuters.com/x", PAGE)
+    assert extracted.title == "Acme files for IPO"
+    assert extracted.parse_ms > 0
+
+
+def test_metadata_comes_from_the_head_only():
+    page = """<html><head><title>Filing notice</title>
+<meta property="article:modified_time" content="2025-03-06T09:00:00Z">
+<meta name="pubdate" content="2025-03-04T10:00:00Z">
+<meta property="og:title" content="">
+<meta property="og:title" content="Acme IPO">
+</head><body><svg><title>icon</title></svg>
+<meta name="author" content="Body Author"><link rel="canonical" href="/wrong">
+<p>Body text.</p></body></html>"""
+    for source in (page, parse_document(page)):
+        metadata = extract_metadata(source, base_url="https://www.sec.gov/news/1")
+        assert metadata.title == "Filing notice"
+        assert metadata.og_title == "Acme IPO"
+        assert metadata.published_at == "2025-03-04T10:00:00+00:00"
+        assert metadata.author is None
+        assert metadata.canonical_url is None
+
+
+def test_streaming_scan_stops_before_the_body():
+    head = '<html><head><title>Acme</title><link rel="canonical" href="https://acme.example/a"></head>'
+    page = head + "<body>" + "<div><p>filler</p></div>" * 20000 + "</body></html>"
+    index = scan_head(page)
+    assert (index.title, index.canonical) == ("Acme", "https://acme.example/a")
+    assert scan_head("").title is None
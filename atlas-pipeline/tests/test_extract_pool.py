@@ -0,0 +1,30 @@
+from __future__ import annotations
+
+import time
+
+from extractor import pool
+from extractor.content import ExtractedContent
+
+
+def _page(title: str) -> str:
+    body = " ".join(["The company filed for an IPO with the SEC in 2025."] * 30)
+    return f"<html><head><title>{title}</title></head><body><article><p>{body}</p></article></body></html>"
+
+
+def test_extract_many_keeps_input_order_across_workers():
+    documents = [(f"https://example.com/{index}", _page(f"Story {index}")) for index in range(5)]
+    documents.insert(2, ("https://example.com/bad", None))
+    results = pool.extract_many(documents, workers=2, timeout=30)
+    assert len(results) == 6
+    assert isinstance(results[2], Exception)
+    titles = [result.title for result in results if isinstance(result, ExtractedContent)]
+    assert titles == [f"Story {index}" for index in range(5)]
+
+
+def test_extract_many_reports_timeouts(monkeypatch):
+    def slow(url, html):
+        time.sleep(2)
+
+    monkeypatch.setattr(pool, "extract_content", slow)
+    results = pool.extract_many([("https://example.com/slow", "<html></html>")], workers=1, timeout=0.2)
+    assert isinstance(results[0], pool.ExtractionTimeout)
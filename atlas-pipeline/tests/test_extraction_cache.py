@@ -0,0 +1,61 @@
+from __future__ import annotations
+
+from dataclasses import replace
+
+from extractor import extraction_cache, pool
+from extractor.extraction_cache import ExtractionCache
+
+PAGE = "<html><head><title>Acme IPO</title></head><body><article><p>{body}</p></article></body></html>"
+
+
+def test_unchanged_pages_skip_extraction_and_survive_a_restart(monkeypatch, tmp_path):
+    cache = ExtractionCache(tmp_path / "extractions.json.z", max_bytes=1 << 20, version="v1")
+    monkeypatch.setattr(extraction_cache, "_EXTRACTION_CACHE", cache)
+    calls: list[str] = []
+    real_extract = pool.extract_content
+
+    def counting_extract(url, html):
+        calls.append(url)
+        return real_extract(url, html)
+
+    monkeypatch.setattr(pool, "extract_content", counting_extract)
+    documents = [("https://sec.gov/a", PAGE.format(body="Acme filed for an IPO.")), ("https://sec.gov/b", PAGE.format(body="Other."))]
+    first = pool.extract_many(documents, workers=1, timeout=0)
+    cache.flush()
+
+    reloaded = ExtractionCache(tmp_path / "extractions.json.z", max_bytes=1 << 20, version="v1")
+    monkeypatch.setattr(extraction_cache, "_EXTRACTION_CACHE", reloaded)
+    reindented = [(url, html.replace(" ", "  ") + "\n\n") for url, html in documents]
+    changed = [reindented[0], ("https://sec.gov/b", PAGE.format(body="Edited."))]
+    second = pool.extract_many(changed, workers=1, timeout=0)
+
+    assert calls == ["https://sec.gov/a", "https://sec.gov/b", "https://sec.gov/b"]
+    assert second[0] == replace(first[0], parse_ms=0.0, attempts=())
+    assert reloaded.stats()["hits"] == 1
+
+
+def test_new_extractor_version_discards_the_cache(tmp_path):
+    path = tmp_path / "extractions.json.z"
+    old = ExtractionCache(path, max_bytes=1 << 20, version="v1")
+    content = pool.extract_content("https://sec.gov/a", PAGE.format(body="Acme."))
+    old.put("https://sec.gov/a", "<p>x</p>", content)
+    old.flush()
+
+    new = ExtractionCache(path, max_bytes=1 << 20, version="v2")
+    assert new.get("https://sec.gov/a", "<p>x</p>") is None
+    assert new.stats()["invalidated"] is True
+
+
+def test_eviction_keeps_the_cache_under_its_size_bound(tmp_path):
+    cache = ExtractionCache(tmp_path / "extractions.json.z", max_bytes=2000, version="v1")
+    content = pool.extract_content("https://sec.gov/a", PAGE.format(body="x" * 600))
+    for index in range(5):
+        cache.put(f"https://sec.gov/{index}", f"<p>{index}</p>", content)
+    assert cache.stats()["text_bytes"] <= 2000
+    assert cache.get("https://sec.gov/0", "<p>0</p>") is None
+    assert cache.get("https://sec.gov/4", "<p>4</p>") is not None
+
+
+def test_version_tracks_extractor_code():
+    assert extraction_cache.extractor_version() == extraction_cache.extractor_version()
+    assert len(extraction_cache.extractor_version()) == 16
@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+from extractor import pool, strategy
+from extractor.content import ExtractedContent
+from extractor.parse_html import ExtractorAttempt, parse_html
+from extractor.strategy import ExtractorStrategy
+
+PAGE = "<html><head><title>Notice</title></head><body><div><span>Acme filed for an IPO.</span></div></body></html>"
+
+
+def _content(method: str, tried: list[str]) -> ExtractedContent:
+    return ExtractedContent(
+        url="https://newsroom.example/a",
+        canonical_url="https://newsroom.example/a",
+        title="t",
+        published_at=None,
+        author=None,
+        og_title=None,
+        og_description=None,
+        text="body",
+        extraction_method=method,
+        paywalled=False,
+        attempts=tuple(ExtractorAttempt(method=name, chars=0 if name != method else 4, ms=5.0) for name in tried),
+    )
+
+
+def test_parse_html_tries_the_preferred_method_first():
+    default = parse_html(PAGE, url="https://newsroom.example/a")
+    preferred = parse_html(PAGE, url="https://newsroom.example/a", prefer="bs4")
+    assert [attempt.method for attempt in preferred.attempts] == ["bs4"]
+    assert preferred.method == "bs4" and preferred.text
+    assert [attempt.method for attempt in default.attempts][0] == "trafilatura"
+
+
+def test_strategy_learns_goes_straight_to_winner_and_reprobes(tmp_path):
+    learner = ExtractorStrategy(tmp_path / "strategy.json", min_pages=3, probe_every=4, decay=1.0)
+    url = "https://www.newsroom.example/a"
+    for _ in range(3):
+        assert learner.choose(url) is None
+        learner.record(url, _content("readability", ["trafilatura", "readability"]))
+
+    picks = [learner.choose(url) for _ in range(4)]
+    assert picks == ["readability", "readability", "readability", None]
+    learner.record(url, _content("readability", ["readability"]))
+    stats = learner.stats()
+    assert stats["attempts_saved"] == 1
+    domain = stats["domains"]["newsroom.example"]
+    assert (domain["preferred"], domain["probes"], domain["fast_path"]) == ("readability", 1, 1)
+    assert domain["methods"]["trafilatura"]["win_share"] == 0.0
+
+    # A probe where trafilatura works again forgets the learned preference.
+    learner.record(url, _content("trafilatura", ["trafilatura"]))
+    assert learner.choose(url) is None
+    learner.flush()
+    reloaded = ExtractorStrategy(tmp_path / "strategy.json", min_pages=3, probe_every=4, decay=1.0)
+    assert reloaded.stats()["domains"] == {}
+    assert reloaded.choose(url) is None
+
+
+def test_extract_many_passes_the_learned_method_to_extraction(monkeypatch, tmp_path):
+    learner = ExtractorStrategy(tmp_path / "strategy.json", min_pages=1, probe_every=100)
+    learner.record("https://newsroom.example/old", _content("bs4", ["trafilatura", "readability", "bs4"]))
+    monkeypatch.setattr(strategy, "_STRATEGY", learner)
+    monkeypatch.setattr(pool, "cached_extraction", lambda url, html: None)
+    results = pool.extract_many([("https://newsroom.example/new", PAGE)], workers=1, timeout=0)
+    assert [attempt.method for attempt in results[0].attempts] == ["bs4"]
+    assert learner.stats()["domains"]["newsroom.example"]["attempts_saved"] == 2
@@ -0,0 +1,293 @@
+from __future__ import annotations
+
+import hashlib
+import threading
+import time
+
+import pytest
+import requests
+
+from extractor import fetch
+from extractor.http_cache import HttpCache
+from ratelimit import CircuitOpen, DomainLimiter
+
+
+class FakeResponse:
+    def __init__(self, url: str, status_code: int = 200, headers: dict | None = None):
+        self.url = url
+        self.status_code = status_code
+        self.headers = headers or {"content-type": "text/html"}
+        self.content = b"<html></html>" if status_code == 200 else b""
+        self.raw = None
+
+    def iter_content(self, chunk_size: int = 1):
+        for start in range(0, len(self.content), chunk_size):
+            yield self.content[start : start + chunk_size]
+
+    def raise_for_status(self) -> None:
+        return None
+
+    def close(self) -> None:
+        return None
+
+
+class FakeSession:
+    def __init__(self, delay: float = 0.0):
+        self.delay = delay
+        self.calls: list[tuple[str, float]] = []
+        self.lock = threading.Lock()
+
+    def get(self, url, **kwargs):
+        with self.lock:
+            self.calls.append((url, time.monotonic()))
+        time.sleep(self.delay)
+        return FakeResponse(url)
+
+
+@pytest.fixture(autouse=True)
+def no_disk_cache(monkeypatch):
+    monkeypatch.setattr(fetch, "_DISK_CACHE", None)
+
+
+def test_concurrent_requests_for_same_url_share_one_fetch(monkeypatch):
+    session = FakeSession(delay=0.1)
+    monkeypatch.setattr(fetch, "_SESSION", session)
+    fetch.reset_fetch_cache()
+    results = []
+
+    def worker():
+        results.append(fetch.fetch_url("https://example.com/a", allow_cached=False))
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(session.calls) == 1
+    assert len(results) == 4
+    assert sum(1 for result in results if not result.from_cache) == 1
+
+
+def test_domain_interval_only_spaces_same_domain(monkeypatch):
+    session = FakeSession()
+    monkeypatch.setattr(fetch, "_SESSION", session)
+    monkeypatch.setattr(fetch, "MIN_INTERVAL_PER_DOMAIN", 0.2)
+    fetch.reset_fetch_cache()
+
+    fetch.fetch_url("https://www.example.com/a")
+    fetch.fetch_url("https://other.org/a")
+    fetch.fetch_url("https://example.com/b")
+
+    times = {url: at for url, at in session.calls}
+    assert times["https://other.org/a"] - times["https://www.example.com/a"] < 0.1
+    assert times["https://example.com/b"] - times["https://www.example.com/a"] >= 0.19
+
+
+class ConditionalSession(FakeSession):
+    def get(self, url, **kwargs):
+        self.calls.append((url, time.monotonic()))
+        if kwargs["headers"].get("If-None-Match") == '"v1"':
+            return FakeResponse(url, status_code=304)
+        return FakeResponse(url, headers={"content-type": "text/html", "etag": '"v1"'})
+
+
+def test_disk_cache_revalidates_stale_entries(monkeypatch, tmp_path):
+    session = ConditionalSession()
+    cache = HttpCache(tmp_path, max_bytes=1024 * 1024, ttl_by_kind={"feed": 0, "article": 3600})
+    monkeypatch.setattr(fetch, "_SESSION", session)
+    monkeypatch.setattr(fetch, "_DISK_CACHE", cache)
+    monkeypatch.setattr(fetch, "MIN_INTERVAL_PER_DOMAIN", 0.0)
+    fetch.reset_fetch_cache()
+
+    first = fetch.fetch_url("https://example.com/feed", kind="feed")
+    cache.flush()
+    fetch.reset_fetch_cache()
+    second = fetch.fetch_url("https://example.com/feed", kind="feed")
+    third = fetch.fetch_url("https://example.com/article", kind="article")
+    fetch.reset_fetch_cache()
+    fourth = fetch.fetch_url("https://example.com/article", kind="article")
+
+    assert first.cache_status == "miss"
+    assert second.cache_status == "revalidated"
+    assert second.text == first.text
+    assert third.cache_status == "miss"
+    assert fourth.cache_status == "hit"
+    assert len(session.calls) == 3
+
+
+def _noise(seed: str) -> str:
+    chunks = []
+    digest = seed.encode("utf8")
+    for _ in range(10):
+        digest = hashlib.sha256(digest).digest()
+        chunks.append(digest.hex())
+    return "".join(chunks)
+
+
+def test_disk_cache_evicts_least_recently_used(tmp_path):
+    cache = HttpCache(tmp_path, max_bytes=800, ttl_by_kind={"article": 3600})
+    for name in ("a", "b", "c"):
+        cache.put(
+            f"https://example.com/{name}",
+            final_url=f"https://example.com/{name}",
+            status=200,
+            content_type="text/html",
+            text=_noise(name),
+            etag=None,
+            last_modified=None,
+            kind="article",
+        )
+        if name == "b":
+            assert cache.get("https://example.com/a") is not None
+
+    assert cache.size_bytes() <= 800
+    assert cache.get("https://example.com/a") is not None
+    assert cache.get("https://example.com/b") is None
+    assert cache.get("https://example.com/c") is not None
+
+
+class FlakySession(FakeSession):
+    def __init__(self, statuses: list[int], headers: dict | None = None):
+        super().__init__()
+        self.statuses = statuses
+        self.headers = headers or {}
+
+    def get(self, url, **kwargs):
+        self.calls.append((url, time.monotonic()))
+        status = self.statuses.pop(0) if self.statuses else 200
+        return FakeResponse(url, status_code=status, headers={"content-type": "text/html", **self.headers})
+
+
+def _limiter(monkeypatch, **kwargs) -> DomainLimiter:
+    limiter = DomainLimiter(interval=0.0, backoff_base=0.01, **kwargs)
+    monkeypatch.setattr(fetch, "_LIMITER", limiter)
+    fetch.reset_fetch_cache()
+    return limiter
+
+
+def test_retry_after_pauses_the_domain_before_retrying(monkeypatch):
+    session = FlakySession([503], headers={"retry-after": "0.3"})
+    monkeypatch.setattr(fetch, "_SESSION", session)
+    _limiter(monkeypatch)
+
+    result = fetch.fetch_url("https://sec.gov/a")
+
+    assert result.status == 200
+    assert session.calls[1][1] - session.calls[0][1] >= 0.29
+
+
+def test_circuit_breaker_stops_a_failing_domain(monkeypatch):
+    session = FlakySession([503] * 3)
+    monkeypatch.setattr(fetch, "_SESSION", session)
+    limiter = _limiter(monkeypatch, failure_threshold=3)
+
+    with pytest.raises(RuntimeError, match="HTTP 503"):
+        fetch.fetch_url("https://sec.gov/a")
+    with pytest.raises(CircuitOpen):
+        fetch.fetch_url("https://sec.gov/b")
+    fetch.fetch_url("https://fca.org.uk/a")
+
+    assert [url for url, _ in session.calls].count("https://sec.gov/a") == 3
+    assert "https://sec.gov/b" not in [url for url, _ in session.calls]
+    stats = limiter.stats()
+    assert stats["open_circuits"] == ["sec.gov"]
+    assert stats["failing_domains"]["sec.gov"]["rejected"] == 1
+
+
+def test_long_retry_after_opens_circuit_without_waiting(monkeypatch):
+    session = FlakySession([429], headers={"retry-after": "3600"})
+    monkeypatch.setattr(fetch, "_SESSION", session)
+    limiter = _limiter(monkeypatch, max_retry_after=60)
+
+    started = time.monotonic()
+    with pytest.raises(RuntimeError, match="HTTP 429"):
+        fetch.fetch_url("https://sec.gov/a")
+
+    assert time.monotonic() - started < 1
+    assert len(session.calls) == 1
+    assert limiter.stats()["failing_domains"]["sec.gov"]["open_reason"] == "retry-after 3600s"
+
+
+def test_client_errors_are_not_retried(monkeypatch):
+    class MissingResponse(FakeResponse):
+        def raise_for_status(self) -> None:
+            raise requests.HTTPError("404 Client Error")
+
+    class MissingSession(FakeSession):
+        def get(self, url, **kwargs):
+            self.calls.append((url, time.monotonic()))
+            return MissingResponse(url, status_code=404)
+
+    session = MissingSession()
+    monkeypatch.setattr(fetch, "_SESSION", session)
+    limiter = _limiter(monkeypatch)
+
+    with pytest.raises(requests.HTTPError):
+        fetch.fetch_url("https://sec.gov/missing")
+    assert len(session.calls) == 1
+    assert limiter.stats()["open_circuits"] == []
+
+
+def test_source_rate_overrides_default_spacing():
+    limiter = DomainLimiter(interval=0.0)
+    limiter.configure("sec.gov", rate=5.0, burst=1)
+    limiter.configure("sec.gov", rate=10.0, burst=3)
+    started = time.monotonic()
+    limiter.acquire("sec.gov")
+    limiter.acquire("sec.gov")
+    assert time.monotonic() - started >= 0.19
+    started = time.monotonic()
+    limiter.acquire("fca.org.uk")
+    limiter.acquire("fca.org.uk")
+    assert time.monotonic() - started < 0.05
+
+
+class BodySession(FakeSession):
+    def __init__(self, bodies: dict[str, tuple[dict, bytes]]):
+        super().__init__()
+        self.bodies = bodies
+
+    def get(self, url, **kwargs):
+        self.calls.append((url, time.monotonic()))
+        headers, body = self.bodies[url]
+        response = FakeResponse(url, headers=headers)
+        response.content = body
+        return response
+
+
+def test_bodies_are_capped_gated_and_decoded_without_detection(monkeypatch):
+    big = b"<html>" + b"x" * 5000 + b"</html>"
+    session = BodySession(
+        {
+            "https://sec.gov/huge": ({"content-type": "text/html", "content-length": "999999"}, b""),
+            "https://sec.gov/long": ({"content-type": "text/html"}, big),
+            "https://sec.gov/video": ({"content-type": "video/mp4"}, b"\x00\x00\x00\x18ftypmp42"),
+            "https://sec.gov/prospectus": ({"content-type": "application/octet-stream"}, b"%PDF-1.7 ..."),
+            "https://sec.gov/legacy": ({"content-type": "text/html"}, b'<meta charset="windows-1252"><p>caf\xe9 \x93ok\x94</p>'),
+            "https://sec.gov/plain": ({"content-type": "text/html"}, "<p>ação</p>".encode("utf8")),
+        }
+    )
+    monkeypatch.setattr(fetch, "_SESSION", session)
+    monkeypatch.setitem(fetch.MAX_BYTES_BY_KIND, "article", 4096)
+    _limiter(monkeypatch)
+
+    skipped = {url: fetch.fetch_url(url).skip_reason for url in session.bodies}
+    assert skipped == {
+        "https://sec.gov/huge": "too_large",
+        "https://sec.gov/long": "too_large",
+        "https://sec.gov/video": "unsupported_type",
+        "https://sec.gov/prospectus": "binary_content",
+        "https://sec.gov/legacy": None,
+        "https://sec.gov/plain": None,
+    }
+    assert fetch.fetch_url("https://sec.gov/legacy").text == '<meta charset="windows-1252"><p>café “ok”</p>'
+    plain = fetch.fetch_url("https://sec.gov/plain")
+    assert (plain.text, plain.bytes) == ("<p>ação</p>", len("<p>ação</p>".encode("utf8")))
+
+
+def test_decode_body_prefers_bom_then_header_then_declaration():
+    assert fetch.decode_body(b"\xef\xbb\xbf<p>ok</p>", "text/html; charset=latin-1") == "<p>ok</p>"
+    assert fetch.decode_body("é".encode("utf8"), "text/html; charset=utf-8") == "é"
+    assert fetch.decode_body(b'<?xml version="1.0" encoding="ISO-8859-1"?><a>\xe9</a>', None).endswith("<a>é</a>")
+    assert fetch.decode_body(b"<p>\xe9</p>", "text/html; charset=bogus") == "<p>é</p>"
@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+import llm
+from llm_cache import VerdictCache
+
+EVENT = {"title": "Acme files for IPO", "summary": "S-1 filed", "content": "Acme filed an S-1.", "link": "https://sec.gov/a"}
+
+
+def test_verify_theme_reuses_cached_verdicts(monkeypatch, tmp_path):
+    calls = []
+
+    def fake_call(messages, **kwargs):
+        calls.append(messages)
+        return "SIM"
+
+    cache = VerdictCache(tmp_path / "verdicts.json", ttl=3600, max_entries=10)
+    monkeypatch.setattr(llm, "LLM_ENABLED", True)
+    monkeypatch.setattr(llm, "_call_openrouter", fake_call)
+    monkeypatch.setattr(llm, "_VERDICT_CACHE", cache)
+
+    assert llm.verify_theme(EVENT, "ipo") is True
+    assert llm.verify_theme(dict(EVENT), "ipo") is True
+    assert llm.verify_theme(EVENT, "billionaire") is True
+    assert len(calls) == 2
+
+    cache.flush()
+    reloaded = VerdictCache(tmp_path / "verdicts.json", ttl=3600, max_entries=10)
+    monkeypatch.setattr(llm, "_VERDICT_CACHE", reloaded)
+    monkeypatch.setattr(llm, "OPENROUTER_MODEL", "other/model")
+    assert llm.verify_theme(EVENT, "ipo") is True
+    assert len(calls) == 3
+    assert reloaded.stats()["misses"] == 1
+
+
+def test_verdict_cache_expires_and_evicts(tmp_path):
+    cache = VerdictCache(tmp_path / "verdicts.json", ttl=3600, max_entries=2)
+    cache.put("a", True)
+    cache.put("b", False)
+    assert cache.get("a") is True
+    cache.put("c", True)
+    assert cache.get("b") is None
+    assert cache.get("a") is True
+
+    expired = VerdictCache(tmp_path / "other.json", ttl=0, max_entries=2)
+    expired.put("a", True)
+    assert expired.get("a") is None
@@ -0,0 +1,112 @@
+from __future__ import annotations
+
+import time
+
+import pytest
+
+import llm
+import llm_stub
+from llm_cache import VerdictCache
+from ratelimit import TokenBucket, parse_retry_after
+
+
+def _event(index: int, theme_text: str) -> dict:
+    return {
+        "title": f"Company {index} {theme_text}",
+        "summary": "Filed with the SEC in 2025.",
+        "content": "",
+        "link": f"https://sec.gov/{index}",
+    }
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    server = llm_stub.serve(latency=0.2)
+    monkeypatch.setattr(llm, "LLM_ENABLED", True)
+    monkeypatch.setattr(llm, "OPENROUTER_API_KEY", "test")
+    monkeypatch.setattr(llm, "LLM_BASE_URL", server.base_url)
+    monkeypatch.setattr(llm, "_VERDICT_CACHE", None)
+    monkeypatch.setattr(llm, "_BUCKET", TokenBucket(1000, 1000))
+    yield server
+    server.shutdown()
+
+
+def test_verify_themes_runs_concurrently_against_stub(stub):
+    pairs = [(_event(index, "filed for an IPO"), "ipo") for index in range(6)]
+    pairs.append((_event(6, "reported a weather update"), "ipo"))
+    start = time.monotonic()
+    verdicts = llm.verify_themes(pairs, concurrency=4, batch_size=1)
+    elapsed = time.monotonic() - start
+    assert verdicts == [True] * 6 + [False]
+    assert elapsed < 0.2 * len(pairs)
+
+
+def test_verify_themes_packs_batches_and_honors_retry_after(stub):
+    stub.rate = 1
+    pairs = [(_event(index, "filed for an IPO"), "ipo") for index in range(4)]
+    pairs.append((_event(4, "reported a weather update"), "ipo"))
+    verdicts = llm.verify_themes(pairs, concurrency=2, batch_size=3)
+    assert verdicts == [True, True, True, True, False]
+    assert stub.throttled >= 1
+
+
+def test_verify_themes_gives_up_after_deadline(stub):
+    stub.latency = 0.5
+    verdicts = llm.verify_themes([(_event(0, "filed for an IPO"), "ipo")], deadline_seconds=0.1)
+    assert verdicts == [None]
+
+
+def test_parse_retry_after_accepts_seconds_and_dates():
+    assert parse_retry_after("3") == 3.0
+    assert parse_retry_after("Wed, 21 Oct 2015 07:28:00 GMT") == 0.0
+    assert parse_retry_after("soon") is None
+
+
+def test_verify_themes_fails_on_auth_errors_and_missing_key(stub, monkeypatch):
+    pairs = [(_event(0, "filed for an IPO"), "ipo")]
+    stub.fail_status = 401
+    with pytest.raises(llm.LlmConfigError, match="HTTP 401"):
+        llm.verify_themes(pairs)
+
+    stub.fail_status = None
+    monkeypatch.setattr(llm, "OPENROUTER_API_KEY", None)
+    with pytest.raises(llm.LlmConfigError, match="OPENROUTER_API_KEY"):
+        llm.verify_themes(pairs)
+
+
+def test_verify_themes_treats_server_errors_as_no_verdict(stub):
+    stub.fail_status = 503
+    assert llm.verify_themes([(_event(0, "filed for an IPO"), "ipo")]) == [None]
+
+
+@pytest.mark.parametrize("status", [400, 413, 422])
+def test_payload_errors_cost_only_their_verdict(stub, status):
+    stub.fail_status = status
+    assert llm.verify_themes([(_event(0, "filed for an IPO"), "ipo")]) == [None]
+
+
+@pytest.mark.parametrize("status", [403, 404])
+def test_forbidden_and_not_found_fail_the_run(stub, status):
+    stub.fail_status = status
+    with pytest.raises(llm.LlmConfigError):
+        llm.verify_themes([(_event(0, "filed for an IPO"), "ipo")])
+
+
+def test_rejected_batches_are_split_until_they_fit(stub):
+    stub.latency = 0.0
+    stub.max_items = 1
+    pairs = [(_event(index, "filed for an IPO"), "ipo") for index in range(3)]
+    pairs.append((_event(3, "reported a weather update"), "ipo"))
+    assert llm.verify_themes(pairs, concurrency=1, batch_size=4) == [True, True, True, False]
+    assert stub.batch_sizes == [4, 2, 1, 1, 2, 1, 1]
+
+
+def test_single_and_batch_prompts_keep_separate_cache_entries(stub, monkeypatch, tmp_path):
+    stub.latency = 0.0
+    monkeypatch.setattr(llm, "_VERDICT_CACHE", VerdictCache(tmp_path / "verdicts.json", ttl=3600, max_entries=100))
+    pairs = [(_event(index, "filed for an IPO"), "ipo") for index in range(2)]
+    llm.verify_themes(pairs, batch_size=1)
+    llm.verify_themes(pairs, batch_size=1)
+    assert stub.requests == 2
+    llm.verify_themes(pairs, batch_size=2)
+    assert stub.requests == 3 and stub.batch_sizes == [2]
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import ingest
+import metrics
+from metrics import Metrics, render_prometheus, write_prometheus
+from sources import SourceConfig
+
+
+def _source(source_id: str) -> SourceConfig:
+    return SourceConfig(
+        id=source_id,
+        name=source_id,
+        tier="primary",
+        is_primary=True,
+        method="rss",
+        feed_url=f"https://{source_id}.gov/feed.rss",
+        url=f"https://{source_id}.gov",
+        domain=f"{source_id}.gov",
+        selectors=None,
+        priority=1,
+        category_hints=[],
+    )
+
+
+def test_stages_accumulate_wall_cpu_and_items():
+    registry = Metrics()
+    for size in (3, 2):
+        with registry.stage("extract", items_in=size) as record:
+            sum(range(20000))
+            record.items_out = size - 1
+    registry.incr("http_bytes_fetched", 512)
+    registry.observe("llm_call", 0.25)
+    registry.observe("llm_call", 0.75)
+    snapshot = registry.snapshot()
+    extract = snapshot["stages"]["extract"]
+    assert (extract["items_in"], extract["items_out"], extract["runs"]) == (5, 3, 2)
+    assert extract["wall_seconds"] > 0 and extract["cpu_seconds"] >= 0
+    assert snapshot["counters"] == {"http_bytes_fetched": 512}
+    assert snapshot["timings"]["llm_call"] == {
+        "count": 2,
+        "total_seconds": 1.0,
+        "max_seconds": 0.75,
+        "mean_seconds": 0.5,
+    }
+
+
+def test_ingest_records_per_source_counters(monkeypatch):
+    registry = Metrics()
+    monkeypatch.setattr(metrics, "METRICS", registry)
+
+    def fake_entries(source, **kwargs):
+        if source.id == "broken":
+            raise RuntimeError("HTTP 500")
+        return [{"link": "https://ok.gov/a", "title": "a"}, {"link": "https://ok.gov/b", "title": "b"}]
+
+    monkeypatch.setattr(ingest, "fetch_source_entries", fake_entries)
+    ingest.ingest_sources([_source("ok"), _source("broken")], workers=1)
+    sources = registry.snapshot()["sources"]
+    assert (sources["ok"]["entries"], sources["ok"]["new"], sources["ok"]["failures"]) == (2, 2, 0)
+    assert sources["broken"]["failures"] == 1
+
+
+def test_prometheus_textfile_is_valid_and_escaped(tmp_path):
+    registry = Metrics()
+    with registry.stage("rank", items_in=4) as record:
+        record.items_out = 1
+    registry.incr("http_cache_hit", 7)
+    registry.record_source('odd"id', entries=3, seconds=1.5)
+    text = render_prometheus(registry.snapshot())
+    assert '# TYPE atlas_stage_wall_seconds gauge' in text
+    assert 'atlas_stage_items_out{stage="rank"} 1' in text
+    assert "atlas_http_cache_hit 7" in text
+    assert 'atlas_source_entries{source="odd\\"id"} 3' in text
+
+    path = tmp_path / "atlas.prom"
+    write_prometheus(path, registry.snapshot())
+    assert path.read_text(encoding="utf8").endswith("\n")
+    assert [entry.name for entry in tmp_path.iterdir()] == ["atlas.prom"]
+
+
+def test_ingest_keeps_entries_parsed_before_a_source_fails(monkeypatch):
+    monkeypatch.setattr(metrics, "METRICS", Metrics())
+    # The second entry is malformed and raises partway through the listing.
+    monkeypatch.setattr(ingest, "fetch_source_entries", lambda source, **kwargs: [{"link": "https://ok.gov/a"}, None])
+    entries = ingest.ingest_sources([_source("ok")], workers=1)
+    assert [entry["url"] for entry in entries] == ["https://ok.gov/a"]
@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import threading
+from concurrent.futures.process import BrokenProcessPool
+from types import SimpleNamespace
+
+import pytest
+
+import ingest
+import main
+import pipeline
+from extractor import extraction_cache, strategy
+from sources import SourceConfig
+
+ARTICLE = """<html><head><title>{title}</title></head><body><article><p>{body}</p></article></body></html>"""
+
+
+def _source(index: int, domain: str) -> SourceConfig:
+    return SourceConfig(
+        id=f"src-{index}",
+        name=f"Source {index}",
+        tier="secondary",
+        is_primary=False,
+        method="rss",
+        feed_url=f"https://{domain}/feed-{index}",
+        url=f"https://{domain}/",
+        domain=domain,
+        selectors=None,
+        priority=0,
+        category_hints=[],
+    )
+
+
+def _entries(source: SourceConfig) -> list[dict]:
+    return [
+        {"title": "", "summary": "", "link": f"https://{source.domain}/{source.id}/{n}", "published": "2025-01-02T00:00:00Z"}
+        for n in range(3)
+    ]
+
+
+def _page(url: str) -> SimpleNamespace:
+    if url.endswith("/1"):
+        body = "Weather update for the weekend with light rain expected across the region."
+        return SimpleNamespace(text=ARTICLE.format(title="Weather", body=body), skip_reason=None)
+    body = f"Acme Corp (ACME) filed for an IPO with the SEC in 2025 and listed on NYSE. Reference {url}."
+    return SimpleNamespace(text=ARTICLE.format(title=f"Acme IPO {url}", body=body), skip_reason=None)
+
+
+@pytest.fixture(autouse=True)
+def no_extraction_cache(monkeypatch):
+    monkeypatch.setattr(extraction_cache, "_EXTRACTION_CACHE", None)
+    monkeypatch.setattr(strategy, "_STRATEGY", None)
+
+
+def test_streaming_mode_matches_batch(monkeypatch):
+    monkeypatch.setattr(ingest, "fetch_source_entries", _entries)
+    monkeypatch.setattr(main, "fetch_url", _page)
+    monkeypatch.setattr(pipeline, "fetch_url", _page)
+    sources = [_source(0, "sec.gov"), _source(1, "nasdaq.com"), _source(2, "sec.gov"), _source(3, "reuters.com")]
+    state = {"events": [{"url": "https://nasdaq.com/src-1/2", "event_id": "known"}]}
+
+    batch = main._run_batch(sources, state)
+    streamed = pipeline.run_streaming(sources, state, queue_size=2, fetch_workers=3, extract_workers=1)
+
+    assert streamed.discovered == batch.discovered == 12
+    assert streamed.known_skipped == batch.known_skipped == 1
+    assert streamed.candidates == batch.candidates
+    assert [item["link"] for item in streamed.themed] == [item["link"] for item in batch.themed]
+    assert [item["event_id"] for item in streamed.themed] == [item["event_id"] for item in batch.themed]
+    assert len(streamed.theme_rejected) == len(batch.theme_rejected) == 4
+
+
+def test_streaming_stops_and_reraises_when_extraction_pool_breaks(monkeypatch):
+    class BrokenPool:
+        def __init__(self, max_workers, mp_context=None):
+            pass
+
+        def submit(self, *args):
+            raise BrokenProcessPool("worker died")
+
+        def shutdown(self, wait=True, cancel_futures=False):
+            pass
+
+    monkeypatch.setattr(ingest, "fetch_source_entries", _entries)
+    monkeypatch.setattr(pipeline, "fetch_url", _page)
+    monkeypatch.setattr(pipeline, "ProcessPoolExecutor", BrokenPool)
+    sources = [_source(index, f"site{index}.gov") for index in range(6)]
+
+    outcome: dict = {}
+
+    def run() -> None:
+        try:
+            pipeline.run_streaming(sources, {"events": []}, queue_size=1, fetch_workers=2, extract_workers=2)
+        except BrokenProcessPool as exc:
+            outcome["error"] = exc
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    thread.join(timeout=10)
+    assert not thread.is_alive(), "run_streaming hung after the pool broke"
+    assert "worker died" in str(outcome["error"])
+
+
+def test_both_modes_skip_off_theme_headlines_without_fetching(monkeypatch):
+    fetched: list[str] = []
+
+    def _titled(source: SourceConfig) -> list[dict]:
+        titles = ["Acme prices IPO on Nasdaq", "SEC charges adviser with fraud", ""]
+        return [
+            {"title": title, "summary": "", "link": f"https://{source.domain}/{source.id}/{n}", "published": "2025-01-02T00:00:00Z"}
+            for n, title in enumerate(titles)
+        ]
+
+    def _fetch(url: str) -> SimpleNamespace:
+        fetched.append(url)
+        return _page(url)
+
+    monkeypatch.setattr(ingest, "fetch_source_entries", _titled)
+    monkeypatch.setattr(main, "fetch_url", _fetch)
+    monkeypatch.setattr(pipeline, "fetch_url", _fetch)
+    sources = [_source(0, "sec.gov"), _source(1, "nasdaq.com")]
+
+    batch = main._run_batch(sources, {"events": []})
+    batch_fetched = sorted(fetched)
+    fetched.clear()
+    streamed = pipeline.run_streaming(sources, {"events": []}, queue_size=2, fetch_workers=2, extract_workers=1)
+
+    assert streamed.prescreen_skipped == batch.prescreen_skipped == 2
+    assert sorted(fetched) == batch_fetched
+    assert not any(url.endswith("/1") for url in batch_fetched)
+    assert streamed.candidates == batch.candidates == 4
+
+
+def test_streaming_extraction_pool_is_not_forked_from_the_threaded_parent(monkeypatch):
+    contexts: list = []
+
+    class RecordingPool:
+        def __init__(self, max_workers, mp_context=None):
+            contexts.append(mp_context)
+
+        def submit(self, fn, *args):
+            future = pipeline.Future()
+            future.set_result(fn(*args))
+            return future
+
+        def shutdown(self, wait=True, cancel_futures=False):
+            pass
+
+    monkeypatch.setattr(ingest, "fetch_source_entries", _entries)
+    monkeypatch.setattr(pipeline, "fetch_url", _page)
+    monkeypatch.setattr(pipeline, "ProcessPoolExecutor", RecordingPool)
+    output = pipeline.run_streaming([_source(0, "sec.gov")], {"events": []}, fetch_workers=2, extract_workers=2)
+    assert output.candidates == 3
+    assert [context.get_start_method() for context in contexts] in (["forkserver"], ["spawn"])
@@ -0,0 +1,74 @@
+from __future__ import annotations
+
+import pytest
+
+from metrics import METRICS
+from prescreen import prescreen_entries, prescreen_entry, slug_words
+from sources import SourceConfig
+
+
+def _source(hints: list[str]) -> SourceConfig:
+    return SourceConfig(
+        id="sec",
+        name="SEC",
+        tier="primary",
+        is_primary=True,
+        method="rss",
+        feed_url="https://sec.gov/feed.rss",
+        url="https://sec.gov",
+        domain="sec.gov",
+        selectors=None,
+        priority=1,
+        category_hints=hints,
+    )
+
+
+def _entry(title: str = "", summary: str = "", url: str = "https://sec.gov/news/1", hints: list[str] | None = None) -> dict:
+    return {"title": title, "summary": summary, "url": url, "source": _source(hints or [])}
+
+
+def test_slug_words_drop_numbers_and_suffixes():
+    assert slug_words("https://www.sec.gov/newsroom/press-releases/2025-41-sec-charges_adviser.html") == [
+        "newsroom",
+        "press",
+        "releases",
+        "sec",
+        "charges",
+        "adviser",
+    ]
+
+
+@pytest.mark.parametrize(
+    ("entry", "keep", "reason"),
+    [
+        (_entry("Acme Corp prices its initial public offering"), True, "theme_cue"),
+        (_entry("Jane Roe joins the <b>billionaires</b> club"), True, "theme_cue"),
+        (_entry(url="https://sec.gov/newsroom/acme-files-s-1-for-ipo"), True, "theme_cue"),
+        (_entry("SEC charges adviser with defrauding clients"), False, "off_theme"),
+        (_entry(url="https://sec.gov/newsroom/speeches-statements/atkins-remarks-conference"), False, "off_theme"),
+        (_entry("Update"), True, "ambiguous"),
+        (_entry("Commission announces agenda for open meeting"), True, "ambiguous"),
+    ],
+)
+def test_conservative_mode_keeps_anything_ambiguous(entry, keep, reason):
+    decision = prescreen_entry(entry, "conservative")
+    assert (decision.keep, decision.reason) == (keep, reason)
+
+
+def test_strict_mode_and_category_hints():
+    agenda = _entry("Commission announces agenda for open meeting")
+    assert prescreen_entry(agenda, "strict").reason == "no_theme_cue"
+    assert prescreen_entry(agenda, "off").keep
+    # A source that only publishes IPO news gets no credit for revenue wording.
+    earnings = _entry("Acme reports quarterly earnings", hints=["ipo"])
+    assert prescreen_entry(earnings, "strict").keep is False
+    assert prescreen_entry(_entry("Acme reports quarterly earnings"), "strict").keep
+
+
+def test_skipped_entries_are_counted():
+    METRICS.reset()
+    entries = [_entry("SEC charges adviser"), _entry("Acme IPO"), _entry("Commission announces agenda for open meeting")]
+    assert prescreen_entries(entries, "strict") == [entries[1]]
+    counters = METRICS.snapshot()["counters"]
+    assert counters["prescreen_skipped_off_theme"] == 1
+    assert counters["prescreen_skipped_no_theme_cue"] == 1
@@ -0,0 +1,108 @@
+from __future__ import annotations
+
+import cProfile
+import threading
+
+import profiling
+from profiling import StageProfiler
+
+
+def _threaded_hotspot() -> list[bytes]:
+    return [bytes(256) for _ in range(2000)]
+
+
+def _allocate() -> list[str]:
+    return [str(number) * 4 for number in range(5000)]
+
+
+def test_stage_report_covers_worker_threads_and_allocations(tmp_path):
+    profiler = StageProfiler(tmp_path / "profile", top_n=10)
+    kept: list = []
+    with profiler.stage("extract"):
+        thread = threading.Thread(target=lambda: kept.append(_threaded_hotspot()))
+        thread.start()
+        thread.join()
+        kept.append(_allocate())
+    report = (tmp_path / "profile" / "extract.txt").read_text(encoding="utf8")
+    assert "_threaded_hotspot" in report
+    assert "_allocate" in report
+    assert "test_profiling.py" in report.split("allocation sites")[1]
+    assert (tmp_path / "profile" / "extract.prof").exists()
+    assert profiler.summary()["reports"] == {"extract": str(tmp_path / "profile" / "extract.txt")}
+
+
+def test_sections_report_overlapping_stages_separately(tmp_path):
+    profiler = StageProfiler(tmp_path / "profile", top_n=10)
+
+    def ingest() -> None:
+        with profiler.section("ingest"):
+            _threaded_hotspot()
+
+    thread = threading.Thread(target=ingest)
+    thread.start()
+    with profiler.section("theme"):
+        _allocate()
+    thread.join()
+    profiler.write_sections()
+    ingest_report = (tmp_path / "profile" / "ingest.txt").read_text(encoding="utf8")
+    theme_report = (tmp_path / "profile" / "theme.txt").read_text(encoding="utf8")
+    assert "_threaded_hotspot" in ingest_report and "_allocate" not in ingest_report
+    assert "_allocate" in theme_report and "_threaded_hotspot" not in theme_report
+    assert set(profiler.summary()["reports"]) == {"ingest", "theme"}
+
+
+class _SingleProfiler(cProfile.Profile):
+    """Refuses a second active profiler, as cProfile does on Python 3.12+."""
+
+    active = 0
+
+    def enable(self, *args, **kwargs):
+        if _SingleProfiler.active:
+            raise ValueError("Another profiling tool is already active")
+        _SingleProfiler.active += 1
+        super().enable(*args, **kwargs)
+
+    def disable(self):
+        _SingleProfiler.active = 0
+        super().disable()
+
+
+def test_profiling_turns_itself_off_when_another_profiler_is_active(tmp_path, monkeypatch):
+    monkeypatch.setattr(profiling.cProfile, "Profile", _SingleProfiler)
+    profiler = StageProfiler(tmp_path / "profile", top_n=10)
+    kept: list = []
+    with profiler.stage("extract"):
+        thread = threading.Thread(target=lambda: kept.append(_threaded_hotspot()))
+        thread.start()
+        thread.join()
+    assert len(kept) == 1
+    assert not profiler.enabled
+    with profiler.stage("theme"), profiler.section("theme"):
+        kept.append(_allocate())
+    profiler.write_sections()
+    assert profiler.summary()["reports"] == {}
+
+
+def test_worker_profiles_are_merged_and_spool_cleared(tmp_path):
+    spool = tmp_path / "spool"
+    spool.mkdir()
+    profiler = StageProfiler(tmp_path / "profile", top_n=5)
+    for index in range(2):
+        profile = cProfile.Profile()
+        profile.enable()
+        _allocate()
+        profile.disable()
+        profile.dump_stats(str(spool / f"{index}.prof"))
+    profiler.collect_worker_profiles(spool)
+    report = (tmp_path / "profile" / "extract_workers.txt").read_text(encoding="utf8")
+    assert "documents profiled: 2" in report
+    assert "_allocate" in report
+    assert list(spool.iterdir()) == []
+
+
+def test_sampling_is_stable_per_url():
+    urls = [f"https://sec.gov/{index}" for index in range(1000)]
+    picked = [url for url in urls if profiling._sampled(url, 0.1)]
+    assert 50 < len(picked) < 150
+    assert picked == [url for url in urls if profiling._sampled(url, 0.1)]
+    assert profiling._sampled(urls[0], 1.0) and not profiling._sampled(urls[0], 0.0)
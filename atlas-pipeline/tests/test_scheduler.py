@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+import json
+from datetime import datetime, timedelta, timezone
+
+from scheduler import SourceHistory, SourceScheduler
+from sources import SourceConfig
+from state import StateStore
+from watermarks import SourceCursor, Watermarks
+
+NOW = datetime(2025, 3, 10, 12, 0, tzinfo=timezone.utc)
+
+
+def _source(source_id: str, priority: int = 0, method: str = "rss") -> SourceConfig:
+    return SourceConfig(
+        id=source_id,
+        name=source_id,
+        tier="primary",
+        is_primary=True,
+        method=method,
+        feed_url=f"https://{source_id}.gov/feed",
+        url=f"https://{source_id}.gov",
+        domain=f"{source_id}.gov",
+        selectors=None,
+        priority=priority,
+        category_hints=[],
+    )
+
+
+def _polled(hours_ago: float, **counts: float) -> SourceHistory:
+    return SourceHistory(runs=4.0, last_polled_at=(NOW - timedelta(hours=hours_ago)).isoformat(), **counts)
+
+
+def test_score_blends_priority_with_observed_yield():
+    scheduler = SourceScheduler(
+        {"busy": _polled(1, approved=4.0, themed=8.0), "quiet": _polled(1, entries=40.0)},
+        priority_weight=0.3,
+    )
+    busy, quiet, primary = _source("busy"), _source("quiet"), _source("primary", priority=10)
+    top_yield = scheduler.history["busy"].weighted_yield()
+    assert scheduler.score(busy, 10, top_yield) > scheduler.score(primary, 10, top_yield)
+    assert scheduler.score(primary, 10, top_yield) > scheduler.score(quiet, 10, top_yield) == 0.0
+    assert scheduler.score(primary, 10, top_yield) == 0.3
+
+
+def test_plan_polls_high_yield_sources_and_guarantees_the_period():
+    scheduler = SourceScheduler(
+        {
+            "busy": _polled(3, approved=4.0, themed=8.0),
+            "quiet": _polled(5),
+            "stale": _polled(25),
+        },
+        period_hours=24,
+        min_link_share=0.25,
+    )
+    sources = [_source("busy"), _source("quiet"), _source("stale"), _source("new")]
+    polled = {source.id: source for source in scheduler.plan(sources, now=NOW)}
+
+    assert set(polled) == {"busy", "stale", "new"}
+    summary = scheduler.summary()
+    assert summary["skipped"] == ["quiet"]
+    assert summary["sources"]["stale"]["reason"] == "period_elapsed"
+    assert summary["sources"]["new"]["reason"] == "never_polled"
+    assert polled["stale"].max_links == 3
+    assert polled["busy"].max_links > polled["stale"].max_links
+
+
+def test_record_decays_history_and_persists(tmp_path):
+    scheduler = SourceScheduler(decay=0.5)
+    scheduler.record("sec", entries=10, approved=2, latency_seconds=1.0, polled_at=NOW.isoformat())
+    scheduler.record("sec", entries=10, approved=0, latency_seconds=3.0, polled_at=NOW.isoformat())
+    history = scheduler.history["sec"]
+    assert (history.runs, history.approved, history.entries) == (1.5, 1.0, 15.0)
+    assert round(history.latency_seconds, 4) == round((1.0 * 0.5 + 3.0) / 1.5, 4)
+
+    json_path = tmp_path / "state.json"
+    json_path.write_text(json.dumps({"version": 4, "events": []}), encoding="utf8")
+    store = StateStore(tmp_path / "state.sqlite3", json_path=json_path)
+    store.save_source_history(scheduler.history)
+    assert store.load_source_history() == scheduler.history
+    store.close()
+
+
+def test_capped_advance_keeps_oldest_and_leaves_the_rest_for_later():
+    marks = Watermarks({"s": SourceCursor(watermark="2025-03-01T00:00:00+00:00", body_sha256="old")})
+    entries = [{"url": str(day), "published_at": f"2025-03-0{day}T00:00:00+00:00"} for day in (5, 4, 3, 2)]
+    kept = marks.advance("s", entries, "digest", limit=2)
+    assert [entry["url"] for entry in kept] == ["2", "3"]
+    assert marks.pending()["s"] == SourceCursor(
+        watermark="2025-03-03T00:00:00+00:00", body_sha256=None, seen_at_mark=("3",)
+    )
@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import gzip
+import io
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+from sitemap import iter_sitemap, read_sitemap
+
+NS = 'xmlns="http://www.sitemaps.org/schemas/sitemap/0.9"'
+
+
+def _urlset(*pairs: tuple[str, str]) -> bytes:
+    rows = "".join(f"<url><loc>{loc}</loc><lastmod>{lastmod}</lastmod></url>" for loc, lastmod in pairs)
+    return f'<?xml version="1.0"?><urlset {NS}>{rows}</urlset>'.encode("utf8")
+
+
+def _index(*pairs: tuple[str, str]) -> bytes:
+    rows = "".join(f"<sitemap><loc>{loc}</loc><lastmod>{lastmod}</lastmod></sitemap>" for loc, lastmod in pairs)
+    return f'<?xml version="1.0"?><sitemapindex {NS}>{rows}</sitemapindex>'.encode("utf8")
+
+
+def _opener(documents: dict[str, bytes], opened: list[str]):
+    @contextmanager
+    def opener(url: str):
+        opened.append(url)
+        yield io.BytesIO(documents[url])
+
+    return opener
+
+
+def test_iter_sitemap_reads_news_fields_and_gzip():
+    body = (
+        f'<urlset {NS} xmlns:news="http://www.google.com/schemas/sitemap-news/0.9">'
+        "<url><loc>https://x.com/a</loc><news:news><news:publication_date>2025-03-04</news:publication_date>"
+        "<news:title>Acme prices IPO</news:title></news:news></url></urlset>"
+    ).encode("utf8")
+    entries = list(iter_sitemap(io.BytesIO(gzip.compress(body))))
+    assert [(entry.kind, entry.loc, entry.lastmod, entry.title) for entry in entries] == [
+        ("url", "https://x.com/a", "2025-03-04", "Acme prices IPO")
+    ]
+
+
+def test_iter_sitemap_keeps_records_before_a_parse_error():
+    body = _urlset(*[(f"https://x.com/{index}", "2025-03-04") for index in range(2000)])
+    entries = list(iter_sitemap(io.BytesIO(body[: len(body) // 2])))
+    assert 0 < len(entries) < 2000
+    assert entries[0].loc == "https://x.com/0"
+
+
+def test_read_sitemap_follows_index_newest_first_and_sorts():
+    documents = {
+        "https://x.com/index.xml": _index(
+            ("https://x.com/old.xml.gz", "2024-01-01"),
+            ("https://x.com/new.xml.gz", "2025-03-05"),
+        ),
+        "https://x.com/new.xml.gz": gzip.compress(
+            _urlset(("https://x.com/n1", "2025-03-01"), ("https://x.com/n2", "2025-03-05"), ("https://x.com/n3", ""))
+        ),
+        "https://x.com/old.xml.gz": gzip.compress(_urlset(("https://x.com/o1", "2023-12-31"))),
+    }
+    opened: list[str] = []
+    entries = read_sitemap(
+        "https://x.com/index.xml",
+        limit=10,
+        cutoff=datetime(2025, 1, 1, tzinfo=timezone.utc),
+        opener=_opener(documents, opened),
+    )
+    assert [entry["link"] for entry in entries] == ["https://x.com/n2", "https://x.com/n1", "https://x.com/n3"]
+    assert opened == ["https://x.com/index.xml", "https://x.com/new.xml.gz"]
+
+
+def test_read_sitemap_stops_once_limit_is_reached():
+    documents = {
+        "https://x.com/index.xml": _index(("https://x.com/a.xml", "2025-03-05"), ("https://x.com/b.xml", "2025-03-01")),
+        "https://x.com/a.xml": _urlset(*[(f"https://x.com/a{day}", f"2025-03-0{day}") for day in range(5, 0, -1)]),
+        "https://x.com/b.xml": _urlset(("https://x.com/b1", "2025-03-01")),
+    }
+    opened: list[str] = []
+    entries = read_sitemap("https://x.com/index.xml", limit=3, opener=_opener(documents, opened))
+    assert [entry["link"] for entry in entries] == ["https://x.com/a5", "https://x.com/a4", "https://x.com/a3"]
+    assert "https://x.com/b.xml" not in opened
+
+
+def test_read_sitemap_reads_oldest_first_sitemaps_to_the_end():
+    documents = {
+        "https://x.com/index.xml": _index(("https://x.com/a.xml", "2025-03-05"), ("https://x.com/b.xml", "2025-03-01")),
+        "https://x.com/a.xml": _urlset(*[(f"https://x.com/a{day}", f"2025-03-0{day}") for day in range(1, 6)]),
+        "https://x.com/b.xml": _urlset(("https://x.com/b1", "2025-03-01")),
+    }
+    opened: list[str] = []
+    entries = read_sitemap("https://x.com/index.xml", limit=3, opener=_opener(documents, opened))
+    assert [entry["link"] for entry in entries] == ["https://x.com/a5", "https://x.com/a4", "https://x.com/a3"]
+    assert "https://x.com/b.xml" in opened
@@ -0,0 +1,76 @@
+from __future__ import annotations
+
+import json
+
+from dedup import filter_known_entries, filter_new_entries
+from state import StateStore
+
+
+def _write_json(path, events):
+    path.write_text(json.dumps({"version": 4, "updated_at": "2025-01-01T00:00:00Z", "events": events}), encoding="utf8")
+
+
+def test_store_imports_json_and_answers_membership(tmp_path):
+    json_path = tmp_path / "state.json"
+    _write_json(
+        json_path,
+        [
+            {"event_id": "e1", "url": "https://www.sec.gov/a", "added_at": "2025-01-01T00:00:00+00:00", "event_at": "2025-01-01T00:00:00+00:00"},
+            {"event_id": "e2", "url": "https://reuters.com/b", "added_at": "2025-02-01T00:00:00+00:00", "event_at": "2025-02-01T00:00:00+00:00"},
+        ],
+    )
+    store = StateStore(tmp_path / "state.sqlite3", json_path=json_path)
+
+    assert "https://sec.gov/a" in store.urls
+    assert "e2" in store.ids and "e3" not in store.ids
+    assert [event["event_id"] for event in store.events_between("2025-01-15", "2025-03-01")] == ["e2"]
+
+    items = [{"link": "http://sec.gov/a/", "event_id": "x"}, {"link": "https://nasdaq.com/c", "event_id": "e1"}, {"link": "https://nasdaq.com/d", "event_id": "y"}]
+    assert [item["event_id"] for item in filter_new_entries(items, store)] == ["y"]
+    assert filter_known_entries([{"url": "https://sec.gov/a?utm_source=x"}], store.urls) == []
+    store.close()
+
+
+def test_store_exports_additions_and_prunes(tmp_path):
+    json_path = tmp_path / "state.json"
+    _write_json(json_path, [{"event_id": "old", "url": "https://sec.gov/old", "added_at": "2000-01-01T00:00:00+00:00"}])
+    store = StateStore(tmp_path / "state.sqlite3", json_path=json_path)
+    store.add_events([{"event_id": "new", "url": "https://sec.gov/new", "added_at": "2099-01-01T00:00:00+00:00"}])
+    assert store.prune(retention_days=30) == 1
+    store.write_json(store.export())
+    store.close()
+
+    exported = json.loads(json_path.read_text(encoding="utf8"))
+    assert exported["version"] == 4
+    assert [event["event_id"] for event in exported["events"]] == ["new"]
+
+    reopened = StateStore(tmp_path / "state.sqlite3", json_path=json_path)
+    assert reopened.count() == 1 and "new" in reopened.ids
+    reopened.close()
+
+    _write_json(json_path, [])
+    resynced = StateStore(tmp_path / "state.sqlite3", json_path=json_path)
+    assert resynced.count() == 0
+    resynced.close()
+
+
+def test_store_answers_for_cluster_aliases_until_pruned(tmp_path):
+    json_path = tmp_path / "state.json"
+    _write_json(
+        json_path,
+        [
+            {
+                "event_id": "root",
+                "url": "https://sec.gov/filing",
+                "added_at": "2000-01-01T00:00:00+00:00",
+                "aliases": {"event_ids": ["member"], "urls": ["https://reuters.com/story"]},
+            }
+        ],
+    )
+    store = StateStore(tmp_path / "state.sqlite3", json_path=json_path)
+    assert "member" in store.ids and "https://reuters.com/story" in store.urls
+    assert filter_known_entries([{"url": "https://www.reuters.com/story/"}], store.urls) == []
+
+    assert store.prune(retention_days=30) == 1
+    assert "member" not in store.ids and "https://reuters.com/story" not in store.urls
+    store.close()
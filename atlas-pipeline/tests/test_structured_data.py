@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from extractor import parse_html as cascade
+from extractor.content import extract_content
+from extractor.document import parse_document
+from extractor.strategy import ExtractorStrategy
+from extractor.structured import extract_structured
+
+BODY = "Acme Corp filed a registration statement with the SEC for a proposed initial public offering. " * 6
+URL = "https://www.reuters.com/markets/acme-ipo"
+
+
+def _jsonld_page(article: dict, *, html_attrs: str = "", body: str = "<p>Sidebar links</p>") -> str:
+    return f"""<html {html_attrs}><head><title>Acme files for IPO | Reuters</title>
+<meta property="article:modified_time" content="2025-03-05T08:00:00Z">
+<script type="application/ld+json">{json.dumps(article)}</script></head>
+<body>{body}</body></html>"""
+
+
+def _news_article(**overrides) -> dict:
+    article = {
+        "@context": "https://schema.org",
+        "@type": "NewsArticle",
+        "headline": "Acme files for IPO",
+        "datePublished": "2025-03-04T10:00:00Z",
+        "author": [{"@type": "Person", "name": "Jane Roe"}, {"@type": "Person", "name": "John Doe"}],
+        "articleBody": BODY,
+    }
+    article.update(overrides)
+    return article
+
+
+def test_complete_jsonld_skips_the_extractor_cascade(monkeypatch):
+    def _no_cascade(*args, **kwargs):
+        raise AssertionError("cascade should not run")
+
+    monkeypatch.setattr(cascade, "_run_extractor", _no_cascade)
+    page = _jsonld_page({"@graph": [{"@type": "WebPage"}, _news_article()]})
+    extracted = extract_content(URL, page)
+    assert extracted.extraction_method == "jsonld"
+    assert extracted.text == BODY.strip()
+    assert extracted.published_at == "2025-03-04T10:00:00+00:00"
+    assert extracted.author == "Jane Roe, John Doe"
+    assert [attempt.method for attempt in extracted.attempts] == ["jsonld"]
+    assert not extracted.paywalled
+
+
+def test_teaser_jsonld_falls_back_but_keeps_the_publish_date():
+    page = _jsonld_page(_news_article(articleBody="Acme filed."), body=f"<article><p>{BODY}</p></article>")
+    extracted = extract_content(URL, page)
+    assert extracted.extraction_method in cascade.EXTRACTORS
+    assert "registration statement" in extracted.text
+    assert extracted.published_at == "2025-03-04T10:00:00+00:00"
+
+
+def test_microdata_ignores_properties_of_nested_items():
+    page = f"""<html><head><title>t</title></head><body>
+<div itemscope itemtype="https://schema.org/NewsArticle">
+  <h1 itemprop="headline">Acme files for IPO</h1>
+  <div itemprop="publisher" itemscope itemtype="https://schema.org/Organization"><span itemprop="name">Wire</span></div>
+  <span itemprop="author" itemscope itemtype="https://schema.org/Person"><span itemprop="name">Jane Roe</span></span>
+  <time itemprop="datePublished" datetime="2025-03-04T10:00:00Z">March 4</time>
+  <div itemprop="articleBody"><p>{BODY}</p></div>
+</div></body></html>"""
+    article = extract_structured(parse_document(page))
+    assert article is not None and article.complete
+    assert (article.method, article.headline, article.author) == ("microdata", "Acme files for IPO", "Jane Roe")
+    assert article.published_at == "2025-03-04T10:00:00+00:00"
+
+
+def test_amp_page_takes_its_article_element_as_body():
+    page = _jsonld_page(
+        _news_article(articleBody=None), html_attrs="amp", body=f"<header>Menu</header><article><p>{BODY}</p></article>"
+    )
+    extracted = extract_content(URL, page)
+    assert extracted.extraction_method == "amp"
+    assert extracted.text == BODY.strip()
+
+
+@pytest.mark.parametrize("payload", ["{not json", json.dumps({"@type": "Organization", "name": "Acme"})])
+def test_pages_without_article_data_use_the_cascade(payload):
+    page = f'<html><head><script type="application/ld+json">{payload}</script></head><body><p>{BODY}</p></body></html>'
+    assert extract_structured(parse_document(page)) is None
+    assert extract_content(URL, page).extraction_method in cascade.EXTRACTORS
+
+
+def test_structured_pages_do_not_train_the_extractor_strategy(tmp_path):
+    learner = ExtractorStrategy(tmp_path / "strategy.json", min_pages=1)
+    learner.record(URL, extract_content(URL, _jsonld_page(_news_article())))
+    stats = learner.stats()
+    assert (stats["structured"], stats["pages"], stats["domains"]) == (1, 0, {})
@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from theme_filter import evaluate_theme
+from theme_filter import evaluate_theme, evaluate_themes, scan_text
 
 
 def test_theme_filter_ipo():
@@ -40,3 +40,22 @@ def test_theme_filter_rejects_ambiguous():
         "",
     )
     assert decision is None
+
+
+def test_scan_text_reports_overlapping_hits():
+    hits = scan_text("she entered the bloomberg billionaires index with $1 billion in 2025")
+    assert hits["billionaire"] == "billionaires index"
+    assert hits["ranking_source"].startswith("bloomberg billionaire")
+    assert hits["billion_value"] == "1 billion"
+    assert hits["date"] == "2025"
+    assert "ipo" not in hits
+
+
+def test_evaluate_themes_matches_single_calls():
+    items = [
+        {"title": "Company posts record revenue", "summary": "Q1 2025 earnings", "content": ""},
+        {"title": "Weather", "summary": "Rain expected", "content": ""},
+    ]
+    decisions = evaluate_themes(items)
+    assert decisions[0] == evaluate_theme(items[0]["title"], items[0]["summary"], "")
+    assert decisions[1] is None
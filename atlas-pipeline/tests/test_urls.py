@@ -0,0 +1,25 @@
+from __future__ import annotations
+
+from dedup import build_known_url_index, filter_known_entries
+from urls import canonicalize_url, remember_redirect, reset_redirects
+
+
+def test_canonicalize_url_strips_noise():
+    assert (
+        canonicalize_url("http://WWW.Reuters.com/markets/deals/ipo-news/?utm_source=rss&id=7&fbclid=x#top")
+        == "https://reuters.com/markets/deals/ipo-news?id=7"
+    )
+
+
+def test_known_index_filters_aliases_and_redirects():
+    reset_redirects()
+    state = {"events": [{"url": "https://www.sec.gov/news/press-release/2025-1", "event_id": "a"}]}
+    remember_redirect("https://sec.gov/r/123", "https://www.sec.gov/news/press-release/2025-1/")
+    entries = [
+        {"url": "http://sec.gov/news/press-release/2025-1?utm_medium=feed"},
+        {"url": "https://sec.gov/r/123"},
+        {"url": "https://sec.gov/news/press-release/2025-2"},
+    ]
+    unknown = filter_known_entries(entries, build_known_url_index(state))
+    reset_redirects()
+    assert [entry["url"] for entry in unknown] == ["https://sec.gov/news/press-release/2025-2"]
@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import ingest
+from sources import SourceConfig
+from state import StateStore
+from watermarks import SourceCursor, Watermarks, parse_instant
+
+ITEM = "<item><title>{title}</title><link>https://sec.gov/{slug}</link><pubDate>{date}</pubDate></item>"
+
+
+def _rss(*items: tuple[str, str]) -> str:
+    body = "".join(ITEM.format(title=slug, slug=slug, date=date) for slug, date in items)
+    return f'<?xml version="1.0"?><rss version="2.0"><channel><title>t</title>{body}</channel></rss>'
+
+
+def _source() -> SourceConfig:
+    return SourceConfig(
+        id="sec",
+        name="SEC",
+        tier="primary",
+        is_primary=True,
+        method="rss",
+        feed_url="https://sec.gov/feed.rss",
+        url="https://sec.gov",
+        domain="sec.gov",
+        selectors=None,
+        priority=1,
+        category_hints=[],
+    )
+
+
+def _serve(monkeypatch, text: str) -> None:
+    monkeypatch.setattr(ingest, "fetch_url", lambda url, **kwargs: SimpleNamespace(text=text, skip_reason=None))
+
+
+def test_advance_drops_older_entries_and_ties_already_seen():
+    marks = Watermarks({"s": SourceCursor(watermark="2025-03-02T00:00:00+00:00", seen_at_mark=("b",))})
+    entries = [
+        {"url": "a", "published_at": "2025-03-01T00:00:00+00:00"},
+        {"url": "b", "published_at": "2025-03-02T00:00:00+00:00"},
+        {"url": "b2", "published_at": "2025-03-02T00:00:00+00:00"},
+        {"url": "c", "published_at": "2025-03-03T00:00:00+00:00"},
+        {"url": "d", "published_at": None},
+    ]
+    assert [entry["url"] for entry in marks.advance("s", entries, "digest")] == ["b2", "c", "d"]
+    assert marks.pending() == {
+        "s": SourceCursor(watermark="2025-03-03T00:00:00+00:00", body_sha256="digest", seen_at_mark=("c",))
+    }
+    marks.hold("s")
+    assert marks.pending() == {}
+    assert marks.stats()["dropped_entries"] == 2
+
+
+def test_date_only_ties_survive_across_runs():
+    first = Watermarks()
+    day = "2025-03-02T00:00:00+00:00"
+    first.advance("s", [{"url": "a", "published_at": day}], None)
+    cursor = first.pending()["s"]
+    assert cursor.seen_at_mark == ("a",)
+
+    second = Watermarks({"s": cursor})
+    later = [{"url": "a", "published_at": day}, {"url": "b", "published_at": day}]
+    assert [entry["url"] for entry in second.advance("s", later, None)] == ["b"]
+    assert second.pending()["s"].seen_at_mark == ("a", "b")
+
+
+def test_future_dated_entry_does_not_push_the_cursor_past_now():
+    first = Watermarks()
+    entries = [
+        {"url": "typo", "published_at": "2999-01-01T00:00:00+00:00"},
+        {"url": "a", "published_at": "2025-03-02T00:00:00+00:00"},
+    ]
+    assert len(first.advance("s", entries, None)) == 2
+    cursor = first.pending()["s"]
+    assert parse_instant(cursor.watermark) <= datetime.now(timezone.utc)
+    assert cursor.seen_at_mark == ("typo",)
+
+    second = Watermarks({"s": cursor})
+    later = [*entries, {"url": "b", "published_at": datetime.now(timezone.utc).isoformat()}]
+    assert [entry["url"] for entry in second.advance("s", later, None)] == ["b"]
+    assert "typo" in second.pending()["s"].seen_at_mark
+
+
+def test_skipped_listing_is_not_digested(monkeypatch):
+    _serve(monkeypatch, _rss(("one", "Mon, 03 Mar 2025 10:00:00 GMT")))
+    marks = Watermarks()
+    ingest.ingest_source(_source(), marks)
+
+    monkeypatch.setattr(ingest, "fetch_url", lambda url, **kwargs: SimpleNamespace(text="", skip_reason="too_large"))
+    skipped = Watermarks(marks.pending())
+    assert ingest.ingest_source(_source(), skipped) == []
+    assert skipped.pending()["sec"].body_sha256 is None
+    assert Watermarks(skipped.pending()).is_unchanged("sec", ingest._listing_digest(_source())) is False
+
+
+def test_ingest_skips_unchanged_feed_and_keeps_only_new_entries(monkeypatch):
+    first = _rss(("one", "Mon, 03 Mar 2025 10:00:00 GMT"), ("two", "Tue, 04 Mar 2025 10:00:00 GMT"))
+    _serve(monkeypatch, first)
+    marks = Watermarks()
+    assert [entry["url"] for entry in ingest.ingest_source(_source(), marks)] == [
+        "https://sec.gov/one",
+        "https://sec.gov/two",
+    ]
+
+    _serve(monkeypatch, first)
+    unchanged = Watermarks(marks.pending())
+    assert ingest.ingest_source(_source(), unchanged) == []
+    assert unchanged.stats()["unchanged_sources"] == 1
+    assert unchanged.pending() == {}
+
+    _serve(monkeypatch, _rss(("three", "Wed, 05 Mar 2025 10:00:00 GMT"), ("two", "Tue, 04 Mar 2025 10:00:00 GMT")))
+    changed = Watermarks(marks.pending())
+    assert [entry["url"] for entry in ingest.ingest_source(_source(), changed)] == ["https://sec.gov/three"]
+
+
+def test_cursors_persist_in_state_store(tmp_path):
+    json_path = tmp_path / "state.json"
+    json_path.write_text(json.dumps({"version": 4, "events": []}), encoding="utf8")
+    db_path = tmp_path / "state.sqlite3"
+    # A database written before seen_at_mark existed is migrated in place.
+    legacy = sqlite3.connect(str(db_path))
+    legacy.execute("CREATE TABLE cursors (source_id TEXT PRIMARY KEY, watermark TEXT, body_sha256 TEXT, updated_at TEXT)")
+    legacy.execute("INSERT INTO cursors VALUES ('old', '2025-03-01T00:00:00+00:00', NULL, NULL)")
+    legacy.commit()
+    legacy.close()
+
+    store = StateStore(db_path, json_path=json_path)
+    cursor = SourceCursor(watermark="2025-03-04T10:00:00+00:00", body_sha256="abc", seen_at_mark=("https://sec.gov/a",))
+    store.save_cursors({"sec": cursor})
+    store.close()
+    reopened = StateStore(db_path, json_path=json_path)
+    assert reopened.load_cursors() == {"old": SourceCursor(watermark="2025-03-01T00:00:00+00:00"), "sec": cursor}
+    reopened.close()